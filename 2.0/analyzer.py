@@ -1,51 +1,134 @@
 import os
 import pathlib
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from classifier import FileClassifier
+from scan_index import ScanIndex
+from summarizer import StructureSummarizer
+
+# Helpers shared with PushAgent live at the repository root (see repo_root.py)
+from gitignore import IgnoreMatcher, tracked_files
+from tree_model import FileTree
 
 class ProjectAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_dir=None, use_index=True, max_workers=8, max_files=20000, max_bytes=4_000_000,
+                 respect_gitignore=True, use_git=True, classifier=None, summarizer=None):
         self.supported_extensions = {'.py', '.js', '.ts', '.html', '.css', '.json', '.md'}
+        # Extension-less or .txt/.toml files that describe dependencies and entry points
+        self.manifest_files = {'requirements.txt', 'pyproject.toml', 'setup.cfg', 'Pipfile', 'Dockerfile', 'Makefile'}
+        self.ignored_dirs = {'.git', 'node_modules', '__pycache__', 'venv', 'env', '.idea', '.vscode'}
         self.max_snippet_length = 2000
+        # Sniffs binary, minified, generated and oversized files before anything is decoded
+        self.classifier = classifier or FileClassifier(head_bytes=max(8192, 4 * self.max_snippet_length))
+        # Python and JS/TS files are also described by a structural summary, cached by content hash
+        self.summarizer = summarizer or StructureSummarizer(cache_dir, persist=use_index)
+        self.cache_dir = cache_dir
+        self.use_index = use_index
+        self.max_workers = max_workers
+        # Budgets so a giant tree cannot block the caller indefinitely
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        # Skip whatever the project's .gitignore files exclude; in a checkout, git lists the files
+        self.respect_gitignore = respect_gitignore
+        self.use_git = use_git
 
     def scan_project(self, root_path):
         """
         Scans the project folder to build a file tree and extract code snippets.
         Determines the project type based on file presence.
+        Files whose mtime and size match the persistent scan index reuse their cached snippet,
+        and the result carries the added/removed/modified diff against the previous scan.
+        Snippet reads run on a thread pool; the tree and snippets keep the walk's sorted order.
+        Paths ignored by .gitignore, .git/info/exclude or the global excludes file are skipped.
+        Candidate files are classified and fingerprinted from their head; only "text" ones get a
+        snippet, and "files" maps each of them to its class and content digest. Text Python and JS/TS
+        files additionally get a structural summary under "summaries".
+        "tree_model" is a FileTree built in the same pass, with per-directory file counts, sizes
+        and extension histograms; the walk stops at max_files and the model is then marked
+        truncated.
         """
         file_tree = []
+        tree_model = FileTree()
         code_snippets = {}
+        summaries = {}
+        file_info = {}
+        entries = {}
+        errors = []
+        to_read = []
+        snippet_bytes = 0
+        truncated = False
+        # Files past max_files get no index entry, so the index of such a scan is partial
+        file_budget_hit = False
+        index = ScanIndex(root_path, self.cache_dir) if self.use_index else None
         has_py = False
         has_package_json = False
         has_html = False
-        
+
         root_path = pathlib.Path(root_path)
 
-        for root, dirs, files in os.walk(root_path):
-            # Skip common ignore dirs
-            dirs[:] = [d for d in dirs if d not in {'.git', 'node_modules', '__pycache__', 'venv', 'env', '.idea', '.vscode'}]
-            
-            rel_root = pathlib.Path(root).relative_to(root_path)
-            
-            for file in files:
-                file_path = pathlib.Path(root) / file
-                rel_path = rel_root / file
-                file_tree.append(str(rel_path))
-                
-                # Type detection markers
-                if file.endswith('.py'):
-                    has_py = True
-                if file == 'package.json':
-                    has_package_json = True
-                if file.endswith('.html') or file.endswith('.css'):
-                    has_html = True
-
-                # content extraction
-                if file_path.suffix in self.supported_extensions:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read(self.max_snippet_length)
-                            code_snippets[str(rel_path)] = content
-                    except Exception:
-                        pass
+        for rel_path, file_path, stat_result in self._iter_files(root_path, errors):
+            if len(file_tree) >= self.max_files:
+                truncated = True
+                file_budget_hit = True
+                tree_model.truncated = True
+                break
+            file_tree.append(rel_path)
+            tree_model.add(rel_path, stat_result.st_size)
+            name = os.path.basename(rel_path)
+
+            # Type detection markers
+            if name.endswith('.py'):
+                has_py = True
+            if name == 'package.json':
+                has_package_json = True
+            if name.endswith('.html') or name.endswith('.css'):
+                has_html = True
+
+            # content extraction (reused from the index when the file is unchanged)
+            entry = {"mtime": stat_result.st_mtime_ns, "size": stat_result.st_size, "snippet": None, "class": None, "hash": None}
+            entries[rel_path] = entry
+            if os.path.splitext(name)[1] not in self.supported_extensions and name not in self.manifest_files:
+                continue
+            expected = min(stat_result.st_size, self.max_snippet_length)
+            if snippet_bytes + expected > self.max_bytes:
+                truncated = True
+                continue
+            snippet_bytes += expected
+            cached = index.lookup(rel_path, stat_result) if index else None
+            if cached is not None and cached.get("class") is not None:
+                entry.update({"snippet": cached["snippet"], "class": cached["class"], "hash": cached["hash"]})
+            else:
+                to_read.append((rel_path, file_path, stat_result.st_size))
+
+        if to_read:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = pool.map(self._inspect, [(file_path, size) for _, file_path, size in to_read])
+                for (rel_path, _, _), (kind, digest, snippet, error) in zip(to_read, results):
+                    if error:
+                        errors.append(f"{rel_path}: {error}")
+                    entries[rel_path].update({"snippet": snippet, "class": kind, "hash": digest})
+
+        to_summarize = []
+        for rel_path, entry in entries.items():
+            if entry["class"] is not None:
+                file_info[rel_path] = {"class": entry["class"], "hash": entry["hash"]}
+            if entry["snippet"] is not None:
+                code_snippets[rel_path] = entry["snippet"]
+                if self.summarizer.supports(rel_path) and entry["hash"]:
+                    summary = self.summarizer.lookup(entry["hash"])
+                    if summary is not None:
+                        summaries[rel_path] = summary
+                    else:
+                        to_summarize.append(rel_path)
+
+        if to_summarize:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                jobs = [(str(root_path / rel_path), entries[rel_path]["hash"]) for rel_path in to_summarize]
+                for rel_path, summary in zip(to_summarize, pool.map(self._summarize, jobs)):
+                    if summary is not None:
+                        summaries[rel_path] = summary
+        self.summarizer.save()
 
         # Determine Project Type
         project_type = "Unknown"
@@ -56,8 +139,107 @@ class ProjectAnalyzer:
         elif has_html and not has_py and not has_package_json:
             project_type = "Web (Static)"
 
+        changes = {"added": sorted(entries), "removed": [], "modified": [], "partial": file_budget_hit}
+        if index:
+            changes = index.diff(entries, partial=file_budget_hit)
+            index.save(entries, partial=file_budget_hit)
+
         return {
             "tree": file_tree,
+            "tree_model": tree_model,
             "snippets": code_snippets,
-            "type": project_type
-        }
\ No newline at end of file
+            "summaries": summaries,
+            "files": file_info,
+            "type": project_type,
+            "changes": changes,
+            "errors": errors,
+            "truncated": truncated
+        }
+
+    def _iter_files(self, root_path, errors):
+        if self.respect_gitignore and self.use_git:
+            paths = tracked_files(root_path)
+            if paths is not None:
+                return self._list_git(root_path, paths, errors)
+        matcher = IgnoreMatcher(root_path) if self.respect_gitignore else None
+        return self._walk(root_path, errors, matcher)
+
+    def _list_git(self, root_path, paths, errors):
+        """Yields the files git reports, in the same order _walk would produce them."""
+        # Files of a directory come before its subdirectories, as in the depth-first walk
+        split = sorted((p.split("/") for p in paths), key=lambda parts: [(1, d) for d in parts[:-1]] + [(0, parts[-1])])
+        for parts in split:
+            if any(part in self.ignored_dirs for part in parts[:-1]):
+                continue
+            rel_path = os.path.join(*parts)
+            file_path = os.path.join(root_path, rel_path)
+            try:
+                stat_result = os.stat(file_path)
+            except FileNotFoundError:
+                # Tracked but deleted in the working tree
+                continue
+            except OSError as e:
+                errors.append(f"{rel_path}: {e}")
+                continue
+            # Submodules and nested repositories are listed as directories
+            if not stat.S_ISREG(stat_result.st_mode):
+                continue
+            yield rel_path, file_path, stat_result
+
+    def _walk(self, root_path, errors, matcher=None):
+        """
+        Depth-first os.scandir walk yielding (relative path, absolute path, stat) for every file.
+        Entries are sorted by name so results are deterministic across platforms.
+        Directories the matcher ignores are pruned before descent.
+        """
+        stack = [(str(root_path), "")]
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    items = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                errors.append(f"{rel_dir or '.'}: {e}")
+                continue
+
+            subdirs = []
+            for item in items:
+                rel_path = os.path.join(rel_dir, item.name) if rel_dir else item.name
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        if item.name not in self.ignored_dirs and not (matcher and matcher.ignored(rel_path, True)):
+                            subdirs.append((item.path, rel_path))
+                        continue
+                    if not item.is_file():
+                        continue
+                    if matcher and matcher.ignored(rel_path):
+                        continue
+                    stat_result = item.stat()
+                except OSError as e:
+                    errors.append(f"{rel_path}: {e}")
+                    continue
+                yield rel_path, item.path, stat_result
+
+            # Reversed so the stack pops subdirectories in sorted order
+            stack.extend(reversed(subdirs))
+
+    def _inspect(self, args):
+        """Returns (class, content hash, snippet or None, error) for one candidate file."""
+        file_path, size = args
+        try:
+            kind, digest, head = self.classifier.inspect(file_path, size)
+        except (OSError, ValueError) as e:
+            return None, None, None, str(e)
+        if kind != "text":
+            return kind, digest, None, None
+        # Same result as reading in text mode: undecodable bytes dropped, newlines normalized
+        text = head.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+        return kind, digest, text[:self.max_snippet_length], None
+
+    def _summarize(self, args):
+        file_path, digest = args
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                return self.summarizer.summarize(file_path, f.read(), digest)
+        except OSError:
+            return None
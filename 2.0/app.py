@@ -1,11 +1,24 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog
+import os
 import threading
+import time
 
+import repo_root  # noqa: F401 - first, so the shared helpers below resolve
 from analyzer import ProjectAnalyzer
 from auditor import ProjectAuditor
 from generator import ReadmeGenerator
+from scan_index import DEFAULT_CACHE_DIR
+
+# Helpers shared with PushAgent (tracing, UI dispatch, tree model) live at the repository root
+from tracing import tracer
+from tree_model import format_size
+from ui_dispatch import Dispatcher, LogBuffer
+
+LOG_MAX_LINES = 5000          # Older activity log lines are dropped from the textbox
+STRUCTURE_LOG_CHARS = 1500    # Size of the project outline logged after a scan
+STRUCTURE_FILES_PER_DIR = 5   # Files named per directory in that outline
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
@@ -24,6 +37,9 @@ class App(ctk.CTk):
         self.selected_folder = None
         self.project_data = None
         self.audit_results = {}
+        self.cancel_event = threading.Event()
+        # Worker threads hand widget updates to the Tk thread through this
+        self.dispatcher = Dispatcher(self)
 
         self._setup_ui()
         self._load_models()
@@ -43,6 +59,9 @@ class App(ctk.CTk):
         self.model_dropdown = ctk.CTkOptionMenu(self.model_frame, variable=self.model_var)
         self.model_dropdown.pack(side="left", padx=10, fill="x", expand=True)
 
+        self.btn_refresh = ctk.CTkButton(self.model_frame, text="Refresh", width=80, command=lambda: self._load_models(refresh=True))
+        self.btn_refresh.pack(side="left", padx=10)
+
         # 2. Folder Selection
         self.folder_frame = ctk.CTkFrame(self)
         self.folder_frame.grid(row=1, column=0, padx=20, pady=10, sticky="ew")
@@ -63,6 +82,9 @@ class App(ctk.CTk):
         self.btn_generate = ctk.CTkButton(self.action_frame, text="Audit & Generate README", command=self.start_generation, state="disabled", fg_color="green")
         self.btn_generate.pack(side="right", padx=20, pady=10)
 
+        self.btn_cancel = ctk.CTkButton(self.action_frame, text="Cancel", command=self.cancel_generation, state="disabled", fg_color="gray")
+        self.btn_cancel.pack(side="right", padx=(20, 0), pady=10)
+
         # 4. Status Details
         self.status_frame = ctk.CTkFrame(self)
         self.status_frame.grid(row=3, column=0, padx=20, pady=10, sticky="ew")
@@ -79,13 +101,17 @@ class App(ctk.CTk):
         
         self.log_box = ctk.CTkTextbox(self)
         self.log_box.grid(row=5, column=0, padx=20, pady=10, sticky="nsew")
+        self.log_buffer = LogBuffer(self.dispatcher, self.log_box, max_lines=LOG_MAX_LINES)
         self.log("Welcome! Please ensure Ollama is running and select a model.")
 
-    def _load_models(self):
+    def _load_models(self, refresh=False):
         def fetch():
-            models = self.generator.get_models()
+            models = self.generator.get_models(refresh=refresh)
+            self.dispatcher.call_soon(show, models)
+
+        def show(models):
             if models:
-                self.model_dropdown.configure(values=models)
+                self.model_dropdown.configure(values=models, state="normal")
                 self.model_var.set(models[0])
                 self.log(f"Loaded {len(models)} models from Ollama.")
             else:
@@ -103,10 +129,28 @@ class App(ctk.CTk):
             self.log(f"Selected folder: {folder}")
             
             # Scan immediately
-            self.project_data = self.analyzer.scan_project(folder)
+            with tracer.span("scan_project", path=folder) as span:
+                self.project_data = self.analyzer.scan_project(folder)
+                span.set(files=len(self.project_data['tree']), snippets=len(self.project_data['snippets']))
+            self._report_trace(span)
             self.lbl_type.configure(text=f"Project Type: {self.project_data['type']}")
             self.log(f"Detected Type: {self.project_data['type']}")
-            self.log(f"Found {len(self.project_data['tree'])} files.")
+            tree = self.project_data['tree_model']
+            self.log(f"Found {len(tree)} files ({format_size(tree.root.total_bytes)}).")
+            self.log("Structure:\n" + tree.render(budget=STRUCTURE_LOG_CHARS, files_per_dir=STRUCTURE_FILES_PER_DIR, indent=True))
+            changes = self.project_data['changes']
+            self.log(f"Since last scan: {len(changes['added'])} added, {len(changes['modified'])} modified, {len(changes['removed'])} removed"
+                     + (" (within the scan budget only)." if changes.get('partial') else "."))
+            if self.project_data['truncated']:
+                self.log("Warning: Scan budget reached, the project was only partially analyzed.")
+            skipped = {}
+            for info in self.project_data['files'].values():
+                if info['class'] not in ('text', 'empty'):
+                    skipped[info['class']] = skipped.get(info['class'], 0) + 1
+            if skipped:
+                self.log("Not sent to the model: " + ", ".join(f"{count} {kind}" for kind, count in sorted(skipped.items())) + ".")
+            if self.project_data['errors']:
+                self.log(f"Skipped {len(self.project_data['errors'])} unreadable entries.")
             
             # Reset status labels
             self.lbl_gitignore.configure(text=".gitignore: Pending")
@@ -124,31 +168,66 @@ class App(ctk.CTk):
             return
 
         self.btn_generate.configure(state="disabled")
+        self.cancel_event.clear()
+        self.btn_cancel.configure(state="normal")
         self.log("\n--- Starting Deep Analysis & Generation ---")
         
         threading.Thread(target=self._process, args=(model,), daemon=True).start()
 
+    def cancel_generation(self):
+        self.cancel_event.set()
+        self.btn_cancel.configure(state="disabled")
+        self.log("\nCancelling generation...")
+
     def _process(self, model):
+        with tracer.span("process", model=model) as span:
+            self._run_pipeline(model)
+        self._report_trace(span)
+
+    def _run_pipeline(self, model):
         try:
             # Audit
             self.log("Running Auditor...")
-            self.audit_results = self.auditor.audit(self.selected_folder, self.project_data['type'])
+            with tracer.span("audit"):
+                self.audit_results = self.auditor.audit(self.selected_folder, self.project_data['type'])
             
             # Update Status UI
-            self.lbl_gitignore.configure(text=f".gitignore: {self.audit_results['gitignore_status']}")
-            self.lbl_reqs.configure(text=f"requirements.txt: {self.audit_results['requirements_status']}")
+            self.dispatcher.call_soon(self._show_audit, self.audit_results)
             
             self.log(f"Audit Complete: .gitignore ({self.audit_results['gitignore_status']}), requirements ({self.audit_results['requirements_status']})")
 
             # Generate
             self.log(f"Analyzing code and generating README with '{model}'...")
-            success, msg = self.generator.generate(
-                model, 
-                self.project_data, 
-                self.audit_results, 
-                self.selected_folder
-            )
+            with tracer.span("generate", model=model) as gen_span:
+                success, msg = self.generator.generate(
+                    model, 
+                    self.project_data, 
+                    self.audit_results, 
+                    self.selected_folder,
+                    stream=True,
+                    on_token=self.log_stream,
+                    cancel_event=self.cancel_event
+                )
+                gen_span.set(success=success, **{k: v for k, v in self.generator.last_stats.items() if k in ('prompt_chars', 'response_chars', 'tokens')})
+            self.log("")
+
+            packed = self.generator.last_prompt_stats
+            if packed:
+                self.log(f"Prompt: {packed['snippets_included']} files packed ({packed['snippets_summarized']} as summaries), {packed['snippets_dropped']} dropped, ~{packed['tree_tokens'] + packed['snippet_tokens']} of {packed['budget_tokens']} tokens.")
             
+            stats = self.generator.last_stats
+            if stats.get('time_to_first_token') is not None:
+                rate = f"{stats['tokens_per_sec']:.1f} tokens/s" if stats['tokens_per_sec'] else "n/a"
+                self.log(f"First token after {stats['time_to_first_token']:.2f}s, {stats['tokens']} tokens at {rate}.")
+
+            if stats.get('readme_cache'):
+                rates = self.generator.readme_cache.hit_rate()
+                self.log(f"README cache: {stats['readme_cache']}, {stats['sections_regenerated']} sections regenerated, ~{stats['seconds_saved']:.1f}s saved "
+                         f"(session: {rates['full']:.0%} full hits, {rates['sections']:.0%} of sections reused, {self.generator.readme_cache.stats['seconds_saved']:.1f}s saved).")
+
+            http = self.generator.stats()
+            self.log(f"HTTP: {http['requests']} requests over {http['new_connections']} connections, model cache hit ratio {http['models_cache_hit_ratio']:.0%}.")
+
             if success:
                 self.log("SUCCESS: README.md created based on analysis!")
             else:
@@ -157,11 +236,35 @@ class App(ctk.CTk):
         except Exception as e:
             self.log(f"Critical Error: {e}")
         finally:
-            self.btn_generate.configure(state="normal")
+            self.dispatcher.call_soon(self._finish_generation)
+
+    def _show_audit(self, results):
+        self.lbl_gitignore.configure(text=f".gitignore: {results['gitignore_status']}")
+        self.lbl_reqs.configure(text=f"requirements.txt: {results['requirements_status']}")
+
+    def _finish_generation(self):
+        self.btn_cancel.configure(state="disabled")
+        self.btn_generate.configure(state="normal")
+
+    def _report_trace(self, span):
+        """Logs the phase breakdown of a finished span and saves the trace for chrome://tracing."""
+        if not tracer.enabled:
+            return
+        self.log(f"Trace:\n{tracer.summary(root=span)}")
+        path = os.path.join(DEFAULT_CACHE_DIR, "traces", f"{span.name}-{int(time.time())}.json")
+        try:
+            tracer.export(path)
+            self.log(f"Trace written to {path}")
+        except OSError as e:
+            self.log(f"Trace export failed: {e}")
 
     def log(self, message):
-        self.log_box.insert("end", message + "\n")
-        self.log_box.see("end")
+        """Safe from any thread; lines are inserted in batches on the Tk thread."""
+        self.log_buffer.line(message)
+
+    def log_stream(self, token):
+        """Appends streamed LLM output without a trailing newline."""
+        self.log_buffer.write(token)
 
 if __name__ == "__main__":
     app = App()
@@ -0,0 +1,192 @@
+"""
+Headless batch mode: audit and regenerate READMEs for many repositories at once.
+
+Scanning and auditing run in a process pool; README generation goes through a bounded
+number of concurrent LLM calls. Every repository gets its own JSON report as soon as it
+finishes, so an interrupted run can be resumed with --resume.
+
+    python batch.py ~/src/* --model llama3 --report-dir reports --resume
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import repo_root  # noqa: F401 - first, so the shared helpers resolve here and in pool workers
+from analyzer import ProjectAnalyzer
+from auditor import ProjectAuditor
+from generator import ReadmeGenerator
+
+def expand_repos(patterns):
+    """Resolves paths and glob patterns to a sorted, de-duplicated list of directories."""
+    repos = set()
+    for pattern in patterns:
+        matches = glob.glob(os.path.expanduser(pattern)) or [pattern]
+        repos.update(os.path.abspath(m) for m in matches if os.path.isdir(m))
+    return sorted(repos)
+
+def report_path(report_dir, repo):
+    digest = hashlib.sha1(repo.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(report_dir, f"{os.path.basename(repo) or 'root'}-{digest}.json")
+
+def scan_and_audit(repo, audit):
+    """Process-pool worker; must stay a top-level function so it can be pickled."""
+    started = time.perf_counter()
+    data = ProjectAnalyzer().scan_project(repo)
+    scan_seconds = time.perf_counter() - started
+    audit_results = ProjectAuditor().audit(repo, data["type"]) if audit else {
+        "gitignore_status": "Skipped", "requirements_status": "Skipped"
+    }
+    return data, audit_results, scan_seconds
+
+class BatchRunner:
+    def __init__(self, repos, report_dir, model=None, api_url="http://localhost:11434", workers=None,
+                 llm_concurrency=2, audit=True, resume=False, fallbacks=()):
+        self.repos = repos
+        self.report_dir = report_dir
+        self.model = model
+        self.audit = audit
+        self.resume = resume
+        self.workers = workers or os.cpu_count() or 2
+        self.llm_concurrency = llm_concurrency
+        self.api_url = api_url
+        self.fallbacks = list(fallbacks)
+        # ReadmeGenerator keeps per-call stats on the instance, so each LLM thread gets its own
+        self._local = threading.local()
+        self.summary = {"ok": 0, "failed": 0, "skipped": 0}
+        self.readme_cache = {"hit": 0, "partial": 0, "miss": 0, "sections_regenerated": 0, "seconds_saved": 0.0}
+
+    def pending(self):
+        if not self.resume:
+            return list(self.repos)
+        todo = []
+        for repo in self.repos:
+            try:
+                with open(report_path(self.report_dir, repo), "r", encoding="utf-8") as f:
+                    if json.load(f).get("status") == "ok":
+                        self.summary["skipped"] += 1
+                        continue
+            except (OSError, ValueError):
+                pass
+            todo.append(repo)
+        return todo
+
+    def run(self):
+        os.makedirs(self.report_dir, exist_ok=True)
+        todo = self.pending()
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as scan_pool, \
+                ThreadPoolExecutor(max_workers=self.llm_concurrency) as llm_pool:
+            running = {scan_pool.submit(scan_and_audit, repo, self.audit): ("scan", repo, None) for repo in todo}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, repo, report = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self._finish(repo, report or {"repo": repo}, status="failed", error=f"{stage}: {e}")
+                        continue
+
+                    if stage == "scan":
+                        data, audit_results, scan_seconds = result
+                        report = {
+                            "repo": repo,
+                            "type": data["type"],
+                            "files": len(data["tree"]),
+                            "truncated": data["truncated"],
+                            "audit": audit_results,
+                            "timings": {"scan": scan_seconds},
+                        }
+                        if self.model:
+                            gen = llm_pool.submit(self._generate, repo, data, audit_results)
+                            running[gen] = ("generate", repo, report)
+                        else:
+                            self._finish(repo, report, status="ok")
+                    else:
+                        success, message, stats, seconds = result
+                        report["readme"] = {"success": success, "message": message, "stats": stats}
+                        if stats.get("readme_cache"):
+                            self.readme_cache[stats["readme_cache"]] += 1
+                            self.readme_cache["sections_regenerated"] += stats["sections_regenerated"]
+                            self.readme_cache["seconds_saved"] += stats["seconds_saved"]
+                        report["timings"]["generate"] = seconds
+                        self._finish(repo, report, status="ok" if success else "failed",
+                                     error=None if success else message)
+
+        elapsed = time.perf_counter() - started
+        processed = self.summary["ok"] + self.summary["failed"]
+        self.summary.update({
+            "repos": len(self.repos),
+            "elapsed_seconds": elapsed,
+            "repos_per_minute": processed / elapsed * 60 if elapsed else 0.0,
+        })
+        if self.model:
+            generated = sum(self.readme_cache[k] for k in ("hit", "partial", "miss"))
+            self.summary["readme_cache"] = dict(self.readme_cache, hit_ratio=self.readme_cache["hit"] / generated if generated else 0.0)
+        with open(os.path.join(self.report_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary, f, indent=2)
+        return self.summary
+
+    def _generate(self, repo, data, audit_results):
+        generator = getattr(self._local, "generator", None)
+        if generator is None:
+            generator = self._local.generator = ReadmeGenerator(api_url=self.api_url, max_concurrency=self.llm_concurrency,
+                                                                  fallbacks=self.fallbacks)
+        started = time.perf_counter()
+        success, message = generator.generate(self.model, data, audit_results, repo)
+        return success, message, dict(generator.last_stats), time.perf_counter() - started
+
+    def _finish(self, repo, report, status, error=None):
+        report["status"] = status
+        if error:
+            report["error"] = error
+        report["finished_at"] = time.time()
+        self.summary[status] += 1
+        with open(report_path(self.report_dir, repo), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[{status}] {repo}" + (f": {error}" if error else ""), file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit and generate READMEs for many repositories.")
+    parser.add_argument("repos", nargs="+", help="Repository paths or glob patterns")
+    parser.add_argument("--model", help="Ollama model; omit to only scan and audit")
+    parser.add_argument("--api-url", default="http://localhost:11434")
+    parser.add_argument("--report-dir", default="batch-reports")
+    parser.add_argument("--workers", type=int, help="Scan processes (default: CPU count)")
+    parser.add_argument("--fallback", nargs=2, action="append", default=[], metavar=("API_URL", "MODEL"),
+                        help="Another Ollama server/model the router may use; repeatable")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="Concurrent LLM requests")
+    parser.add_argument("--no-audit", action="store_true", help="Do not create missing .gitignore/requirements.txt")
+    parser.add_argument("--resume", action="store_true", help="Skip repositories that already have an ok report")
+    args = parser.parse_args(argv)
+
+    repos = expand_repos(args.repos)
+    if not repos:
+        parser.error("no repositories matched")
+
+    runner = BatchRunner(
+        repos, args.report_dir, model=args.model, api_url=args.api_url, workers=args.workers,
+        llm_concurrency=args.llm_concurrency, audit=not args.no_audit, resume=args.resume,
+        fallbacks=[tuple(pair) for pair in args.fallback]
+    )
+    try:
+        summary = runner.run()
+    except KeyboardInterrupt:
+        print("Interrupted; rerun with --resume to continue.", file=sys.stderr)
+        return 130
+    print(f"{summary['ok']} ok, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['elapsed_seconds']:.1f}s ({summary['repos_per_minute']:.1f} repos/min)")
+    if "readme_cache" in summary:
+        cache = summary["readme_cache"]
+        print(f"README cache: {cache['hit']} hits, {cache['partial']} partial, {cache['miss']} misses, ~{cache['seconds_saved']:.1f}s saved")
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import re
+
+class FileClassifier:
+    """
+    Decides from a file's head (and size) whether its content is worth sending to the model.
+    Only "text" files get a snippet; the others are listed in the tree but never decoded.
+    Classes: text, empty, binary, minified, generated, oversized.
+    """
+    GENERATED_NAMES = {'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 'Pipfile.lock', 'Cargo.lock', 'composer.lock'}
+    GENERATED_SUFFIXES = ('.min.js', '.min.css', '.map', '_pb2.py', '_pb2_grpc.py', '.pb.go', '.g.dart', '.designer.cs')
+    # Only the canonical markers: prose such as "tokens are generated by" must not match
+    GENERATED_MARKERS = re.compile(rb'@generated\b|^// Code generated .* DO NOT EDIT\.\r?$', re.MULTILINE)
+    # Bytes that never appear in text besides \t \n \f \r and ESC
+    _CONTROL = bytes(set(range(32)) - {8, 9, 10, 12, 13, 27})
+
+    def __init__(self, head_bytes=8192, oversized_bytes=1_000_000, minified_line_length=500, binary_ratio=0.3):
+        self.head_bytes = head_bytes
+        self.oversized_bytes = oversized_bytes
+        self.minified_line_length = minified_line_length
+        self.binary_ratio = binary_ratio
+
+    def classify(self, name, head, size):
+        """Classifies from the file name, the first head_bytes bytes and the total size."""
+        if size == 0:
+            return "empty"
+        if b"\0" in head or len(head.translate(None, self._CONTROL)) < len(head) * (1 - self.binary_ratio):
+            return "binary"
+        # Mis-named binaries without NULs: mostly bytes that are not valid UTF-8
+        if head.decode("utf-8", errors="replace").count("\ufffd") > len(head) * self.binary_ratio:
+            return "binary"
+        if name in self.GENERATED_NAMES or name.endswith(self.GENERATED_SUFFIXES):
+            return "generated"
+        if self.GENERATED_MARKERS.search(head[:1024]):
+            return "generated"
+        if size > self.oversized_bytes:
+            return "oversized"
+        # Bundles and minified assets put whole files on a handful of lines
+        lines = head.count(b"\n")
+        if len(head) >= 1024 and len(head) / (lines + 1) > self.minified_line_length:
+            return "minified"
+        return "text"
+
+    def inspect(self, file_path, size):
+        """
+        Returns (class, sha1 hex digest, head bytes) from one small read. A file that fits in
+        the head is hashed by content; a larger one by its head, size and mtime, so a scan
+        never reads more of a file than head_bytes.
+        """
+        with open(file_path, "rb") as f:
+            head = f.read(self.head_bytes)
+            h = hashlib.sha1(head)
+            if size > len(head):
+                st = os.fstat(f.fileno())
+                h.update(f"\0{st.st_size}:{st.st_mtime_ns}".encode("ascii"))
+        return self.classify(os.path.basename(file_path), head, size), h.hexdigest(), head
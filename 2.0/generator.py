@@ -1,63 +1,394 @@
 import requests
 import json
 import pathlib
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from packer import PromptPacker
+from readme_cache import ReadmeCache
+
+# Helpers shared with PushAgent live at the repository root (see repo_root.py)
+from llm_client import LLMError, OllamaBackend, shared_client
+from llm_router import shared_router
+
+def _abort(response):
+    """Ends a streamed response that another thread may be blocked reading."""
+    # close() alone does not wake a recv() in progress; shutting the socket down does
+    sock = getattr(getattr(response.raw, "_connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
 
 class ReadmeGenerator:
-    def __init__(self, api_url="http://localhost:11434"):
+    def __init__(self, api_url="http://localhost:11434", stream_idle_timeout=60, connect_timeout=5,
+                 generate_timeout=180, first_token_timeout=180, retries=2, pool_size=4, models_ttl=300,
+                 context_window=8192, output_reserve=2048, packer=None, max_concurrency=2, readme_cache=None,
+                 fallbacks=(), router=None):
         self.api_url = api_url
+        # The prompt is packed to fit context_window minus the tokens kept free for the README itself
+        self.context_window = context_window
+        self.output_reserve = output_reserve
+        self.packer = packer or PromptPacker()
+        self.last_prompt_stats = {}
+        # Unchanged prompts reuse the last README; partly changed ones only rewrite stale sections.
+        # Pass readme_cache=False to always generate from scratch.
+        self.readme_cache = ReadmeCache() if readme_cache is None else readme_cache or None
+        # In streaming mode the first chunk may take as long as model load plus prefill; after
+        # that the idle timeout applies between chunks, not to the whole generation
+        self.first_token_timeout = first_token_timeout
+        self.stream_idle_timeout = stream_idle_timeout
+        self.connect_timeout = connect_timeout
+        self.generate_timeout = generate_timeout
+        self.models_ttl = models_ttl
+        self.last_stats = {}
+
+        # One keep-alive session for every call to the backend. Only connection failures and
+        # gateway errors are retried; a read timeout would just double an already long wait.
+        retry = Retry(
+            total=retries, connect=retries, read=0, backoff_factor=0.5,
+            status_forcelist=(502, 503, 504), allowed_methods=frozenset({"GET", "POST"})
+        )
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        # Blocking generations go through the shared asyncio client: at most max_concurrency
+        # requests per Ollama URL, and identical in-flight prompts are sent only once
+        self.llm = shared_client()
+        self.backend_name = f"ollama:{api_url}"
+        self.llm.register(self.backend_name, OllamaBackend(api_url, session=self.session, max_concurrency=max_concurrency), replace=False)
+        # Other (api_url, model) pairs the router may pick when they are faster or the
+        # selected model keeps failing; the router's latency profiles are process-wide
+        self.router = router or shared_router()
+        self._urls = {self.backend_name: api_url}
+        self.fallbacks = []
+        for url, fallback_model in fallbacks:
+            name = f"ollama:{url}"
+            self.llm.register(name, OllamaBackend(url, session=self.session, max_concurrency=max_concurrency), replace=False)
+            self._urls[name] = url
+            self.fallbacks.append((name, fallback_model))
+
+        self._models_cache = None
+        self._models_fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "models_cache_hits": 0, "models_cache_misses": 0}
+
+    def get_models(self, refresh=False):
+        """
+        Returns the model names from /api/tags.
+        Results are cached for models_ttl seconds; refresh=True forces a refetch.
+        """
+        with self._lock:
+            fresh = self._models_cache is not None and time.monotonic() - self._models_fetched_at < self.models_ttl
+            if fresh and not refresh:
+                self._counters["models_cache_hits"] += 1
+                return list(self._models_cache)
+            self._counters["models_cache_misses"] += 1
 
-    def get_models(self):
         try:
-            response = requests.get(f"{self.api_url}/api/tags", timeout=2)
+            response = self._request("GET", "/api/tags", timeout=(self.connect_timeout, 2))
             if response.status_code == 200:
                 data = response.json()
-                return [model['name'] for model in data.get('models', [])]
+                models = [model['name'] for model in data.get('models', [])]
+                with self._lock:
+                    self._models_cache = models
+                    self._models_fetched_at = time.monotonic()
+                return list(models)
             return []
         except requests.exceptions.RequestException:
             return []
 
-    def generate(self, model, project_data, audit_results, root_path):
+    def invalidate_models(self):
+        with self._lock:
+            self._models_cache = None
+
+    def stats(self):
+        """Connection reuse and model-list cache counters for the shared session."""
+        new_connections = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+        with self._lock:
+            counters = dict(self._counters)
+        backend = self.llm.stats(self.backend_name)
+        counters["requests"] += backend["requests"]
+        counters["coalesced_requests"] = backend["coalesced"]
+        lookups = counters["models_cache_hits"] + counters["models_cache_misses"]
+        counters["new_connections"] = new_connections
+        counters["reused_connections"] = max(counters["requests"] - new_connections, 0)
+        counters["models_cache_hit_ratio"] = counters["models_cache_hits"] / lookups if lookups else 0.0
+        return counters
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, path, base_url=None, **kwargs):
+        with self._lock:
+            self._counters["requests"] += 1
+        return self.session.request(method, f"{base_url or self.api_url}{path}", **kwargs)
+
+    def routes(self, model):
+        """The selected model first, then the configured fallbacks."""
+        return [(self.backend_name, model)] + self.fallbacks
+
+    def generate(self, model, project_data, audit_results, root_path, stream=False, on_token=None, cancel_event=None):
+        """
+        Generates README.md for the project and writes it only once the LLM has finished.
+        With stream=True, tokens are passed to on_token as they arrive and setting
+        cancel_event aborts the request. Timing stats are kept in self.last_stats.
+        An unchanged prompt is answered from the README cache without calling the LLM; when
+        only some inputs changed, just the affected sections are rewritten (last_stats["readme_cache"]).
+        """
         prompt = self._build_prompt(project_data, audit_results)
+        self.last_stats = {}
+        started = time.perf_counter()
+        cache = self.readme_cache
+        if cache is not None:
+            inputs = cache.section_inputs(project_data, audit_results, prompt)
+            plan = cache.plan(root_path, model, prompt, inputs)
         
         try:
-            response = requests.post(
-                f"{self.api_url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=180
-            )
-            response.raise_for_status()
-            result = response.json()
-            readme_content = result.get('response', '')
+            if cache is not None and plan.status == "hit":
+                readme_content = plan.readme
+                if on_token:
+                    on_token(readme_content)
+            elif cache is not None and plan.status == "partial":
+                readme_content = self._regenerate_sections(model, prompt, plan, stream, on_token, cancel_event)
+                if readme_content is None:
+                    return False, "Generation cancelled."
+            elif stream:
+                readme_content = self._generate_stream(model, prompt, on_token, cancel_event)
+                if readme_content is None:
+                    return False, "Generation cancelled."
+            else:
+                readme_content = self._complete(model, prompt)
             
+            self.last_stats["prompt_chars"] = len(prompt)
+            self.last_stats["response_chars"] = len(readme_content)
             if not readme_content:
                 return False, "Empty response from LLM"
 
             self._save_readme(root_path, readme_content)
+            if cache is not None:
+                saved = cache.store(plan, root_path, model, prompt, inputs, readme_content, time.perf_counter() - started)
+                self.last_stats.update(
+                    readme_cache=plan.status,
+                    sections_regenerated=len(plan.stale),
+                    seconds_saved=saved
+                )
             return True, "README.md generated successfully."
             
         except requests.exceptions.RequestException as e:
             return False, f"Ollama API Error: {str(e)}"
+        except LLMError as e:
+            return False, str(e)
         except Exception as e:
             return False, f"Error: {str(e)}"
 
+    def _complete(self, model, prompt):
+        result = self.router.request(
+            self.routes(model), prompt,
+            timeout=self.generate_timeout,
+            options={"num_ctx": self.context_window}
+        )
+        self.last_stats["route"] = f"{result.route[0]}/{result.route[1]}"
+        return result.text
+
+    def _regenerate_sections(self, model, prompt, plan, stream, on_token, cancel_event):
+        """
+        Rewrites only the stale sections of the cached README and splices them back in.
+        Without streaming the sections are requested concurrently. Returns None if cancelled.
+        """
+        sections = plan.record["sections"]
+        headings = [s["heading"] for s in sections if s["heading"]]
+        prompts = {}
+        for i in plan.stale:
+            section = sections[i]
+            target = f"the section headed '## {section['heading']}'" if section["heading"] else \
+                "the title and opening paragraph (everything before the first '## ' heading)"
+            prompts[i] = (
+                prompt +
+                "\nA README for this project already exists with these sections: " + ", ".join(headings) + ".\n"
+                f"Parts of the code changed since it was written. Rewrite ONLY {target} so it matches "
+                "the code above, keeping its format. Return only the rewritten text, starting with the "
+                "same heading line if it has one.\n\nCurrent text:\n" + section["text"]
+            )
+
+        rewritten = {}
+        if stream:
+            for i, section_prompt in prompts.items():
+                text = self._generate_stream(model, section_prompt, on_token, cancel_event)
+                if text is None:
+                    return None
+                rewritten[i] = text
+        else:
+            with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+                futures = {i: pool.submit(self._complete, model, p) for i, p in prompts.items()}
+                rewritten = {i: future.result() for i, future in futures.items()}
+
+        for i, text in rewritten.items():
+            text = text.strip()
+            # Models like to wrap the answer in a fence or drop the heading
+            if text.startswith("```"):
+                text = text.split("\n", 1)[1] if "\n" in text else ""
+                text = text.rsplit("```", 1)[0].strip()
+            heading = sections[i]["heading"]
+            if heading and not text.startswith("#"):
+                text = f"## {heading}\n\n{text}"
+            rewritten[i] = text + "\n\n"
+        return self.readme_cache.splice(plan, rewritten)
+
+    def _generate_stream(self, model, prompt, on_token, cancel_event):
+        """
+        Streams from the best route of the router. A route that fails before its first token
+        is recorded as failed and the next one is tried; later failures are raised.
+        """
+        errors = []
+        for route in self.router.rank(self.routes(model)):
+            emitted = []
+
+            def relay(token):
+                emitted.append(token)
+                if on_token:
+                    on_token(token)
+
+            started = time.perf_counter()
+            try:
+                text = self._stream_from(self._urls[route[0]], route[1], prompt, relay, cancel_event)
+            except (requests.exceptions.RequestException, RuntimeError) as e:
+                self.router.record(route, time.perf_counter() - started, ok=False)
+                if emitted:
+                    raise
+                errors.append(f"{route[0]}/{route[1]}: {e}")
+                continue
+            if text is not None:
+                self.router.record(route, time.perf_counter() - started, ok=True)
+                self.last_stats["route"] = f"{route[0]}/{route[1]}"
+            return text
+        raise LLMError("Every LLM route failed: " + "; ".join(errors))
+
+    def _stream_from(self, base_url, model, prompt, on_token, cancel_event):
+        """
+        Consumes Ollama's NDJSON stream. Returns the full text, or None if cancelled.
+        The response is read on a helper thread, so Cancel and the timeouts also apply while
+        the model loads and reads the prompt: first_token_timeout until the first chunk,
+        stream_idle_timeout between chunks.
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        parts = []
+        token_count = 0
+        final = None
+        lines = queue.Queue()
+        reader = {"response": None, "abandoned": False}
+        lock = threading.Lock()
+
+        def read():
+            try:
+                with self._request(
+                    "POST",
+                    "/api/generate",
+                    base_url=base_url,
+                    json={
+                        "model": model,
+                        "prompt": prompt,
+                        "stream": True,
+                        "options": {"num_ctx": self.context_window}
+                    },
+                    stream=True,
+                    timeout=(self.connect_timeout, max(self.first_token_timeout, self.stream_idle_timeout))
+                ) as response:
+                    with lock:
+                        if reader["abandoned"]:
+                            return
+                        reader["response"] = response
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if line:
+                            lines.put(("line", line))
+                lines.put(("end", None))
+            except Exception as e:
+                lines.put(("error", e))
+
+        threading.Thread(target=read, name="ollama-stream", daemon=True).start()
+        waiting_for = ("first token", self.first_token_timeout)
+        try:
+            while True:
+                what, timeout = waiting_for
+                deadline = time.monotonic() + timeout
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise requests.exceptions.ReadTimeout(f"No {what} from {model} within {timeout:g}s")
+                    try:
+                        kind, value = lines.get(timeout=min(remaining, 0.1))
+                        break
+                    except queue.Empty:
+                        continue
+                if kind == "error":
+                    raise value
+                if kind == "end":
+                    break
+                waiting_for = ("next token", self.stream_idle_timeout)
+                chunk = json.loads(value)
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                token = chunk.get('response', '')
+                if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(token)
+                    token_count += 1
+                    if on_token:
+                        on_token(token)
+                if chunk.get('done'):
+                    final = chunk
+                    break
+        finally:
+            with lock:
+                reader["abandoned"] = True
+                response = reader["response"]
+            # A finished stream is left to the reader, which hands the connection back to the pool
+            if final is None and response is not None:
+                _abort(response)
+
+        if final is None:
+            raise RuntimeError("Stream ended before the model finished")
+
+        elapsed = time.perf_counter() - started
+        # Prefer Ollama's own eval counters; fall back to counting chunks
+        eval_count = final.get('eval_count') or token_count
+        eval_seconds = final.get('eval_duration', 0) / 1e9
+        if not eval_seconds and first_token_at is not None:
+            eval_seconds = time.perf_counter() - first_token_at
+        self.last_stats = {
+            "time_to_first_token": (first_token_at - started) if first_token_at is not None else None,
+            "tokens": eval_count,
+            "tokens_per_sec": eval_count / eval_seconds if eval_seconds else None,
+            "total_seconds": elapsed
+        }
+        return "".join(parts)
+
     def _save_readme(self, root_path, content):
         path = pathlib.Path(root_path) / "README.md"
         with open(path, "w", encoding="utf-8") as f:
             f.write(content)
 
     def _build_prompt(self, data, audit_results):
-        tree_str = "\n".join(data['tree'])
-        
-        snippets_str = ""
-        items = list(data['snippets'].items())
-        for name, code in items[:10]:
-            snippets_str += f"\nFile: {name}\n```\n{code}\n```\n"
-
-        return (
+        header = (
             "You are analyzing a real software project.\n\n"
             "Write a PROFESSIONAL GitHub README for a production-quality tool.\n\n"
             "Base everything ONLY on the provided code and structure.\n\n"
@@ -90,8 +421,20 @@ class ReadmeGenerator:
             "Audit:\n"
             f".gitignore: {audit_results['gitignore_status']}\n"
             f"requirements.txt: {audit_results['requirements_status']}\n\n"
-            "File Tree:\n"
+        )
+
+        budget = self.context_window - self.output_reserve - self.packer.estimate_tokens(header) - 32
+        tree_str, snippets_str, stats = self.packer.pack(data, max(budget, 0))
+        self.last_prompt_stats = stats
+
+        tree_label = "File Tree:\n"
+        if stats['tree_depth'] is not None:
+            tree_label = f"File Tree (directories below depth {stats['tree_depth']} partly collapsed to summaries):\n"
+
+        return (
+            header +
+            tree_label +
             f"{tree_str}\n\n"
-            "Code:\n"
+            "Code (files marked (structure) are summarized as docstrings, imports, constants and signatures):\n"
             f"{snippets_str}\n"
         )
@@ -0,0 +1,123 @@
+import math
+
+# Helpers shared with PushAgent live at the repository root (see repo_root.py)
+from tree_model import FileTree
+
+class PromptPacker:
+    """
+    Fits the file tree and code snippets of a scan into a token budget.
+    Snippets are ranked by how much they tell the model about the project (manifests and
+    entry points first); files with a structural summary are packed as that summary instead
+    of their first characters. The tree collapses into per-directory summaries when the full
+    listing would not fit, expanding directories level by level while the budget allows.
+    """
+    MANIFESTS = {
+        'requirements.txt', 'pyproject.toml', 'setup.py', 'setup.cfg', 'Pipfile',
+        'package.json', 'tsconfig.json', 'Cargo.toml', 'go.mod', 'Dockerfile', 'Makefile'
+    }
+    ENTRY_POINTS = {
+        'app.py', 'main.py', '__main__.py', 'cli.py', 'manage.py', 'server.py', 'run.py',
+        'index.js', 'main.js', 'server.js', 'app.js', 'index.ts', 'main.ts', 'index.html'
+    }
+    LOW_VALUE_DIRS = {'test', 'tests', 'docs', 'examples', 'fixtures', 'vendor', 'dist', 'build'}
+
+    def __init__(self, token_budget=4000, chars_per_token=4, tree_share=0.25, min_snippet_tokens=64,
+                 tree_files_per_dir=25):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+        # Upper bound on how much of the budget the tree may use; the rest goes to snippets
+        self.tree_share = tree_share
+        self.min_snippet_tokens = min_snippet_tokens
+        # Files listed per directory once the tree no longer fits as a plain listing
+        self.tree_files_per_dir = tree_files_per_dir
+
+    def estimate_tokens(self, text):
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def score(self, path):
+        """Higher scores are packed first."""
+        parts = path.replace('\\', '/').split('/')
+        name = parts[-1]
+        score = 0.0
+        if name in self.MANIFESTS:
+            score += 100
+        if name in self.ENTRY_POINTS:
+            score += 80
+        if name.lower().startswith('readme'):
+            score += 40
+        if name.endswith(('.py', '.js', '.ts')):
+            score += 20
+        if name.endswith(('.min.js', '.lock')) or (name.endswith('.json') and name not in self.MANIFESTS):
+            score -= 30
+        if name.startswith('test_') or name.endswith(('_test.py', '.test.js', '.spec.ts')):
+            score -= 25
+        if any(part.lower() in self.LOW_VALUE_DIRS for part in parts[:-1]):
+            score -= 25
+        # Shallow files describe the project better than deeply nested ones
+        score -= 5 * (len(parts) - 1)
+        return score
+
+    def pack(self, data, token_budget=None):
+        """
+        Returns (tree_str, snippets_str, stats) for the scan result dict.
+        token_budget overrides the packer's default budget for this call.
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        tree_budget = int(budget * self.tree_share)
+        tree = data.get('tree_model') or FileTree.from_paths(data['tree'])
+        tree_str, tree_depth = self._pack_tree(tree, tree_budget)
+        tree_tokens = self.estimate_tokens(tree_str)
+
+        remaining = budget - tree_tokens
+        summaries = data.get('summaries', {})
+        sources = dict(data['snippets'], **summaries)
+        ranked = sorted(sources.items(), key=lambda item: (-self.score(item[0]), item[0]))
+        snippets_str = ""
+        included = 0
+        summarized = 0
+        truncated = 0
+        for name, code in ranked:
+            label = f"{name} (structure)" if name in summaries else name
+            block = f"\nFile: {label}\n```\n{code}\n```\n"
+            cost = self.estimate_tokens(block)
+            if cost <= remaining:
+                snippets_str += block
+                remaining -= cost
+                included += 1
+                summarized += name in summaries
+                continue
+            overhead = self.estimate_tokens(f"\nFile: {label}\n```\n\n```\n")
+            if remaining - overhead >= self.min_snippet_tokens:
+                code = code[:(remaining - overhead) * self.chars_per_token]
+                snippets_str += f"\nFile: {label}\n```\n{code}\n```\n"
+                included += 1
+                summarized += name in summaries
+                truncated += 1
+                break
+            # Too little room to be useful; a smaller, lower-ranked file may still fit
+
+        stats = {
+            "budget_tokens": budget,
+            "tree_tokens": tree_tokens,
+            "snippet_tokens": self.estimate_tokens(snippets_str),
+            "tree_depth": tree_depth,
+            "snippets_included": included,
+            "snippets_summarized": summarized,
+            "snippets_truncated": truncated,
+            "snippets_dropped": len(ranked) - included
+        }
+        return tree_str, snippets_str, stats
+
+    def _pack_tree(self, tree, budget):
+        """
+        Returns the full listing if it fits, otherwise a summary of the FileTree expanded as
+        far as the budget allows. Depth None means the full listing was used; otherwise it is
+        the depth below which at least one directory was collapsed.
+        """
+        chars = budget * self.chars_per_token
+        if tree.path_chars <= chars:
+            text, depth = tree.view(files_per_dir=None)
+            if depth is None:
+                return text, None
+        text, depth = tree.view(budget=chars, files_per_dir=self.tree_files_per_dir)
+        return text, depth
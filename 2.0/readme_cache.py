@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import pathlib
+import re
+import threading
+
+from packer import PromptPacker
+from scan_index import DEFAULT_CACHE_DIR
+
+class ReadmePlan:
+    """What generate() has to do: "hit" (reuse readme), "partial" (rewrite stale sections) or "miss"."""
+    __slots__ = ("status", "record", "stale", "readme")
+
+    def __init__(self, status, record=None, stale=(), readme=None):
+        self.status = status
+        self.record = record
+        self.stale = list(stale)
+        self.readme = readme
+
+class ReadmeCache:
+    """
+    Content-addressed store of generated READMEs, one record per project.
+    A record keeps the hash of the packed prompt and model, the README split into its "## "
+    sections, and for each kind of section a digest of the scan inputs it is written from.
+    An identical prompt is a full hit and skips the LLM; otherwise only the sections whose
+    inputs changed are rewritten, as long as they are at most max_stale_share of the README.
+    """
+    VERSION = 1
+    # Section kind -> heading keywords, checked in order; unknown headings depend on the whole prompt
+    SECTION_KINDS = (
+        ("architecture", ("architecture", "how it works")),
+        ("installation", ("install", "setup", "requirements")),
+        ("run", ("how to run", "usage", "running", "getting started")),
+        ("technologies", ("technolog", "tech stack", "built with", "dependencies")),
+        ("structure", ("structure", "layout")),
+        ("overview", ("what this tool", "overview", "features", "about", "why")),
+    )
+    _HEADING = re.compile(r'^##\s+(.+?)\s*#*\s*$')
+
+    def __init__(self, cache_dir=None, max_stale_share=0.5, persist=True):
+        self.cache_dir = pathlib.Path(cache_dir or DEFAULT_CACHE_DIR) / "readmes"
+        self.max_stale_share = max_stale_share
+        self.persist = persist
+        self._records = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "partial": 0, "misses": 0, "sections_reused": 0,
+                      "sections_regenerated": 0, "seconds_saved": 0.0}
+
+    @staticmethod
+    def _digest(*parts):
+        h = hashlib.sha1()
+        for part in parts:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def prompt_key(self, model, prompt):
+        return self._digest(model, prompt)
+
+    def section_inputs(self, data, audit_results, prompt):
+        """Digest of what each section kind is written from, taken from the scan result."""
+        tree = [p.replace("\\", "/") for p in data["tree"]]
+        files = data.get("files", {})
+        summaries = data.get("summaries", {})
+
+        def hashes(paths):
+            return {p: files.get(p, {}).get("hash") for p in paths}
+
+        manifests = [p for p in tree if p.rsplit("/", 1)[-1] in PromptPacker.MANIFESTS]
+        entry_points = [p for p in tree if p.rsplit("/", 1)[-1] in PromptPacker.ENTRY_POINTS]
+        top_level = sorted({p.split("/", 1)[0] for p in tree})
+        imports = sorted(line for summary in summaries.values() for line in summary.splitlines() if line.startswith("imports: "))
+        unsummarized = [p for p in data.get("snippets", {}) if p not in summaries]
+        return {
+            "overview": self._digest(data["type"], top_level, hashes(manifests + entry_points)),
+            # Signatures and docstrings, so edits inside function bodies keep the section
+            "architecture": self._digest(top_level, summaries, hashes(unsummarized)),
+            "installation": self._digest(hashes(manifests), audit_results.get("requirements_status")),
+            "run": self._digest(hashes(manifests + entry_points)),
+            "technologies": self._digest(imports, hashes(manifests)),
+            "structure": self._digest(tree),
+            "all": self._digest(prompt),
+        }
+
+    def split_sections(self, readme):
+        """[(heading, kind, text)]; the text before the first "## " heading is ("", "overview", ...)."""
+        sections = [["", "overview", []]]
+        in_fence = False
+        for line in readme.splitlines(keepends=True):
+            if line.lstrip().startswith("```"):
+                in_fence = not in_fence
+            m = None if in_fence else self._HEADING.match(line.rstrip("\r\n"))
+            if m:
+                sections.append([m.group(1), self.kind(m.group(1)), [line]])
+            else:
+                sections[-1][2].append(line)
+        result = [(heading, kind, "".join(lines)) for heading, kind, lines in sections]
+        if not result[0][2].strip():
+            result.pop(0)
+        return result
+
+    def kind(self, heading):
+        lowered = heading.lower()
+        for kind, keywords in self.SECTION_KINDS:
+            if any(keyword in lowered for keyword in keywords):
+                return kind
+        return "all"
+
+    def plan(self, root_path, model, prompt, inputs):
+        """Decides between reusing, partially rewriting and fully generating the README."""
+        record = self._load(root_path)
+        if record is None or record.get("model") != model:
+            return ReadmePlan("miss")
+        if record["key"] == self.prompt_key(model, prompt):
+            return ReadmePlan("hit", record, readme="".join(s["text"] for s in record["sections"]))
+        previous = record.get("inputs", {})
+        stale = [i for i, s in enumerate(record["sections"]) if previous.get(s["kind"]) != inputs.get(s["kind"])]
+        if not stale or len(stale) > len(record["sections"]) * self.max_stale_share:
+            # Nothing maps the change to a section, or most of the README is affected anyway
+            return ReadmePlan("miss", record)
+        return ReadmePlan("partial", record, stale=stale)
+
+    def splice(self, plan, rewritten):
+        """The cached README with the stale sections replaced; rewritten maps section index to text."""
+        parts = []
+        for i, section in enumerate(plan.record["sections"]):
+            text = rewritten.get(i, section["text"])
+            parts.append(text if text.endswith("\n") else text + "\n")
+        return "".join(parts)
+
+    def store(self, plan, root_path, model, prompt, inputs, readme, seconds):
+        """
+        Records the README written for this prompt and counts the outcome. seconds is how long
+        this run took; for a miss it becomes the cost a later hit or partial run is said to save.
+        """
+        if plan.status == "miss":
+            full_seconds = seconds
+        else:
+            full_seconds = plan.record.get("seconds", 0.0)
+        sections = [{"heading": h, "kind": k, "text": t} for h, k, t in self.split_sections(readme)]
+        record = {
+            "version": self.VERSION,
+            "root": str(pathlib.Path(root_path).resolve()),
+            "model": model,
+            "key": self.prompt_key(model, prompt),
+            "inputs": inputs,
+            "seconds": full_seconds,
+            "sections": sections,
+        }
+        saved = max(full_seconds - seconds, 0.0) if plan.status != "miss" else 0.0
+        with self._lock:
+            self.stats[{"hit": "hits", "partial": "partial", "miss": "misses"}[plan.status]] += 1
+            if plan.status == "hit":
+                self.stats["sections_reused"] += len(sections)
+            elif plan.status == "partial":
+                self.stats["sections_reused"] += len(plan.record["sections"]) - len(plan.stale)
+                self.stats["sections_regenerated"] += len(plan.stale)
+            self.stats["seconds_saved"] += saved
+            self._records[record["root"]] = record
+        if plan.status != "hit":
+            self._save(record)
+        return saved
+
+    def hit_rate(self):
+        """Share of generations answered fully (1.0) or partially (counted by reused sections)."""
+        with self._lock:
+            total = self.stats["hits"] + self.stats["partial"] + self.stats["misses"]
+            sections = self.stats["sections_reused"] + self.stats["sections_regenerated"]
+            return {
+                "full": self.stats["hits"] / total if total else 0.0,
+                "sections": self.stats["sections_reused"] / sections if sections else 0.0,
+            }
+
+    def _path(self, root):
+        digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{digest}.json"
+
+    def _load(self, root_path):
+        root = str(pathlib.Path(root_path).resolve())
+        with self._lock:
+            if root in self._records:
+                return self._records[root]
+        record = None
+        if self.persist:
+            try:
+                with open(self._path(root), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION and data.get("root") == root:
+                    record = data
+            except (OSError, ValueError):
+                pass
+        with self._lock:
+            self._records[root] = record
+        return record
+
+    def _save(self, record):
+        if not self.persist:
+            return
+        path = self._path(record["root"])
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
@@ -0,0 +1,14 @@
+"""
+Puts the repository root, where the helpers shared with PushAgent live (tracing, llm_client,
+gitignore, tree_model, ui_dispatch, ...), on sys.path.
+
+Imported for that side effect by the 2.0 entry points (app.py, batch.py) before anything
+else from this folder; the library modules import the shared helpers directly.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import pathlib
+
+DEFAULT_CACHE_DIR = pathlib.Path(os.environ.get("PUSHAGENT_CACHE_DIR", pathlib.Path.home() / ".cache" / "pushagent"))
+
+class ScanIndex:
+    """
+    Persistent per-project record of the last scan.
+    Each entry is keyed by relative path and remembers mtime, size, the extracted snippet and
+    the file's class and content hash, so a rescan only has to re-read files whose stat
+    signature changed.
+    A scan that stopped at its file budget is saved as partial: files beyond the budget are
+    missing from it without having been removed.
+    """
+    # Bumped whenever classification rules change, so cached classes are recomputed
+    VERSION = 3
+
+    def __init__(self, root_path, cache_dir=None):
+        self.root_path = pathlib.Path(root_path).resolve()
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        digest = hashlib.sha1(str(self.root_path).encode("utf-8")).hexdigest()[:16]
+        self.index_path = self.cache_dir / "scans" / f"{digest}.json"
+        self.entries = {}
+        self.partial = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+            return
+        if data.get("version") != self.VERSION or data.get("root") != str(self.root_path):
+            self.entries = {}
+            return
+        self.entries = data.get("entries", {})
+        self.partial = data.get("partial", False)
+
+    def save(self, entries, partial=False):
+        """Replaces the stored entries and writes them atomically."""
+        self.entries = entries
+        self.partial = partial
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "root": str(self.root_path), "partial": partial, "entries": entries}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # The index is only an accelerator; a failed write just means a full rescan next time.
+            pass
+
+    def lookup(self, rel_path, stat_result):
+        """Returns the previous entry if the file's mtime and size are unchanged, else None."""
+        entry = self.entries.get(rel_path)
+        if entry and entry["mtime"] == stat_result.st_mtime_ns and entry["size"] == stat_result.st_size:
+            return entry
+        return None
+
+    def diff(self, new_entries, partial=False):
+        """
+        Compares a fresh set of entries against the stored ones. A partial scan cannot tell a
+        removed file from one beyond its budget, and a partial index cannot tell an added file
+        from one that was beyond the previous budget, so those lists stay empty then and
+        "partial" is set.
+        """
+        old_keys = set(self.entries)
+        new_keys = set(new_entries)
+        modified = [
+            path for path in new_keys & old_keys
+            if (new_entries[path]["mtime"], new_entries[path]["size"]) != (self.entries[path]["mtime"], self.entries[path]["size"])
+        ]
+        return {
+            "added": [] if self.partial else sorted(new_keys - old_keys),
+            "removed": [] if partial else sorted(old_keys - new_keys),
+            "modified": sorted(modified),
+            "partial": partial or self.partial,
+        }
+
+    def clear(self):
+        self.entries = {}
+        self.partial = False
+        try:
+            self.index_path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,287 @@
+import ast
+import contextlib
+import json
+import os
+import pathlib
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from scan_index import DEFAULT_CACHE_DIR
+
+class StructureSummarizer:
+    """
+    Compact structural summaries of source files for the README prompt: module docstring,
+    imports, top-level constants, classes with their public methods, function signatures and
+    entry points. Python is parsed with ast; JS/TS goes through a small brace-aware tokenizer.
+    Summaries are cached on disk by content hash, so unchanged files are never re-parsed.
+    """
+    VERSION = 1
+    PYTHON_EXTENSIONS = {'.py', '.pyw'}
+    JS_EXTENSIONS = {'.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'}
+
+    def __init__(self, cache_dir=None, max_entries=5000, max_chars=1500, persist=True):
+        self.cache_path = pathlib.Path(cache_dir or DEFAULT_CACHE_DIR) / "summaries.json"
+        self.max_entries = max_entries
+        # Longer summaries are cut; beyond this size the raw snippet is usually as useful
+        self.max_chars = max_chars
+        self.persist = persist
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "failures": 0}
+
+    def supports(self, name):
+        return os.path.splitext(name)[1] in self.PYTHON_EXTENSIONS | self.JS_EXTENSIONS
+
+    def lookup(self, digest):
+        """The cached summary for a content hash, or None."""
+        with self._lock:
+            entries = self._load()
+            summary = entries.get(digest)
+            if summary is not None:
+                entries.move_to_end(digest)
+                self.stats["hits"] += 1
+            return summary
+
+    def summarize(self, name, text, digest=None):
+        """Returns the summary of one file (None if it cannot be parsed) and caches it by digest."""
+        if digest is not None:
+            cached = self.lookup(digest)
+            if cached is not None:
+                return cached
+        ext = os.path.splitext(name)[1]
+        try:
+            lines = self._python(text) if ext in self.PYTHON_EXTENSIONS else self._javascript(text)
+        except (SyntaxError, ValueError, RecursionError):
+            lines = None
+        with self._lock:
+            self.stats["misses"] += 1
+            if not lines:
+                self.stats["failures"] += 1
+                return None
+            summary = "\n".join(lines)
+            if len(summary) > self.max_chars:
+                summary = summary[:self.max_chars].rsplit("\n", 1)[0] + "\n..."
+            if digest is not None:
+                entries = self._load()
+                entries[digest] = summary
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+                self._dirty = True
+        return summary
+
+    def save(self):
+        """
+        Writes the cache through a uniquely named temporary file. Batch workers in other
+        processes share the file, so what they saved since it was loaded is merged in first,
+        under a lock file.
+        """
+        with self._lock:
+            if not (self.persist and self._dirty):
+                return
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with self._file_lock():
+                    merged = self._read()
+                    for digest, summary in self._entries.items():
+                        merged.pop(digest, None)
+                        merged[digest] = summary
+                    while len(merged) > self.max_entries:
+                        merged.popitem(last=False)
+                    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.cache_path.parent,
+                                                     prefix=self.cache_path.stem, suffix=".tmp", delete=False) as f:
+                        json.dump({"version": self.VERSION, "entries": merged}, f)
+                    try:
+                        os.replace(f.name, self.cache_path)
+                    except OSError:
+                        os.unlink(f.name)
+                        raise
+                self._entries = merged
+                self._dirty = False
+            except OSError:
+                # Only an accelerator: unsaved summaries are recomputed next time
+                pass
+
+    @contextlib.contextmanager
+    def _file_lock(self, timeout=5.0, stale=30.0):
+        """Cross-process lock held by creating a sibling file exclusively; one left by a crashed process expires."""
+        lock_path = self.cache_path.with_suffix(".lock")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > stale:
+                        os.unlink(lock_path)
+                        continue
+                except OSError:
+                    # Released between the two calls
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"{lock_path} is held by another process")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            try:
+                os.unlink(lock_path)
+            except OSError:
+                pass
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = self._read() if self.persist else OrderedDict()
+        return self._entries
+
+    def _read(self):
+        entries = OrderedDict()
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                entries.update(data.get("entries", {}))
+        except (OSError, ValueError):
+            pass
+        return entries
+
+    # --- Python ---
+
+    @staticmethod
+    def _first_line(doc, limit=120):
+        line = (doc or "").strip().split("\n", 1)[0].strip()
+        return line[:limit]
+
+    def _signature(self, node):
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        doc = self._first_line(ast.get_docstring(node))
+        return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}" + (f"  # {doc}" if doc else "")
+
+    def _python(self, text):
+        tree = ast.parse(text)
+        lines = []
+        doc = ast.get_docstring(tree)
+        if doc:
+            lines.append(f'"""{self._first_line(doc, 200)}"""')
+
+        imports = []
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                imports += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                imports.append("." * node.level + node.module)
+        if imports:
+            lines.append("imports: " + ", ".join(dict.fromkeys(imports)))
+
+        for node in tree.body:
+            if isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                names = [t.id for t in targets if isinstance(t, ast.Name) and t.id.isupper()]
+                if names and node.value is not None:
+                    value = ast.unparse(node.value)
+                    lines.append(f"{names[0]} = {value if len(value) <= 60 else value[:57] + '...'}")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                lines.append(self._signature(node))
+            elif isinstance(node, ast.ClassDef):
+                bases = ", ".join(ast.unparse(b) for b in node.bases)
+                doc = self._first_line(ast.get_docstring(node))
+                lines.append(f"class {node.name}" + (f"({bases})" if bases else "") + ":" + (f"  # {doc}" if doc else ""))
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and \
+                            (not item.name.startswith("_") or item.name == "__init__"):
+                        lines.append("    " + self._signature(item))
+            elif isinstance(node, ast.If) and self._is_main_guard(node.test):
+                calls = [ast.unparse(n.func) for n in ast.walk(node) if isinstance(n, ast.Call)]
+                lines.append("entry point: if __name__ == '__main__'" + (f" -> {', '.join(dict.fromkeys(calls))}" if calls else ""))
+        return lines
+
+    @staticmethod
+    def _is_main_guard(test):
+        return (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name) and test.left.id == "__name__"
+                and any(isinstance(c, ast.Constant) and c.value == "__main__" for c in test.comparators))
+
+    # --- JavaScript / TypeScript ---
+
+    _JS_TOKENS = re.compile(
+        r'//[^\n]*|/\*.*?\*/|`(?:\\.|[^`\\])*`|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|[{}]|\n|[^{}\n/`"\']+|/',
+        re.DOTALL
+    )
+    _JS_IMPORT = re.compile(r'''^\s*import\s(?:[^'"]*?\sfrom\s)?\s*['"]([^'"]+)['"]|require\(\s*['"]([^'"]+)['"]\s*\)''', re.MULTILINE)
+    _JS_FUNCTION = re.compile(r'^(export\s+(?:default\s+)?)?(async\s+)?function\s*\*?\s*(\w+)\s*(\([^)]*\))')
+    _JS_CLASS = re.compile(r'^(export\s+(?:default\s+)?)?(?:abstract\s+)?class\s+(\w+)(\s+extends\s+[\w.]+)?')
+    _JS_ARROW = re.compile(r'^(export\s+)?(?:const|let|var)\s+(\w+)\s*(?::[^=]+)?=\s*(async\s+)?(\([^)]*\)|\w+)\s*(?::[^=]+)?=>')
+    _JS_CONST = re.compile(r'^(export\s+)?const\s+([A-Z][A-Z0-9_]+)\s*(?::[^=]+)?=\s*(.{0,60})')
+    _JS_TYPE = re.compile(r'^(export\s+)?(interface|type|enum)\s+(\w+)')
+    _JS_METHOD = re.compile(r'^(static\s+)?(async\s+)?((?:get|set)\s+)?(\w+)\s*(\([^)]*\))\s*(?::[^{]+)?(?:\{|$)')
+    _JS_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'function', 'return'}
+    _JS_ENTRY = re.compile(r'\.listen\(|createServer\(|ReactDOM\.render\(|createRoot\(|process\.argv')
+
+    def _javascript(self, text):
+        lines = []
+        header = re.match(r'\s*(?:/\*\*?(.*?)\*/|//([^\n]*))', text, re.DOTALL)
+        if header:
+            doc = (header.group(1) or header.group(2) or "").replace("*", " ")
+            if self._first_line(doc):
+                lines.append(f"/* {self._first_line(' '.join(doc.split()), 200)} */")
+
+        imports = [a or b for a, b in self._JS_IMPORT.findall(text)]
+        if imports:
+            lines.append("imports: " + ", ".join(dict.fromkeys(imports)))
+
+        # Rebuild the source without comments and string contents, noting the brace depth
+        # at which each logical line starts
+        depth = 0
+        current = []
+        line_depth = 0
+        logical = []
+        for token in self._JS_TOKENS.findall(text):
+            if token.startswith(("//", "/*")):
+                continue
+            if token[0] in "\"'`":
+                current.append(token[0] * 2)
+            elif token == "{":
+                current.append(token)
+                depth += 1
+            elif token == "}":
+                current.append(token)
+                depth = max(depth - 1, 0)
+            elif token == "\n":
+                logical.append((line_depth, "".join(current).strip()))
+                current = []
+                line_depth = depth
+            else:
+                current.append(token)
+        logical.append((line_depth, "".join(current).strip()))
+
+        in_class = False
+        for line_depth, line in logical:
+            if not line:
+                continue
+            if line_depth == 0:
+                in_class = False
+                if m := self._JS_CLASS.match(line):
+                    lines.append(f"{m.group(1) or ''}class {m.group(2)}{m.group(3) or ''}")
+                    in_class = True
+                elif m := self._JS_FUNCTION.match(line):
+                    lines.append(f"{m.group(1) or ''}{m.group(2) or ''}function {m.group(3)}{m.group(4)}")
+                elif m := self._JS_ARROW.match(line):
+                    lines.append(f"{m.group(1) or ''}{m.group(3) or ''}{m.group(2)} = {m.group(4)} =>")
+                elif m := self._JS_TYPE.match(line):
+                    lines.append(f"{m.group(1) or ''}{m.group(2)} {m.group(3)}")
+                elif m := self._JS_CONST.match(line):
+                    lines.append(f"{m.group(1) or ''}const {m.group(2)} = {m.group(3).rstrip(';')}")
+                elif line.startswith(("module.exports", "export default")):
+                    lines.append(line[:80])
+                if self._JS_ENTRY.search(line):
+                    lines.append(f"entry point: {line[:80]}")
+            elif line_depth == 1 and in_class:
+                m = self._JS_METHOD.match(line)
+                if m and m.group(4) not in self._JS_KEYWORDS and not m.group(4).startswith("_"):
+                    lines.append(f"    {m.group(1) or ''}{m.group(2) or ''}{m.group(3) or ''}{m.group(4)}{m.group(5)}")
+        return lines
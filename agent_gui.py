@@ -1,121 +1,273 @@
+import os
+import socket
+import sys
+
+from ipc import IPCClient, IPCError, IPCServer
+
+IPC_PORT = int(os.environ.get("PUSHAGENT_IPC_PORT", 65432))
+
+# --- SINGLE INSTANCE ---
+# Runs before the GUI and SDK imports below: a second hotkey press only needs these to
+# forward its folder to the running instance and exit.
+
+def claim_instance(port=IPC_PORT):
+    """Binds the single-instance socket; returns it listening, or None if an instance already owns the port."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind(('127.0.0.1', port))
+        sock.listen(8)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+def forward_to_instance(path, port=IPC_PORT):
+    """Hands the folder to the running instance and waits for its acknowledgement."""
+    try:
+        with IPCClient(port) as client:
+            client.load(path)
+        return True
+    except IPCError as e:
+        print(f"[PushAgent] Could not reach the running instance: {e}")
+        return False
+
+if __name__ == "__main__":
+    _instance_socket = claim_instance()
+    if _instance_socket is None:
+        forward_to_instance(sys.argv[1] if len(sys.argv) > 1 else None)
+        sys.exit(0)
+
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox, filedialog
-import subprocess
-import os
-import sys
 import threading
-import socket
-import keyring
-import json
 import re
 import traceback
 import queue
 import time
 import shutil
-from google import genai
-from google.genai import types
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from tracing import tracer
+from llm_client import CallableBackend, OllamaBackend, shared_client
+from llm_router import shared_router
+from git_service import DIFF_BUDGET_BYTES, GitError, GitService, StagedDiff
+from gitignore import IgnoreMatcher
+from project_state import WarmProjects
+from tree_model import FileTree
+from pipeline import Pipeline, PipelineError, add_push_steps
+from push_engine import PushEngine
+from response_cache import ResponseCache
+from ui_dispatch import Dispatcher, EventQueue
 
 # --- CONFIGURATION ---
 APP_NAME = "PushAgent"
 KEYRING_SERVICE = "PushAgent_GeminiAPI"
 KEYRING_USER = "user_key"
-IPC_PORT = 65432
-MAX_FILE_TREE_ENTRIES = 30
-MAX_FILES_PER_DIR = 10
+IPC_DEBOUNCE = 1.0                  # Seconds within which repeated loads of one path are coalesced
+README_TREE_CHARS = 1200            # Project outline sent with the README prompt
+MAX_FILES_PER_DIR = 10              # Files named per directory in that outline
+TREE_SCAN_MAX_FILES = 10000         # Files counted into the outline on load; later changes come from the watcher
 GEMINI_MODEL = "models/gemini-2.0-flash"
+GEMINI_FALLBACK_MODELS = ("models/gemini-2.0-flash-lite",)  # Routed to when the main model is slow or failing
+OLLAMA_URL = os.environ.get("PUSHAGENT_OLLAMA_URL", "http://localhost:11434")
+OLLAMA_FALLBACK_MODEL = os.environ.get("PUSHAGENT_OLLAMA_MODEL")  # Optional local route; also works without an API key
+# Opt-in: race a route on another backend once the first is slower than its p90; the loser
+# still finishes its request, so this spends quota on both
+HEDGE_COMMIT_MESSAGES = os.environ.get("PUSHAGENT_HEDGE_COMMITS") == "1"
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), APP_NAME)
+RESPONSE_CACHE_MAX_ENTRIES = 200
+RESPONSE_CACHE_MAX_BYTES = 2 * 1024 * 1024
+DIFF_MAP_REDUCE_THRESHOLD = 48000   # Above this raw diff size, files are summarized separately first
+DIFF_MAX_WORKERS = 4
+GEMINI_TIMEOUT = 60                 # Seconds before a Gemini request is abandoned
+GEMINI_MAX_CONCURRENCY = 4
+WARM_PROJECTS_MAX = 4               # Recently used projects kept loaded and watched
+WARM_PROJECTS_MAX_BYTES = 64 * 1024 * 1024  # Estimated memory across warm projects before LRU eviction
+WATCH_INTERVAL = 1.0                # Seconds between change polls of the current project
+WATCH_IDLE_INTERVAL = 10.0          # Seconds between change polls of the other warm projects
+PUSH_MAX_ATTEMPTS = 4               # Tries for a push/fetch failing with network or server errors
 
 # --- BACKEND SERVICES ---
 
-class GitError(Exception):
-    """Raised when a git command fails."""
-    pass
+class GeminiService:
+    """
+    The keyring lookup, the google-genai import and client construction run on a background
+    thread so the window appears first. api_key and client block until their part is ready;
+    key_future and client_future let the UI thread wait for them without blocking.
+    Requests go through the shared router, which picks the fastest healthy of GEMINI_MODEL,
+    GEMINI_FALLBACK_MODELS and an optional local Ollama model. Cached responses are keyed on
+    that route list rather than one model, since any of the routes may have answered.
+    """
+    def __init__(self, cache=None, api_key=None, base_url=None):
+        # api_key/base_url let benchmarks point the client at a local fake server
+        self.cache = cache or ResponseCache(os.path.join(CACHE_DIR, "responses.json"), max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                                            max_bytes=RESPONSE_CACHE_MAX_BYTES)
+        self.base_url = base_url
+        # Calls go through the shared client: bounded concurrency, deadline, and identical
+        # prompts in flight at the same time (e.g. a double-clicked Regenerate) sent once
+        self.llm = shared_client()
+        self.router = shared_router()
+        self.routes = []
+        self.key_future = Future()
+        self.client_future = Future()
+        threading.Thread(target=self._init, args=(api_key,), name="gemini-init", daemon=True).start()
+
+    @property
+    def api_key(self):
+        return self.key_future.result()
+
+    @property
+    def client(self):
+        return self.client_future.result()
+
+    def _init(self, api_key):
+        if not api_key:
+            try:
+                import keyring
+                api_key = keyring.get_password(KEYRING_SERVICE, KEYRING_USER)
+            except Exception as e:
+                print(f"[PushAgent] Keyring lookup failed: {e}")
+        self.key_future.set_result(api_key)
 
-class GitService:
-    @staticmethod
-    def run(args, cwd):
+        client = None
+        if api_key:
+            try:
+                # The SDK is by far the slowest import; it is only loaded when there is a key
+                from google import genai
+                from google.genai import types
+                http_options = types.HttpOptions(api_version="v1", base_url=self.base_url) if self.base_url else types.HttpOptions(api_version="v1")
+                client = genai.Client(api_key=api_key, http_options=http_options)
+            except Exception as e:
+                print(f"[PushAgent] Gemini init failed: {e}")
+        routes = []
+        if client:
+            self.llm.register("gemini", CallableBackend(self._call_sdk, max_concurrency=GEMINI_MAX_CONCURRENCY))
+            routes += [("gemini", model) for model in (GEMINI_MODEL,) + GEMINI_FALLBACK_MODELS]
+        if OLLAMA_FALLBACK_MODEL:
+            backend_name = f"ollama:{OLLAMA_URL}"
+            self.llm.register(backend_name, OllamaBackend(OLLAMA_URL), replace=False)
+            routes.append((backend_name, OLLAMA_FALLBACK_MODEL))
+        self.routes = routes
+        self.client_future.set_result(client)
+
+    @property
+    def available(self):
+        """True once some route can answer; waits for background init like client does."""
+        self.client_future.result()
+        return bool(self.routes)
+
+    def generate_commit_message(self, diff_text, refresh=False):
+        """Returns a cached message for an identical diff unless refresh is set."""
+        if not self.available:
+            return "Update (AI Key Missing)"
+        key = ResponseCache.make_key("commit", self.routes, diff_text)
+        cached = None if refresh else self.cache.get(key)
+        if cached is not None:
+            return cached
         try:
-            env = os.environ.copy()
-            env["GIT_TERMINAL_PROMPT"] = "0"
-            result = subprocess.run(
-                args, cwd=cwd, env=env,
-                capture_output=True, text=True, check=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
+            prompt = (
+                "Write a concise git commit message (under 60 chars) for this diff. "
+                "Return ONLY the message, no quotes or backticks:\n"
+                f"{diff_text}"
             )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            raise GitError(e.stderr.strip() or e.stdout.strip())
+            msg = self._generate("commit", prompt, hedge=HEDGE_COMMIT_MESSAGES).strip().replace('"', '').replace("`", "")
+            self.cache.put(key, msg)
+            return msg
+        except Exception as e:
+            return f"Update (AI Error: {str(e)[:40]})"
 
-    @staticmethod
-    def get_status(cwd):
-        return GitService.run(["git", "status", "--porcelain"], cwd)
+    def generate_commit_message_for_diff(self, staged, refresh=False):
+        """
+        Small diffs go out as one budgeted prompt. Large ones are summarized per file chunk
+        concurrently and reduced into a single message, so latency stays flat as commits grow.
+        """
+        if staged.total_bytes <= DIFF_MAP_REDUCE_THRESHOLD:
+            return self.generate_commit_message(staged.render(), refresh=refresh)
+        if not self.available:
+            return "Update (AI Key Missing)"
 
-    @staticmethod
-    def get_diff(cwd):
-        return GitService.run(["git", "diff", "--staged", "--stat"], cwd) or "No changes staged."
+        key = ResponseCache.make_key("commit-map-reduce", self.routes, staged.digest)
+        cached = None if refresh else self.cache.get(key)
+        if cached is not None:
+            return cached
 
-    @staticmethod
-    def get_remote(cwd):
-        try:
-            return GitService.run(["git", "remote", "get-url", "origin"], cwd)
-        except GitError:
-            return None
+        chunks = [(staged.render(files=group), staged.stat(group)) for group in staged.chunks()]
+        with ThreadPoolExecutor(max_workers=DIFF_MAX_WORKERS) as pool:
+            summaries = list(pool.map(self._summarize_chunk, chunks))
 
-    @staticmethod
-    def get_branch(cwd):
         try:
-            return GitService.run(["git", "branch", "--show-current"], cwd)
-        except GitError:
-            return "main"
-
-class GeminiService:
-    def __init__(self):
-        self.api_key = keyring.get_password(KEYRING_SERVICE, KEYRING_USER)
-        self.client = None
-        if self.api_key:
-            try:
-                self.client = genai.Client(api_key=self.api_key, http_options=types.HttpOptions(api_version="v1"))
-            except Exception as e:
-                print(f"[PushAgent] Gemini init failed: {e}")
+            prompt = (
+                "Write a concise git commit message (under 60 chars) for a change with these "
+                "per-file summaries. Return ONLY the message, no quotes or backticks:\n"
+                f"{staged.stat()[:DIFF_BUDGET_BYTES // 2]}\n\nSummaries:\n" + "\n".join(summaries)
+            )
+            msg = self._generate("commit-reduce", prompt, hedge=HEDGE_COMMIT_MESSAGES).strip().replace('"', '').replace("`", "")
+            self.cache.put(key, msg)
+            return msg
+        except Exception as e:
+            return f"Update (AI Error: {str(e)[:40]})"
 
-    def generate_commit_message(self, diff_text):
-        if not self.client:
-            return "Update (AI Key Missing)"
+    def _summarize_chunk(self, chunk):
+        """Map step; falls back to the chunk's stat lines so the reduce step still has input."""
+        diff_text, stat = chunk
         try:
             prompt = (
-                "Write a concise git commit message (under 60 chars) for this diff. "
-                "Return ONLY the message, no quotes or backticks:\n"
+                "Summarize what changed in each file of this diff, one short line per file:\n"
                 f"{diff_text}"
             )
-            res = self.client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
-            return res.text.strip().replace('"', '').replace("`", "")
+            return self._generate("commit-map", prompt).strip()
         except Exception as e:
-            return f"Update (AI Error: {str(e)[:40]})"
+            print(f"[PushAgent] Diff chunk summary failed: {e}")
+            return stat
 
-    def generate_readme(self, file_tree, project_name):
-        if not self.client:
+    def generate_readme(self, file_tree, project_name, refresh=False):
+        if not self.available:
             return f"# {project_name}"
+        key = ResponseCache.make_key("readme", self.routes, f"{project_name}\0{file_tree}")
+        cached = None if refresh else self.cache.get(key)
+        if cached is not None:
+            return cached
         try:
             prompt = (
                 f"Create a minimalist, professional README.md for a project named '{project_name}' "
                 f"with this structure:\n{file_tree}\n\nKeep it concise."
             )
-            res = self.client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
-            text = res.text.strip()
+            text = self._generate("readme", prompt).strip()
             # Strip wrapping markdown code fences
             if text.startswith("```"):
                 text = text.split("\n", 1)[1]
             if text.endswith("```"):
                 text = text.rsplit("\n", 1)[0]
+            self.cache.put(key, text)
             return text
         except Exception as e:
             print(f"[PushAgent] README generation failed: {e}")
             return f"# {project_name}"
 
+    def _generate(self, kind, prompt, hedge=False):
+        with tracer.span(f"gemini.{kind}", model=GEMINI_MODEL, prompt_chars=len(prompt)) as span:
+            result = self.router.request(self.routes, prompt, timeout=GEMINI_TIMEOUT, hedge=hedge)
+            span.set(response_chars=len(result.text), route=f"{result.route[0]}/{result.route[1]}", hedged=result.hedged)
+            return result.text
+
+    def _call_sdk(self, model, prompt, timeout, options):
+        # Runs on a worker thread of the shared client; the remaining deadline bounds the
+        # HTTP call itself so an abandoned request does not hold its slot much longer
+        from google.genai import types
+        config = None
+        if timeout is not None:
+            config = types.GenerateContentConfig(http_options=types.HttpOptions(timeout=max(int(timeout * 1000), 1)))
+        res = self.client.models.generate_content(model=model, contents=prompt, config=config)
+        return res.text or ""
+
 # --- STATE MANAGEMENT ---
 
 class ProjectContext:
     """Holds the state for a single project session."""
+    IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'dist', '.eggs', 'build'}
+
     def __init__(self, path):
         self.path = path
         self.name = os.path.basename(path)
@@ -123,31 +275,100 @@ class ProjectContext:
         self.remote_url = None
         self.branch = None
         self.has_changes = False
+        self.git_state = None
         self.ai_commit_msg = ""
+        # FileTree of the project, kept current from watcher changes; files is its outline
+        self.tree = None
         self.files = []
 
     def load(self):
         """Analyzes the folder synchronously."""
+        with tracer.span("project.load", path=self.path):
+            self._load()
+
+    def _load(self):
         if not os.path.exists(os.path.join(self.path, ".git")):
             self.is_git = False
             return
 
         self.is_git = True
-        self.remote_url = GitService.get_remote(self.path)
-        self.branch = GitService.get_branch(self.path)
-
-        status = GitService.get_status(self.path)
-        self.has_changes = bool(status.strip())
-
-        # Build file list for AI context
-        ignore = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'dist', '.eggs', 'build'}
-        self.files = []
-        for root, dirs, files in os.walk(self.path):
-            dirs[:] = [d for d in dirs if d not in ignore]
-            for f in files[:MAX_FILES_PER_DIR]:
-                self.files.append(os.path.join(root, f).replace(self.path, "").lstrip(os.sep))
-            if len(self.files) >= MAX_FILE_TREE_ENTRIES:
-                break
+        self.remote_url = GitService.read_remote_url(self.path)
+        self.refresh_git_state()
+        self.tree = self._build_tree()
+        self.files = self._outline()
+
+    def _build_tree(self):
+        """
+        Streams what git would push into a FileTree, breadth-first so a capped walk still
+        covers the top of the project; ignored dirs are never entered. Large directories end
+        up as one outline line with their file count, size and extensions.
+        """
+        matcher = IgnoreMatcher(self.path)
+        tree = FileTree(max_files_per_dir=MAX_FILES_PER_DIR)
+        pending = deque([(self.path, "")])
+        while pending and len(tree) < TREE_SCAN_MAX_FILES:
+            dir_path, rel_dir = pending.popleft()
+            try:
+                with os.scandir(dir_path) as it:
+                    items = sorted(it, key=lambda item: item.name)
+            except OSError:
+                continue
+            for item in items:
+                rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        if item.name not in self.IGNORED_DIRS and not matcher.ignored(rel_path, True):
+                            pending.append((item.path, rel_path))
+                    elif not matcher.ignored(rel_path):
+                        tree.add(rel_path, item.stat().st_size)
+                except OSError:
+                    continue
+        tree.truncated = bool(pending)
+        return tree
+
+    def _outline(self):
+        """Outline for AI context, one line per entry."""
+        return self.tree.render(budget=README_TREE_CHARS, files_per_dir=MAX_FILES_PER_DIR).splitlines()
+
+    def apply_changes(self, changes):
+        """Updates a warm context from watcher changes instead of reloading it."""
+        touched = changes["added"] + changes["removed"] + changes["modified"]
+        if ".git/config" in touched:
+            self.remote_url = GitService.read_remote_url(self.path)
+        if self.tree is not None:
+            # The watcher already skips .gitignore'd paths; only the outline's own dirs are left
+            def in_outline(rel_path):
+                return not rel_path.startswith(".git/") and not self.IGNORED_DIRS.intersection(rel_path.split("/")[:-1])
+
+            removed = [p for p in changes["removed"] if in_outline(p)]
+            added = [p for p in changes["added"] if in_outline(p)]
+            for rel_path in removed:
+                self.tree.remove(rel_path)
+            for rel_path in added:
+                try:
+                    self.tree.add(rel_path, os.path.getsize(os.path.join(self.path, rel_path)))
+                except OSError:
+                    continue
+            if added or removed:
+                self.files = self._outline()
+        self.refresh_git_state()
+
+    def refresh_git_state(self):
+        """Re-probes git; callers reuse self.git_state instead of running their own status commands."""
+        self.git_state = GitService.probe(self.path)
+        self.branch = self.git_state.branch or ""
+        self.has_changes = self.git_state.has_changes
+        return self.git_state
+
+    def footprint(self):
+        """Approximate bytes held by this context, for the warm-project memory cap."""
+        size = 512 + len(self.ai_commit_msg) + sum(len(f) + 64 for f in self.files)
+        if self.tree is not None:
+            # Node, dicts, histogram and up to MAX_FILES_PER_DIR names per directory
+            size += self.tree.dir_count * (400 + 80 * MAX_FILES_PER_DIR)
+        if self.git_state is not None:
+            size += sum(len(e.path) + len(e.orig_path or "") + 120 for e in self.git_state.entries)
+        return size
 
 # --- GUI APPLICATION ---
 
@@ -158,14 +379,11 @@ def sanitize_repo_name(name):
     return name or "my-repo"
 
 class PushAgentWizard(ctk.CTk):
-    def __init__(self, start_path=None):
-        # SINGLE INSTANCE CHECK
-        self.ipc_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            self.ipc_socket.bind(('127.0.0.1', IPC_PORT))
-            self.ipc_socket.listen(1)
-        except OSError:
-            self._send_ipc(start_path)
+    def __init__(self, start_path=None, ipc_socket=None):
+        # SINGLE INSTANCE CHECK (already done before the heavy imports when run as a script)
+        self.ipc_socket = ipc_socket or claim_instance()
+        if self.ipc_socket is None:
+            forward_to_instance(start_path)
             sys.exit(0)
 
         super().__init__()
@@ -178,16 +396,29 @@ class PushAgentWizard(ctk.CTk):
         self.resizable(False, False)
 
         self.project = None
-        self.gemini = GeminiService()
-        self.queue = queue.Queue()
+        self.response_cache = ResponseCache(os.path.join(CACHE_DIR, "responses.json"), max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                                            max_bytes=RESPONSE_CACHE_MAX_BYTES)
+        self.gemini = GeminiService(cache=self.response_cache)
+        # Worker threads post (action, payload) here; each post wakes the Tk loop, nothing polls
+        self.dispatcher = Dispatcher(self)
+        self.queue = EventQueue(self.dispatcher, self._process_queue)
+        self.warm = WarmProjects(max_projects=WARM_PROJECTS_MAX, interval=WATCH_INTERVAL, idle_interval=WATCH_IDLE_INTERVAL,
+                                 max_bytes=WARM_PROJECTS_MAX_BYTES)
+        self.warm.start()
+        # Speculative work started while the user reviews the commit screen
+        self.background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pushagent-bg")
+        self._readme_job = None
+        # Last trace summary, shown on the commit and success screens when tracing is on
+        self.trace_text = ""
+        self._push_engine = None
 
         # Container for Wizard Steps
         self.container = ctk.CTkFrame(self, fg_color="transparent")
         self.container.pack(fill="both", expand=True, padx=20, pady=20)
 
-        # Start IPC Listener
-        threading.Thread(target=self._ipc_listener, daemon=True).start()
-        self.after(100, self._process_queue)
+        # Start IPC server; each connection is served on its own thread
+        self.ipc_server = IPCServer(self.ipc_socket, self._handle_ipc, debounce=IPC_DEBOUNCE)
+        self.ipc_server.start()
 
         # Initial Load
         if start_path:
@@ -202,29 +433,74 @@ class PushAgentWizard(ctk.CTk):
         if not path or not os.path.isdir(path):
             return
 
-        self.project = ProjectContext(path)
+        warm = self.warm.get(path)
+        if warm is not None:
+            self.project = warm
+            # Timed as a span so warm loads show up in exported traces next to the cold ones
+            with tracer.span("project.warm_load", path=path) as span:
+                # validate() catches commits, checkouts and staging since the last watcher poll
+                reused = bool(self.warm.validate(path) and not self.warm.is_dirty(path) and warm.ai_commit_msg)
+                if reused:
+                    # Nothing changed since the commit screen was last prepared: render from memory
+                    self.show_commit()
+                span.set(reused=reused)
+            if reused:
+                threading.Thread(target=self._recheck_warm, args=(warm,), daemon=True).start()
+                return
+            self.show_loading()
+
+            def _refresh():
+                try:
+                    self.warm.refresh(path)
+                    self.queue.put(("PREPARE_COMMIT", None))
+                except Exception as e:
+                    self.queue.put(("ERROR", str(e)))
+
+            threading.Thread(target=_refresh, daemon=True).start()
+            return
+
+        self.project = project = ProjectContext(path)
         self.show_loading()
 
         def _analyze():
             try:
-                self.project.load()
-                if not self.project.is_git or not self.project.remote_url:
+                project.load()
+                if not project.is_git or not project.remote_url:
                     self.queue.put(("SHOW_SETUP", None))
                 else:
+                    self.warm.add(project)
                     self.queue.put(("PREPARE_COMMIT", None))
             except Exception as e:
                 self.queue.put(("ERROR", str(e)))
 
         threading.Thread(target=_analyze, daemon=True).start()
 
-    def prepare_commit_data(self):
+    def _recheck_warm(self, project):
+        """Catches edits made since the last watcher poll; re-prepares the commit if there were any."""
+        try:
+            if self.warm.refresh(project.path) and self.project is project:
+                self.queue.put(("PREPARE_COMMIT", None))
+        except Exception as e:
+            print(f"[PushAgent] Warm recheck failed: {e}")
+
+    def prepare_commit_data(self, refresh=False):
         """Background task to stage files and fetch AI commit message."""
         def _fetch():
             try:
                 cwd = self.project.path
-                GitService.run(["git", "add", "."], cwd)
-                diff = GitService.get_diff(cwd)
-                self.project.ai_commit_msg = self.gemini.generate_commit_message(diff)
+                # Edits saved after this point leave the project dirty once the message is ready
+                since = self.warm.snapshot(cwd)
+                with tracer.span("prepare_commit", refresh=refresh) as span:
+                    # A clean tree from load() needs neither staging nor a diff
+                    if self.project.git_state and not self.project.git_state.has_changes:
+                        self.project.ai_commit_msg = self.gemini.generate_commit_message("No changes staged.", refresh=refresh)
+                    else:
+                        GitService.run(["git", "add", "."], cwd)
+                        staged = StagedDiff.read(cwd)
+                        span.set(diff_bytes=staged.total_bytes, files=len(staged.files))
+                        self.project.ai_commit_msg = self.gemini.generate_commit_message_for_diff(staged, refresh=refresh)
+                self.warm.mark_synced(cwd, since)
+                self._report_trace(span)
                 self.queue.put(("SHOW_COMMIT", None))
             except Exception as e:
                 self.queue.put(("ERROR", str(e)))
@@ -252,10 +528,11 @@ class PushAgentWizard(ctk.CTk):
             text="Press Ctrl+Shift+G in Explorer\nor select a folder below.",
             font=("Arial", 14)
         ).pack(pady=20)
-        ctk.CTkButton(self.container, text="Browse Folder", command=self._browse).pack(pady=10)
+        screen = ctk.CTkButton(self.container, text="Browse Folder", command=self._browse)
+        screen.pack(pady=10)
 
-        if not self.gemini.api_key:
-            self._show_api_input()
+        # The keyring lookup may still be running; ask for a key once it is known to be missing
+        self.gemini.key_future.add_done_callback(lambda f: self.queue.put(("API_KEY", (f.result(), screen))))
 
     def _show_api_input(self):
         f = ctk.CTkFrame(self.container)
@@ -313,7 +590,14 @@ class PushAgentWizard(ctk.CTk):
             ).pack(pady=5)
 
         # Commit Message
-        ctk.CTkLabel(self.container, text="Commit Message (AI Generated)", anchor="w").pack(fill="x", pady=(10, 0))
+        msg_header = ctk.CTkFrame(self.container, fg_color="transparent")
+        msg_header.pack(fill="x", pady=(10, 0))
+        ctk.CTkLabel(msg_header, text="Commit Message (AI Generated)", anchor="w").pack(side="left")
+        self.btn_regenerate = ctk.CTkButton(
+            msg_header, text="Regenerate", width=90, fg_color="gray",
+            command=self._regenerate_commit_message
+        )
+        self.btn_regenerate.pack(side="right")
         self.entry_commit = ctk.CTkTextbox(self.container, height=80)
         self.entry_commit.pack(fill="x", pady=5)
         self.entry_commit.insert("0.0", self.project.ai_commit_msg)
@@ -322,7 +606,14 @@ class PushAgentWizard(ctk.CTk):
         readme_exists = os.path.exists(os.path.join(self.project.path, "README.md"))
         self.var_readme = ctk.BooleanVar(value=not readme_exists)
         readme_label = "Generate README.md" if not readme_exists else "Regenerate README.md (backup saved)"
-        ctk.CTkCheckBox(self.container, text=readme_label, variable=self.var_readme).pack(pady=10, anchor="w")
+        ctk.CTkCheckBox(
+            self.container, text=readme_label, variable=self.var_readme,
+            command=lambda: self.var_readme.get() and self._speculate_readme()
+        ).pack(pady=10, anchor="w")
+
+        self.lbl_remote = ctk.CTkLabel(self.container, text="Checking remote...", font=("Arial", 11), text_color="gray")
+        self.lbl_remote.pack(anchor="w")
+        self._show_trace()
 
         # Push Button
         self.btn_push = ctk.CTkButton(
@@ -332,6 +623,11 @@ class PushAgentWizard(ctk.CTk):
         )
         self.btn_push.pack(fill="x", pady=20, side="bottom")
 
+        # Use the time spent reviewing the message: fetch, and draft the README if it is wanted
+        self._check_remote()
+        if self.var_readme.get():
+            self._speculate_readme()
+
     def show_success(self, url):
         self.clear_ui()
         ctk.CTkLabel(
@@ -346,6 +642,7 @@ class PushAgentWizard(ctk.CTk):
                 command=lambda: os.startfile(url)
             ).pack(pady=10, fill="x")
         ctk.CTkButton(self.container, text="Close", command=self.destroy, fg_color="gray").pack(pady=10, fill="x")
+        self._show_trace()
 
     # --- ACTIONS ---
 
@@ -354,14 +651,20 @@ class PushAgentWizard(ctk.CTk):
         if not k:
             messagebox.showwarning("Missing Key", "Please enter your Gemini API key.")
             return
+        import keyring
         keyring.set_password(KEYRING_SERVICE, KEYRING_USER, k)
-        self.gemini = GeminiService()
+        self.gemini = GeminiService(cache=self.response_cache)
         if self.gemini.client:
             messagebox.showinfo("Saved", "API key saved successfully.")
         else:
             messagebox.showwarning("Warning", "Key saved but could not initialize Gemini client. Check the key.")
         self.show_welcome()
 
+    def _regenerate_commit_message(self):
+        """Bypasses the response cache for the current diff."""
+        self.btn_regenerate.configure(state="disabled", text="Generating...")
+        self.prepare_commit_data(refresh=True)
+
     def _browse(self):
         p = filedialog.askdirectory()
         if p:
@@ -391,6 +694,7 @@ class PushAgentWizard(ctk.CTk):
                 GitService.run(["gh", "repo", "create", name, vis, "--source=.", "--remote=origin"], cwd)
 
                 self.project.load()
+                self.warm.add(self.project)
                 self.queue.put(("PREPARE_COMMIT", None))
             except Exception as e:
                 self.queue.put(("ERROR", f"Repo Creation Failed: {e}"))
@@ -398,6 +702,44 @@ class PushAgentWizard(ctk.CTk):
         self.show_loading()
         threading.Thread(target=_work, daemon=True).start()
 
+    def _speculate_readme(self):
+        """Starts README generation for the current file list unless it is already running."""
+        project = self.project
+        key = (project.path, project.name, "\n".join(project.files))
+        if self._readme_job is None or self._readme_job[0] != key:
+            self._readme_job = (key, self.background.submit(self.gemini.generate_readme, key[2], project.name))
+
+    def _readme_content(self, project):
+        """The speculative README if it was drafted from the same file list, else a fresh one."""
+        key = (project.path, project.name, "\n".join(project.files))
+        job = self._readme_job
+        if job is not None and job[0] == key:
+            return job[1].result()
+        return self.gemini.generate_readme(key[2], project.name)
+
+    def _check_remote(self):
+        """Fetches in the background so divergence is known before Push is clicked."""
+        project = self.project
+        if self._push_engine is None or self._push_engine[0] is not project:
+            self._push_engine = (project, PushEngine(project.path, runner=GitService.run, max_attempts=PUSH_MAX_ATTEMPTS))
+        engine = self._push_engine[1]
+
+        def _report(future):
+            try:
+                divergence = future.result()
+            except Exception as e:
+                text = f"Remote check failed: {str(e)[:60]}"
+            else:
+                if divergence is None:
+                    text = "No upstream yet; the first push will set it."
+                elif divergence.behind:
+                    text = f"{divergence.behind} commit(s) behind {divergence.upstream}; will rebase before pushing."
+                else:
+                    text = f"Up to date with {divergence.upstream}" + (f", {divergence.ahead} ahead." if divergence.ahead else ".")
+            self.queue.put(("REMOTE_STATUS", text))
+
+        engine.prefetch().add_done_callback(_report)
+
     def _run_push(self):
         msg = self.entry_commit.get("0.0", "end").strip()
         if not msg:
@@ -405,46 +747,96 @@ class PushAgentWizard(ctk.CTk):
             return
 
         gen_readme = self.var_readme.get()
-        branch = self.project.branch or "main"
-
-        def _work():
+        project = self.project
+        branch = project.branch or "main"
+        cwd = project.path
+        if self._push_engine is None or self._push_engine[0] is not project:
+            self._check_remote()
+        engine = self._push_engine[1]
+        pipeline = Pipeline(on_progress=lambda p: self.queue.put(("PUSH_PROGRESS", p.describe())))
+
+        def _write_readme():
+            content = self._readme_content(project)
+            readme_path = os.path.join(cwd, "README.md")
+            if os.path.exists(readme_path):
+                shutil.copy2(readme_path, os.path.join(cwd, "README.md.bak"))
+            with open(readme_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+        def _stage():
+            # Always re-stage: edits saved while the message was generated belong in this commit,
+            # and so do the README and its backup, which are written before this step
+            GitService.run(["git", "add", "."], cwd)
+
+        def _commit():
+            if project.refresh_git_state().staged:
+                GitService.run(["git", "commit", "-m", msg], cwd)
+
+        def _remote():
+            # A failed fetch is not fatal here; the push reports the real problem
             try:
-                cwd = self.project.path
-
-                # README generation with backup
-                if gen_readme:
-                    readme_path = os.path.join(cwd, "README.md")
-                    if os.path.exists(readme_path):
-                        backup_path = os.path.join(cwd, "README.md.bak")
-                        shutil.copy2(readme_path, backup_path)
-                    content = self.gemini.generate_readme("\n".join(self.project.files), self.project.name)
-                    with open(readme_path, "w", encoding="utf-8") as f:
-                        f.write(content)
-                    GitService.run(["git", "add", "README.md"], cwd)
-
-                # Stage and commit
-                GitService.run(["git", "add", "."], cwd)
-                if GitService.get_status(cwd):
-                    GitService.run(["git", "commit", "-m", msg], cwd)
-
-                # Push using actual branch name
-                try:
-                    GitService.run(["git", "push", "-u", "origin", branch], cwd)
-                except GitError:
-                    GitService.run(["git", "pull", "--rebase", "origin", branch], cwd)
-                    GitService.run(["git", "push", "-u", "origin", branch], cwd)
+                return engine.prefetch().result()
+            except Exception:
+                return None
 
-                url = GitService.get_remote(cwd)
-                self.queue.put(("SUCCESS", url))
+        def _push():
+            # Rebases first if the fetch showed the branch behind; retries transient failures
+            engine.push(branch)
+            project.refresh_git_state()
 
+        def _work():
+            try:
+                with tracer.span("push", branch=branch, readme=gen_readme) as push_span:
+                    def traced(name, fn):
+                        def step():
+                            with tracer.attach(push_span), tracer.span(name):
+                                return fn()
+                        return step
+
+                    add_push_steps(pipeline, _remote, _stage, _commit, _push,
+                                   write_readme=_write_readme if gen_readme else None, wrap=traced)
+                    pipeline.run()
+
+                self._report_trace(push_span)
+                self.queue.put(("SUCCESS", project.remote_url))
+
+            except PipelineError as e:
+                self.queue.put(("ERROR", f"Push Failed ({e.step}): {e}"))
             except Exception as e:
                 self.queue.put(("ERROR", f"Push Failed: {e}"))
 
-        self.btn_push.configure(state="disabled", text="Pushing...")
+        self.btn_push.configure(state="disabled", text="Starting...")
         threading.Thread(target=_work, daemon=True).start()
 
     # --- INFRASTRUCTURE ---
 
+    def _report_trace(self, span):
+        """
+        Shows the phase breakdown of a finished span on the next wizard screen (and prints it)
+        and saves the trace for chrome://tracing.
+        """
+        if not tracer.enabled:
+            return
+        summary = tracer.summary(root=span)
+        print(f"[PushAgent] Trace:\n{summary}")
+        path = os.path.join(CACHE_DIR, "traces", f"{span.name}-{int(time.time())}.json")
+        try:
+            tracer.export(path)
+            note = f"Trace written to {path}"
+        except OSError as e:
+            note = f"Trace export failed: {e}"
+        print(f"[PushAgent] {note}")
+        self.queue.put(("TRACE", f"{summary}\n{note}"))
+
+    def _show_trace(self):
+        """Read-only panel with the last trace summary; only when tracing is on."""
+        if not tracer.enabled or not self.trace_text:
+            return
+        box = ctk.CTkTextbox(self.container, height=110, font=("Consolas", 10))
+        box.pack(fill="x", pady=5)
+        box.insert("0.0", self.trace_text)
+        box.configure(state="disabled")
+
     def _process_queue(self):
         try:
             while True:
@@ -457,37 +849,74 @@ class PushAgentWizard(ctk.CTk):
                     self.show_commit()
                 elif action == "SUCCESS":
                     self.show_success(payload)
+                elif action == "PUSH_PROGRESS":
+                    if getattr(self, "btn_push", None) is not None and self.btn_push.winfo_exists():
+                        self.btn_push.configure(text=payload)
+                elif action == "TRACE":
+                    # Queued before the SHOW_COMMIT/SUCCESS that renders it
+                    self.trace_text = payload
+                elif action == "REMOTE_STATUS":
+                    if getattr(self, "lbl_remote", None) is not None and self.lbl_remote.winfo_exists():
+                        self.lbl_remote.configure(text=payload)
+                elif action == "API_KEY":
+                    api_key, screen = payload
+                    # Only if that welcome screen is still the one shown
+                    if not api_key and screen.winfo_exists():
+                        self._show_api_input()
                 elif action == "LOAD_PROJECT":
                     self.load_project(payload)
+                elif action == "SHUTDOWN":
+                    self.ipc_server.close()
+                    self.dispatcher.close()
+                    self.destroy()
+                    return
                 elif action == "ERROR":
                     messagebox.showerror("Error", payload)
                     self.show_welcome()
         except queue.Empty:
             pass
-        self.after(100, self._process_queue)
 
-    def _ipc_listener(self):
-        while True:
-            try:
-                conn, _ = self.ipc_socket.accept()
-                data = conn.recv(1024).decode().strip()
-                conn.close()
-                if data == "DETECT":
-                    data = self._get_active_explorer()
-                if data:
-                    # Route through queue for thread safety
-                    self.queue.put(("LOAD_PROJECT", data))
-            except OSError:
-                break
-
-    def _send_ipc(self, msg):
+    def _handle_ipc(self, cmd, message):
+        """Runs on an IPC connection thread; GUI work is routed through the queue."""
+        if cmd == "load":
+            path = message.get("path") or self._get_active_explorer()
+            if not path or not os.path.isdir(path):
+                raise ValueError(f"Not a folder: {path}")
+            self.queue.put(("LOAD_PROJECT", path))
+            return {"path": path}
+        if cmd == "prefetch":
+            path = message.get("path")
+            if not path or not os.path.isdir(path):
+                raise ValueError(f"Not a folder: {path}")
+            threading.Thread(target=self._prefetch, args=(path,), daemon=True).start()
+            return {"path": path}
+        if cmd == "status":
+            return {
+                "pid": os.getpid(),
+                "project": self.project.path if self.project else None,
+                "warm": self.warm.paths(),
+                "warm_stats": dict(self.warm.stats),
+                "ipc_stats": dict(self.ipc_server.stats),
+                "response_cache": self.response_cache.stats(),
+                "llm_routes": self.gemini.router.profiles(),
+                "llm_router_stats": dict(self.gemini.router.stats),
+            }
+        if cmd == "shutdown":
+            self.queue.put(("SHUTDOWN", None))
+            return {}
+
+    def _prefetch(self, path):
+        """Loads a project into the warm set without showing it."""
+        if self.warm.get(path) is not None:
+            self.warm.refresh(path)
+            return
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.connect(('127.0.0.1', IPC_PORT))
-            s.sendall((msg if msg else "DETECT").encode())
-            s.close()
-        except OSError:
-            pass
+            project = ProjectContext(path)
+            project.load()
+            if project.is_git and project.remote_url:
+                self.warm.add(project)
+        except Exception as e:
+            print(f"[PushAgent] Prefetch of {path} failed: {e}")
 
     def _get_active_explorer(self):
         try:
@@ -503,5 +932,5 @@ class PushAgentWizard(ctk.CTk):
 
 if __name__ == "__main__":
     start = sys.argv[1] if len(sys.argv) > 1 else None
-    app = PushAgentWizard(start)
+    app = PushAgentWizard(start, ipc_socket=_instance_socket)
     app.mainloop()
@@ -0,0 +1,571 @@
+"""
+End-to-end benchmarks for PushAgent and the 2.0 pipeline.
+
+Builds a synthetic git repository (with a local bare remote), starts fake Ollama and
+Gemini-compatible HTTP servers with tunable latency, times each stage and prints the
+results as JSON so runs from different versions can be diffed.
+
+    python benchmark.py --files 2000 --depth 4 --latency 0.05 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "2.0"))
+
+# --- FAKE LLM SERVERS ---
+
+def make_gemini_backend(base_url, api_key="bench", max_concurrency=4):
+    """llm_client backend speaking Gemini's REST generateContent, for the fake servers."""
+    import requests
+    from llm_client import Backend, LLMError
+
+    class GeminiRestBackend(Backend):
+        def __init__(self):
+            super().__init__(max_concurrency)
+            self.session = requests.Session()
+
+        def call(self, model, prompt, timeout, options):
+            model_path = model if model.startswith("models/") else f"models/{model}"
+            payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+            if options:
+                payload["generationConfig"] = options
+            try:
+                response = self.session.post(f"{base_url.rstrip('/')}/v1/{model_path}:generateContent",
+                                             headers={"x-goog-api-key": api_key}, json=payload, timeout=timeout)
+                response.raise_for_status()
+                parts = response.json()["candidates"][0]["content"]["parts"]
+                return "".join(part.get("text", "") for part in parts)
+            except (requests.exceptions.RequestException, KeyError, IndexError, ValueError) as e:
+                raise LLMError(f"Gemini API Error: {e}") from e
+
+    return GeminiRestBackend()
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up, e.g. a cancelled or timed-out stream
+            pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+class FakeServer:
+    """Runs a handler on 127.0.0.1 in a daemon thread; counts requests for assertions."""
+    handler = _FakeHandler
+
+    def __init__(self, latency=0.0, token_delay=0.0, tokens=64, fail_rate=0.0, slow_rate=0.0, slow_latency=0.0):
+        self.latency = latency
+        # A slow_rate share of requests waits slow_latency longer, for tail-latency scenarios
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+        handler = type("Handler", (self.handler,), {"server_state": server})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def hit(self):
+        """Records a request and applies the configured latency; returns False to inject a failure."""
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency + (self.slow_latency if random.random() < self.slow_rate else 0.0))
+        return random.random() >= self.fail_rate
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+README_SECTIONS = ("What This Tool Does", "How It Works (Architecture)", "Installation", "How to Run",
+                   "Technologies Used", "Project Structure")
+
+def fake_readme_tokens(prompt, count):
+    """A README split into the sections the prompt asks for; a section rewrite gets one section's worth."""
+    per_section = max(count // len(README_SECTIONS), 1)
+    if "Rewrite ONLY" in prompt:
+        return [f"word{i} " for i in range(per_section)]
+    tokens = ["# Bench\n"]
+    for i in range(count):
+        if i % per_section == 0 and i // per_section < len(README_SECTIONS):
+            tokens.append(f"\n\n## {README_SECTIONS[i // per_section]}\n")
+        tokens.append(f"word{i} ")
+    return tokens
+
+class _OllamaHandler(_FakeHandler):
+    def do_GET(self):
+        state = self.server_state
+        if not state.hit():
+            return self._send_json({"error": "injected failure"}, status=503)
+        if self.path == "/api/tags":
+            return self._send_json({"models": [{"name": "bench:latest"}, {"name": "bench-small:latest"}]})
+        self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        state = self.server_state
+        req = self._read_json()
+        if not state.hit():
+            return self._send_json({"error": "injected failure"}, status=503)
+        words = fake_readme_tokens(req.get("prompt", ""), state.tokens)
+        done = {"done": True, "eval_count": len(words), "eval_duration": int(state.token_delay * len(words) * 1e9)}
+        if not req.get("stream", True):
+            time.sleep(state.token_delay * len(words))
+            return self._send_json(dict(done, response="".join(words)))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            time.sleep(state.token_delay)
+            self._send_chunk((json.dumps({"response": word, "done": False}) + "\n").encode("utf-8"))
+        self._send_chunk((json.dumps(dict(done, response="")) + "\n").encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+
+class FakeOllamaServer(FakeServer):
+    """Serves /api/tags and /api/generate (streaming and non-streaming)."""
+    handler = _OllamaHandler
+
+class _GeminiHandler(_FakeHandler):
+    def do_POST(self):
+        state = self.server_state
+        self._read_json()
+        if not state.hit():
+            return self._send_json({"error": {"code": 503, "message": "injected failure", "status": "UNAVAILABLE"}}, status=503)
+        if ":generateContent" not in self.path:
+            return self._send_json({"error": {"code": 404, "message": "not found"}}, status=404)
+        time.sleep(state.token_delay * state.tokens)
+        self._send_json({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": "Update benchmark fixtures"}]},
+                "finishReason": "STOP"
+            }],
+            "usageMetadata": {"candidatesTokenCount": state.tokens}
+        })
+
+class FakeGeminiServer(FakeServer):
+    """Answers Gemini REST generateContent calls for any model."""
+    handler = _GeminiHandler
+
+# --- SYNTHETIC REPOSITORIES ---
+
+TEXT_KINDS = [
+    (".py", "import os\n\ndef handler_{n}(value):\n    \"\"\"Synthetic function {n}.\"\"\"\n    return value * {n}\n"),
+    (".js", "export function handler{n}(value) {{\n  return value * {n};\n}}\n"),
+    (".md", "# Notes {n}\n\nSynthetic documentation page {n}.\n"),
+    (".json", "{{\"id\": {n}, \"name\": \"fixture-{n}\"}}\n"),
+]
+
+def git(args, cwd):
+    subprocess.run(["git"] + args, cwd=cwd, check=True, capture_output=True)
+
+def make_repo(path, files=500, depth=3, binary_ratio=0.1, commits=3, seed=0):
+    """
+    Creates a repository of `files` files spread over `depth` directory levels, a share of
+    them binary, with `commits` commits of history pushed to a bare remote next to it.
+    Returns (work_tree, bare_remote).
+    """
+    rng = random.Random(seed)
+    work = os.path.join(path, "work")
+    remote = os.path.join(path, "remote.git")
+    os.makedirs(work)
+    git(["init", "-q", "--bare", "-b", "main", remote], path)
+    git(["init", "-q", "-b", "main"], work)
+    git(["config", "user.email", "bench@example.com"], work)
+    git(["config", "user.name", "bench"], work)
+    git(["remote", "add", "origin", remote], work)
+
+    with open(os.path.join(work, "requirements.txt"), "w", encoding="utf-8") as f:
+        f.write("requests\n")
+    with open(os.path.join(work, "app.py"), "w", encoding="utf-8") as f:
+        f.write("from pkg import main\n\nif __name__ == '__main__':\n    main()\n")
+
+    paths = []
+    for n in range(files):
+        parts = [f"dir{rng.randrange(4)}" for _ in range(rng.randrange(depth + 1))]
+        directory = os.path.join(work, *parts)
+        os.makedirs(directory, exist_ok=True)
+        if rng.random() < binary_ratio:
+            file_path = os.path.join(directory, f"blob{n}.bin")
+            with open(file_path, "wb") as f:
+                f.write(rng.randbytes(rng.randrange(512, 8192)))
+        else:
+            ext, template = TEXT_KINDS[n % len(TEXT_KINDS)]
+            file_path = os.path.join(directory, f"file{n}{ext}")
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(template.format(n=n) * rng.randrange(1, 40))
+        paths.append(file_path)
+
+    for i in range(max(commits, 1)):
+        if i:
+            touch_files(paths, rng, count=max(len(paths) // 20, 1))
+        git(["add", "-A"], work)
+        git(["commit", "-q", "-m", f"Synthetic commit {i}"], work)
+    git(["push", "-q", "-u", "origin", "main"], work)
+    return work, remote, paths
+
+def touch_files(paths, rng, count):
+    """Appends a line to `count` random text files to create a realistic working-tree diff."""
+    text_paths = [p for p in paths if not p.endswith(".bin")]
+    for file_path in rng.sample(text_paths, min(count, len(text_paths))):
+        with open(file_path, "a", encoding="utf-8") as f:
+            f.write(f"# touched {rng.random()}\n")
+
+# --- TIMING ---
+
+def measure(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+class Suite:
+    def __init__(self, args):
+        self.args = args
+        self.results = {}
+
+    def bench(self, name, fn, repeat=None, setup=None):
+        if self.args.only and not any(name.startswith(prefix) for prefix in self.args.only):
+            return
+        try:
+            self.results[name] = measure(fn, repeat or self.args.repeat, setup)
+        except ImportError as e:
+            self.results[name] = {"skipped": f"missing dependency: {e.name}"}
+        except Exception as e:
+            self.results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(f"[bench] {name}: {self.results[name]}", file=sys.stderr)
+
+def run_2_0(suite, work, ollama):
+    from analyzer import ProjectAnalyzer
+    from auditor import ProjectAuditor
+    from generator import ReadmeGenerator
+    from readme_cache import ReadmeCache
+
+    cache_dir = tempfile.mkdtemp(prefix="pushagent-bench-cache-")
+    suite.bench("scan_project.cold", lambda: ProjectAnalyzer(use_index=False).scan_project(work))
+    warm = ProjectAnalyzer(cache_dir=cache_dir)
+    warm.scan_project(work)
+    suite.bench("scan_project.warm", lambda: warm.scan_project(work))
+
+    data = ProjectAnalyzer(use_index=False).scan_project(work)
+    suite.bench("audit", lambda: ProjectAuditor().audit(work, data["type"]))
+    audit = ProjectAuditor().audit(work, data["type"])
+
+    generator = ReadmeGenerator(api_url=ollama.url, readme_cache=False)
+    suite.bench("build_prompt", lambda: generator._build_prompt(data, audit))
+    suite.bench("get_models", lambda: generator.get_models(refresh=True))
+    out_dir = tempfile.mkdtemp(prefix="pushagent-bench-out-")
+    suite.bench("generate.blocking", lambda: generator.generate("bench:latest", data, audit, out_dir))
+    suite.bench("generate.stream", lambda: generator.generate("bench:latest", data, audit, out_dir, stream=True))
+    suite.results["generate.http"] = generator.stats()
+
+    # Same prompt again, then one changed module (only its Architecture input moves)
+    readme_cache = ReadmeCache(cache_dir=cache_dir)
+    cached = ReadmeGenerator(api_url=ollama.url, readme_cache=readme_cache)
+    cached.generate("bench:latest", data, audit, out_dir)
+    suite.bench("readme_cache.hit", lambda: cached.generate("bench:latest", data, audit, out_dir))
+    revisions = iter(range(1_000_000))
+    changed = {}
+
+    def change_module():
+        name = sorted(data["summaries"])[0]
+        changed["data"] = dict(data, summaries=dict(data["summaries"], **{name: data["summaries"][name] + f"\ndef bench_{next(revisions)}()"}))
+
+    if data["summaries"]:
+        suite.bench("readme_cache.partial", lambda: cached.generate("bench:latest", changed["data"], audit, out_dir), setup=change_module)
+    suite.results["readme_cache"] = dict(readme_cache.stats, hit_rate=readme_cache.hit_rate())
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+def run_shared(suite, work, paths, remote):
+    from project_state import TreeWatcher, WarmProjects
+    from push_engine import FlakyRunner, PushEngine, run_git
+
+    class _Context:
+        def __init__(self, path):
+            self.path = path
+
+        def apply_changes(self, changes):
+            pass
+
+    rng = random.Random(2)
+    watcher = TreeWatcher(work)
+    suite.bench("watcher.poll.idle", watcher.poll)
+    suite.bench("watcher.poll.changed", watcher.poll, setup=lambda: touch_files(paths, rng, count=5))
+
+    # What a hotkey press on a warm, unchanged project costs before the commit screen renders
+    warm = WarmProjects()
+    warm.add(_Context(work))
+    warm.mark_synced(work, warm.snapshot(work))
+    suite.bench("hotkey.warm_lookup", lambda: warm.get(work) and warm.validate(work) and not warm.is_dirty(work))
+
+    # Push against the bare remote with injected failures: two transient errors, then a
+    # rejection caused by a commit pushed from a second clone
+    other = os.path.join(os.path.dirname(work), "other-clone")
+    subprocess.run(["git", "clone", "-q", remote, other], check=True, capture_output=True)
+    git(["config", "user.email", "bench@example.com"], other)
+    git(["config", "user.name", "Bench"], other)
+    engines = []
+
+    def diverge():
+        touch_files(paths, rng, count=3)
+        git(["commit", "-qam", "Bench local"], work)
+        with open(os.path.join(other, "upstream.txt"), "a", encoding="utf-8") as f:
+            f.write(f"{rng.random()}\n")
+        git(["add", "."], other)
+        git(["commit", "-qm", "Bench upstream"], other)
+        git(["pull", "-q", "--rebase", "origin", "main"], other)
+        git(["push", "-q", "origin", "main"], other)
+
+    def flaky_push():
+        runner = FlakyRunner(run_git, {"push": [
+            "fatal: unable to access 'https://example.invalid/': Could not resolve host: example.invalid",
+            "error: RPC failed; HTTP 502 curl 22 The requested URL returned error: 502",
+        ]})
+        engine = PushEngine(work, runner=runner, sleep=lambda seconds: None)
+        engine.push("main")
+        engines.append(engine)
+
+    suite.bench("push_engine.flaky_diverged", flaky_push, setup=diverge)
+    suite.results["push_engine.log"] = [list(entry) for entry in engines[-1].log] if engines else []
+
+def run_router(suite, server_args):
+    from llm_client import SyncLLMClient
+    from llm_router import LLMRouter
+
+    args = dict(server_args, tokens=8)
+    with FakeGeminiServer(**args, fail_rate=1.0) as down, FakeGeminiServer(**args) as steady, \
+            FakeGeminiServer(**args, slow_rate=0.1, slow_latency=0.5) as tail_a, \
+            FakeGeminiServer(**args, slow_rate=0.1, slow_latency=0.5) as tail_b:
+        client = SyncLLMClient()
+        for name, server in (("down", down), ("steady", steady), ("tail_a", tail_a), ("tail_b", tail_b)):
+            client.register(name, make_gemini_backend(server.url, max_concurrency=8))
+
+        # A provider that only returns 503s is benched after a few failures
+        router = LLMRouter(client=client, cooldown=60.0)
+        routes = [("down", "bench"), ("steady", "bench")]
+        suite.bench("router.failover", lambda: router.generate(routes, "Write a commit message", timeout=5), repeat=10)
+        suite.results["router.failover_profiles"] = router.profiles()
+
+        # Two providers with a 10% tail: once the first has a few samples, hedging after its
+        # p90 latency cuts the mean and max
+        for hedge in (False, True):
+            router = LLMRouter(client=client)
+            routes = [("tail_a", "bench"), ("tail_b", "bench")]
+            name = "router.hedged" if hedge else "router.unhedged"
+            suite.bench(name, lambda: router.generate(routes, "Write a commit message", timeout=5, hedge=hedge), repeat=40)
+            suite.results[f"{name}_stats"] = dict(router.stats)
+
+def monorepo_paths(count, seed=0):
+    """Synthetic monorepo listing: packages of modules, tests and assets at varying depths."""
+    rng = random.Random(seed)
+    exts = (".py", ".py", ".ts", ".tsx", ".json", ".md", ".png", ".go")
+    for i in range(count):
+        parts = [f"pkg{rng.randrange(40)}"] + [f"mod{rng.randrange(6)}" for _ in range(rng.randrange(1, 4))]
+        yield "/".join(parts) + f"/file{i}{rng.choice(exts)}"
+
+def run_tree(suite, count):
+    from packer import PromptPacker
+    from tree_model import FileTree
+
+    def build():
+        tree = FileTree()
+        for path in monorepo_paths(count):
+            tree.add(path, 1024)
+        return tree
+
+    suite.bench("tree.build", build, repeat=1)
+    tracemalloc.start()
+    tree = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    packer = PromptPacker()
+    # A quarter of the default 4000-token budget, as generate() gives the tree
+    suite.bench("tree.pack", lambda: packer._pack_tree(tree, 1000))
+    suite.bench("tree.render.outline", lambda: tree.render(depth=2, files_per_dir=5, indent=True))
+    text, depth = packer._pack_tree(tree, 1000)
+    suite.results["tree_model"] = dict(tree.stats(), build_peak_bytes=peak, packed_chars=len(text), packed_depth=depth)
+
+def run_startup(suite, work):
+    import importlib.util
+    import socket
+    from ipc import IPCServer
+
+    def python(*args, env=None):
+        result = subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode)
+
+    suite.bench("startup.interpreter", lambda: python("-c", "pass"))
+
+    # A second hotkey press: agent_gui.py finds the port taken and forwards its folder to a
+    # stand-in instance, without importing the GUI toolkit or the Gemini SDK
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(8)
+    loads = []
+    server = IPCServer(sock, lambda cmd, message: loads.append(message.get("path")), debounce=0)
+    server.start()
+    env = dict(os.environ, PUSHAGENT_IPC_PORT=str(sock.getsockname()[1]))
+    try:
+        suite.bench("startup.handoff", lambda: python(os.path.join(ROOT, "agent_gui.py"), work, env=env))
+    finally:
+        server.close()
+    suite.results["startup.handoff_loads"] = len(loads)
+
+    # What the first press pays for imports before the window can be built
+    if all(importlib.util.find_spec(name) for name in ("customtkinter", "keyring")):
+        suite.bench("startup.import_gui", lambda: python("-c", "import agent_gui"))
+    else:
+        suite.results["startup.import_gui"] = {"skipped": "missing dependency: customtkinter/keyring"}
+
+def run_wizard(suite, work, paths, gemini):
+    import agent_gui
+    from agent_gui import GeminiService, ProjectContext
+    from git_service import GitService, StagedDiff
+    from response_cache import ResponseCache
+
+    rng = random.Random(1)
+    suite.bench("project_context.load", lambda: ProjectContext(work).load())
+
+    cache = ResponseCache(os.path.join(tempfile.mkdtemp(prefix="pushagent-bench-cache-"), "responses.json"))
+    service = GeminiService(cache=cache, api_key="bench", base_url=gemini.url)
+
+    def commit_message(refresh):
+        GitService.run(["git", "add", "."], work)
+        service.generate_commit_message_for_diff(StagedDiff.read(work), refresh=refresh)
+
+    touch_files(paths, rng, count=max(len(paths) // 10, 1))
+    suite.bench("commit_message.uncached", lambda: commit_message(True))
+    suite.bench("commit_message.cached", lambda: commit_message(False))
+
+    def push():
+        # Mirrors the non-GUI part of PushAgentWizard._run_push
+        GitService.run(["git", "add", "."], work)
+        if GitService.probe(work).has_changes:
+            GitService.run(["git", "commit", "-m", "Bench commit"], work)
+        GitService.run(["git", "push", "-u", "origin", "main"], work)
+
+    suite.bench("push", push, setup=lambda: touch_files(paths, rng, count=5))
+    suite.results["response_cache"] = cache.stats()
+    suite.results["gemini_model"] = agent_gui.GEMINI_MODEL
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--binary-ratio", type=float, default=0.1)
+    parser.add_argument("--commits", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds before a fake LLM responds")
+    parser.add_argument("--token-delay", type=float, default=0.001, help="Seconds per generated token")
+    parser.add_argument("--tokens", type=int, default=64)
+    parser.add_argument("--tree-files", type=int, default=100000, help="Paths in the synthetic monorepo tree benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="Only run benchmarks whose name starts with one of these")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic repository")
+    args = parser.parse_args(argv)
+
+    workspace = tempfile.mkdtemp(prefix="pushagent-bench-")
+    os.environ.setdefault("PUSHAGENT_CACHE_DIR", os.path.join(workspace, "cache"))
+    suite = Suite(args)
+    started = time.perf_counter()
+    try:
+        work, remote, paths = make_repo(workspace, args.files, args.depth, args.binary_ratio, args.commits, args.seed)
+        server_args = dict(latency=args.latency, token_delay=args.token_delay, tokens=args.tokens)
+        with FakeOllamaServer(**server_args) as ollama, FakeGeminiServer(**server_args) as gemini:
+            runners = ((run_2_0, (work, ollama)), (run_shared, (work, paths, remote)),
+                       (run_router, (server_args,)), (run_tree, (args.tree_files,)), (run_startup, (work,)),
+                       (run_wizard, (work, paths, gemini)))
+            for runner, runner_args in runners:
+                try:
+                    runner(suite, *runner_args)
+                except ImportError as e:
+                    suite.results[runner.__name__] = {"skipped": f"missing dependency: {e.name}"}
+    finally:
+        if not args.keep:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        revision = None
+
+    report = {
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": vars(args),
+        "total_seconds": time.perf_counter() - started,
+        "results": suite.results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
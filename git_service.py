@@ -0,0 +1,360 @@
+"""
+Git plumbing shared by PushAgent's wizard: running and streaming git, the typed status
+snapshot parsed from `git status --porcelain=v2`, and the staged diff broken into hunks
+and budgeted for commit-message prompts.
+"""
+import hashlib
+import os
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+from tracing import tracer
+
+DIFF_BUDGET_BYTES = 12000           # Diff text sent with a single commit-message prompt
+DIFF_FILE_CAP_BYTES = 8000          # Hunk text kept in memory per file while streaming
+DIFF_HUNK_MAX_LINES = 40
+DIFF_MAX_CHUNKS = 6
+
+class GitError(Exception):
+    """Raised when a git command fails."""
+    pass
+
+StatusEntry = namedtuple("StatusEntry", "kind xy path orig_path")
+
+class GitState:
+    """Typed snapshot parsed from one `git status --porcelain=v2 --branch -z` call."""
+    def __init__(self):
+        self.oid = None
+        self.branch = None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        self.entries = []
+
+    @property
+    def has_changes(self):
+        return bool(self.entries)
+
+    @property
+    def staged(self):
+        return [e for e in self.entries if e.kind in ("1", "2") and e.xy[0] != "."]
+
+    @property
+    def unstaged(self):
+        return [e for e in self.entries if e.kind in ("1", "2") and e.xy[1] != "."]
+
+    @property
+    def untracked(self):
+        return [e for e in self.entries if e.kind == "?"]
+
+    @property
+    def conflicted(self):
+        return [e for e in self.entries if e.kind == "u"]
+
+    @classmethod
+    def parse(cls, output):
+        state = cls()
+        records = output.split("\0")
+        i = 0
+        while i < len(records):
+            record = records[i]
+            i += 1
+            if not record:
+                continue
+            if record.startswith("# "):
+                key, _, value = record[2:].partition(" ")
+                if key == "branch.oid":
+                    state.oid = None if value == "(initial)" else value
+                elif key == "branch.head":
+                    state.branch = None if value == "(detached)" else value
+                elif key == "branch.upstream":
+                    state.upstream = value
+                elif key == "branch.ab":
+                    ahead, behind = value.split()
+                    state.ahead, state.behind = int(ahead), abs(int(behind))
+                continue
+
+            kind = record[0]
+            if kind == "1":
+                fields = record.split(" ", 8)
+                state.entries.append(StatusEntry(kind, fields[1], fields[8], None))
+            elif kind == "2":
+                # Renames/copies are followed by a separate NUL-terminated original path
+                fields = record.split(" ", 9)
+                orig = records[i] if i < len(records) else None
+                i += 1
+                state.entries.append(StatusEntry(kind, fields[1], fields[9], orig))
+            elif kind == "u":
+                fields = record.split(" ", 10)
+                state.entries.append(StatusEntry(kind, fields[1], fields[10], None))
+            elif kind == "?":
+                state.entries.append(StatusEntry(kind, "??", record[2:], None))
+        return state
+
+DiffHunk = namedtuple("DiffHunk", "header text")
+
+class FileDiff:
+    """Per-file slice of a staged diff; only the first DIFF_FILE_CAP_BYTES of hunk text is kept."""
+    LOW_SIGNAL_SUFFIXES = (".lock", "-lock.json", ".min.js", ".min.css", ".map", ".svg", ".snap")
+
+    def __init__(self, path):
+        self.path = path
+        self.hunks = []
+        self.added = 0
+        self.removed = 0
+        self.binary = False
+        self.kept_bytes = 0
+        self.dropped_hunks = 0
+
+    @property
+    def score(self):
+        if self.binary or self.path.endswith(self.LOW_SIGNAL_SUFFIXES):
+            return 0
+        return 1 + min(self.added + self.removed, 200)
+
+    def stat_line(self):
+        if self.binary:
+            return f"{self.path} | binary"
+        return f"{self.path} | +{self.added} -{self.removed}"
+
+class StagedDiff:
+    """
+    `git diff --staged` parsed hunk by hunk from a streamed subprocess.
+    Memory stays bounded by DIFF_FILE_CAP_BYTES per file regardless of commit size.
+    """
+    def __init__(self):
+        self.files = []
+        self.total_bytes = 0
+        self.digest = None
+
+    @classmethod
+    def read(cls, cwd, file_cap=DIFF_FILE_CAP_BYTES):
+        args = ["git", "diff", "--staged", "--no-color", "--no-ext-diff"]
+        return cls.parse(GitService.stream(args, cwd), file_cap)
+
+    @classmethod
+    def parse(cls, lines, file_cap=DIFF_FILE_CAP_BYTES, hunk_max_lines=DIFF_HUNK_MAX_LINES):
+        """Builds the diff from an iterable of `git diff` output lines."""
+        diff = cls()
+        sha = hashlib.sha256()
+        current = None
+        hunk_header = None
+        hunk_lines = []
+        hunk_line_count = 0
+
+        def flush_hunk():
+            if current is None or hunk_header is None:
+                return
+            text = "\n".join(hunk_lines)
+            if hunk_line_count > len(hunk_lines):
+                text += f"\n... {hunk_line_count - len(hunk_lines)} more lines"
+            if current.kept_bytes + len(text) > file_cap:
+                current.dropped_hunks += 1
+                return
+            current.hunks.append(DiffHunk(hunk_header, text))
+            current.kept_bytes += len(text)
+
+        for line in lines:
+            sha.update(line.encode("utf-8", "replace"))
+            diff.total_bytes += len(line)
+            line = line.rstrip("\n")
+            if line.startswith("diff --git "):
+                flush_hunk()
+                hunk_header = None
+                current = FileDiff(line.rsplit(" b/", 1)[-1])
+                diff.files.append(current)
+            elif current is None:
+                continue
+            elif line.startswith("@@"):
+                flush_hunk()
+                hunk_header = line
+                hunk_lines = []
+                hunk_line_count = 0
+            elif hunk_header is None:
+                if line.startswith("+++ b/"):
+                    current.path = line[6:].rstrip("\t")
+                elif line.startswith("Binary files"):
+                    current.binary = True
+            else:
+                if line.startswith("+"):
+                    current.added += 1
+                elif line.startswith("-"):
+                    current.removed += 1
+                hunk_line_count += 1
+                if len(hunk_lines) < hunk_max_lines:
+                    hunk_lines.append(line)
+        flush_hunk()
+        diff.digest = sha.hexdigest()
+        return diff
+
+    def ranked_files(self):
+        return sorted(self.files, key=lambda f: (-f.score, f.path))
+
+    def stat(self, files=None):
+        """`git diff --stat`-like summary of the given files (all files by default)."""
+        files = self.ranked_files() if files is None else files
+        added = sum(f.added for f in files)
+        removed = sum(f.removed for f in files)
+        lines = [f"{len(files)} files changed, +{added} -{removed}"]
+        lines.extend(f.stat_line() for f in files)
+        return "\n".join(lines)
+
+    def render(self, budget=DIFF_BUDGET_BYTES, files=None):
+        """
+        A stat header for every file, then hunks breadth-first (each file's first hunk before
+        any file's second) in file-rank order until the byte budget is spent.
+        """
+        files = self.ranked_files() if files is None else files
+        parts = [self.stat(files)]
+        used = len(parts[0])
+
+        omitted = sum(f.dropped_hunks for f in files)
+        depth = max((len(f.hunks) for f in files), default=0)
+        for i in range(depth):
+            for f in files:
+                if i >= len(f.hunks) or f.score == 0:
+                    continue
+                hunk = f.hunks[i]
+                block = f"\n--- {f.path}\n{hunk.header}\n{hunk.text}"
+                if used + len(block) > budget:
+                    omitted += 1
+                    continue
+                parts.append(block)
+                used += len(block)
+        if omitted:
+            parts.append(f"\n({omitted} hunks omitted)")
+        return "\n".join(parts)
+
+    def chunks(self, max_chunks=DIFF_MAX_CHUNKS, budget=DIFF_BUDGET_BYTES):
+        """
+        Groups ranked files into at most max_chunks lists of roughly `budget` bytes each,
+        for the map step of map-reduce summarization. Files past the last chunk are only
+        covered by the stat header of the reduce prompt.
+        """
+        groups = [[]]
+        size = 0
+        for f in self.ranked_files():
+            if f.score == 0:
+                continue
+            cost = f.kept_bytes + len(f.stat_line())
+            if groups[-1] and size + cost > budget:
+                if len(groups) == max_chunks:
+                    break
+                groups.append([])
+                size = 0
+            groups[-1].append(f)
+            size += cost
+        return [group for group in groups if group]
+
+class GitService:
+    @staticmethod
+    def _env(read_only=False):
+        env = os.environ.copy()
+        env["GIT_TERMINAL_PROMPT"] = "0"
+        if read_only:
+            # Status and diff would otherwise refresh the index under index.lock, racing the
+            # user's git and our own add/commit while the watcher probes in the background
+            env["GIT_OPTIONAL_LOCKS"] = "0"
+        return env
+
+    @staticmethod
+    def run(args, cwd, strip=True, read_only=False):
+        with tracer.span(" ".join(args[:2]), cmd=" ".join(args)) as span:
+            try:
+                result = subprocess.run(
+                    args, cwd=cwd, env=GitService._env(read_only),
+                    capture_output=True, text=True, check=True,
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+                )
+                span.set(exit_code=0, stdout_bytes=len(result.stdout))
+                return result.stdout.strip() if strip else result.stdout
+            except subprocess.CalledProcessError as e:
+                span.set(exit_code=e.returncode, stdout_bytes=len(e.stdout or ""), stderr_bytes=len(e.stderr or ""))
+                raise GitError(e.stderr.strip() or e.stdout.strip())
+
+    @staticmethod
+    def stream(args, cwd):
+        """Yields stdout lines as git produces them instead of buffering the whole output."""
+        span = tracer.span(" ".join(args[:2]), cmd=" ".join(args))
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            args, cwd=cwd, env=GitService._env(),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace",
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        # Drained concurrently: git blocks once a full pipe buffer of warnings is unread
+        stderr_parts = []
+        stderr_reader = threading.Thread(target=lambda: stderr_parts.append(proc.stderr.read()), daemon=True)
+        stderr_reader.start()
+        stdout_bytes = 0
+        try:
+            for line in proc.stdout:
+                stdout_bytes += len(line)
+                yield line
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+            stderr_reader.join()
+            proc.stderr.close()
+            stderr = "".join(stderr_parts)
+            # A generator can be suspended across the caller's own spans, so this one is
+            # recorded after the fact rather than held open as a context manager
+            span.set(exit_code=returncode, stdout_bytes=stdout_bytes)
+            tracer.record(span, started)
+        if returncode != 0:
+            raise GitError(stderr.strip() or f"{' '.join(args)} exited with {returncode}")
+
+    @staticmethod
+    def probe(cwd):
+        """Branch, upstream, ahead/behind and change entries in a single git process."""
+        output = GitService.run(["git", "status", "--porcelain=v2", "--branch", "-z"], cwd, strip=False, read_only=True)
+        return GitState.parse(output)
+
+    @staticmethod
+    def read_remote_url(cwd, remote="origin"):
+        """
+        Reads the remote URL straight from .git/config to avoid spawning git.
+        Falls back to `git remote get-url` when .git is not a plain directory (worktrees, submodules).
+        """
+        config_path = os.path.join(cwd, ".git", "config")
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return GitService.get_remote(cwd)
+
+        section = None
+        for line in lines:
+            line = line.strip()
+            if line.startswith("["):
+                section = line
+                continue
+            key, _, value = line.partition("=")
+            if section == f'[remote "{remote}"]' and key.strip().lower() == "url":
+                return value.strip().strip('"')
+        return None
+
+    @staticmethod
+    def get_status(cwd):
+        return GitService.run(["git", "status", "--porcelain"], cwd, read_only=True)
+
+    @staticmethod
+    def get_diff(cwd):
+        return GitService.run(["git", "diff", "--staged", "--stat"], cwd, read_only=True) or "No changes staged."
+
+    @staticmethod
+    def get_remote(cwd):
+        try:
+            return GitService.run(["git", "remote", "get-url", "origin"], cwd)
+        except GitError:
+            return None
+
+    @staticmethod
+    def get_branch(cwd):
+        try:
+            return GitService.run(["git", "branch", "--show-current"], cwd)
+        except GitError:
+            return "main"
@@ -0,0 +1,194 @@
+"""
+.gitignore handling shared by PushAgent's file listing and the 2.0 analyzer.
+
+IgnoreMatcher compiles the rules git itself would apply: the global excludes file,
+.git/info/exclude, and every .gitignore from the project root down to a path's directory
+(nested ones are read lazily, once). Walkers ask it about each directory before descending,
+so ignored trees like build/ or .tox/ are never listed at all.
+
+When a git checkout is available, tracked_files() asks git for the same listing directly.
+"""
+import functools
+import os
+import re
+import subprocess
+
+class _Rule:
+    __slots__ = ("regex", "negate", "dir_only", "basename")
+
+    def __init__(self, regex, negate, dir_only, basename):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        # Patterns without a slash match the name at any depth; others the path from the .gitignore
+        self.basename = basename
+
+def _translate(pattern):
+    """Converts one gitignore glob into a regex body; '*' and '?' never cross '/'."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            j = i
+            while j < n and pattern[j] == "*":
+                j += 1
+            at_segment_start = i == 0 or pattern[i - 1] == "/"
+            if j - i >= 2 and at_segment_start and j < n and pattern[j] == "/":
+                out.append("(?:.*/)?")   # "**/" : zero or more directories
+                i = j + 1
+                continue
+            if j - i >= 2 and at_segment_start and j == n:
+                out.append(".*")         # trailing "/**" : everything inside
+            else:
+                out.append("[^/]*")
+            i = j
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+def parse_rules(lines):
+    """Compiles gitignore lines into rules, skipping blanks and comments."""
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    rules = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        # Trailing spaces are ignored unless escaped
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        basename = "/" not in line
+        line = line.lstrip("/")
+        rules.append(_Rule(re.compile(_translate(line) + r"\Z", flags), negate, dir_only, basename))
+    return rules
+
+def read_rules(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return parse_rules(f)
+    except OSError:
+        return []
+
+@functools.lru_cache(maxsize=1)
+def global_excludes_path():
+    """core.excludesFile, falling back to git's default $XDG_CONFIG_HOME/git/ignore."""
+    try:
+        result = subprocess.run(
+            ["git", "config", "--global", "--path", "--get", "core.excludesFile"],
+            capture_output=True, text=True, timeout=5,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return os.path.expanduser(result.stdout.strip())
+    except (OSError, subprocess.SubprocessError):
+        pass
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(config_home, "git", "ignore")
+
+def _git_dir(root):
+    """The repository's git dir; handles worktrees/submodules where .git is a 'gitdir:' file."""
+    dot_git = os.path.join(root, ".git")
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git, "r", encoding="utf-8") as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if line.startswith("gitdir:"):
+            return os.path.normpath(os.path.join(root, line[len("gitdir:"):].strip()))
+        return None
+    return dot_git if os.path.isdir(dot_git) else None
+
+def _common_dir(git_dir):
+    """Where refs, config and info/ live: a linked worktree's git dir points there through 'commondir'."""
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            return os.path.normpath(os.path.join(git_dir, f.readline().strip()))
+    except OSError:
+        return git_dir
+
+class IgnoreMatcher:
+    """
+    Answers "would git ignore this path?" for paths relative to root.
+    Directories are expected to be pruned by the caller, as git does not look inside an
+    ignored directory (so a file in one cannot be re-included by a negated pattern).
+    """
+    def __init__(self, root, global_excludes=True):
+        self.root = str(root)
+        base = []
+        if global_excludes:
+            base += read_rules(global_excludes_path())
+        git_dir = _git_dir(self.root)
+        if git_dir:
+            base += read_rules(os.path.join(_common_dir(git_dir), "info", "exclude"))
+        # Rules per directory (relative, "/"-separated, "" for the root) in precedence order
+        self._levels = {"": base + read_rules(os.path.join(self.root, ".gitignore"))}
+
+    def _rules_for(self, rel_dir):
+        rules = self._levels.get(rel_dir)
+        if rules is None:
+            rules = self._levels[rel_dir] = read_rules(os.path.join(self.root, rel_dir, ".gitignore"))
+        return rules
+
+    def ignored(self, rel_path, is_dir=False):
+        if os.sep != "/":
+            rel_path = rel_path.replace(os.sep, "/")
+        parts = rel_path.split("/")
+        name = parts[-1]
+        # Deepest .gitignore first; within a file the last matching pattern wins
+        for depth in range(len(parts) - 1, -1, -1):
+            rel_dir = "/".join(parts[:depth])
+            sub_path = "/".join(parts[depth:])
+            for rule in reversed(self._rules_for(rel_dir)):
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.regex.match(name if rule.basename else sub_path):
+                    return not rule.negate
+        return False
+
+def tracked_files(root):
+    """
+    Tracked plus untracked-but-not-ignored files, straight from git, as "/"-separated paths.
+    Returns None when root is not a git checkout or git is unavailable.
+    """
+    if _git_dir(str(root)) is None:
+        return None
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+            cwd=str(root), capture_output=True, timeout=60,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    # Unmerged paths are listed once per stage
+    paths = dict.fromkeys(p for p in result.stdout.decode("utf-8", errors="surrogateescape").split("\0") if p)
+    return list(paths)
@@ -0,0 +1,225 @@
+"""
+Single-instance IPC for PushAgent.
+
+Messages are JSON objects framed with a 4-byte big-endian length. A client sends
+{"id": n, "cmd": ..., ...} and gets back {"id": n, "ok": true, ...} or
+{"id": n, "ok": false, "error": ...}; one connection may carry any number of requests.
+Every connection is served on its own thread, and repeated load/prefetch requests for the
+same path within the debounce window are acknowledged without being dispatched again.
+
+    with IPCClient(IPC_PORT) as client:
+        client.load(r"C:\\src\\project")
+"""
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+DEFAULT_HOST = "127.0.0.1"
+MAX_FRAME = 1024 * 1024
+COMMANDS = ("load", "prefetch", "status", "shutdown")
+_HEADER = struct.Struct(">I")
+
+class IPCError(Exception):
+    """Raised when the other side is unreachable or breaks the protocol."""
+    pass
+
+class LegacyMessage(Exception):
+    """Raised when the peer sent a pre-framing raw payload instead of a frame."""
+    def __init__(self, data):
+        super().__init__("unframed message")
+        self.data = data
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def send_frame(sock, message):
+    data = json.dumps(message).encode("utf-8")
+    if len(data) > MAX_FRAME:
+        raise IPCError(f"Message of {len(data)} bytes exceeds the {MAX_FRAME} byte limit")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+def recv_frame(sock):
+    """Returns the next message, or None when the peer closed the connection."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME:
+        # Older clients wrote the raw path (or "DETECT") and closed; no real frame is this large
+        rest = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            rest.append(chunk)
+        raise LegacyMessage(header + b"".join(rest))
+    data = _recv_exact(sock, size)
+    if data is None:
+        raise IPCError("Connection closed mid-frame")
+    try:
+        message = json.loads(data.decode("utf-8"))
+    except ValueError as e:
+        raise IPCError(f"Invalid JSON frame: {e}")
+    if not isinstance(message, dict):
+        raise IPCError("Frame is not a JSON object")
+    return message
+
+class IPCServer:
+    """
+    Serves framed requests on an already bound, listening socket.
+    handler(cmd, message) runs on the connection's thread and returns a dict merged into the ack.
+    """
+    def __init__(self, sock, handler, debounce=1.0, coalesce=("load", "prefetch")):
+        self.sock = sock
+        self.handler = handler
+        self.debounce = debounce
+        self.coalesce = set(coalesce)
+        self._recent = {}
+        self._lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "coalesced": 0, "errors": 0}
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="ipc-accept", daemon=True).start()
+
+    def serve_forever(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            self.stats["connections"] += 1
+            threading.Thread(target=self._serve, args=(conn,), name="ipc-conn", daemon=True).start()
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = recv_frame(conn)
+                except LegacyMessage as legacy:
+                    text = legacy.data.decode("utf-8", errors="replace").strip()
+                    self.dispatch({"cmd": "load", "path": None if text == "DETECT" else text})
+                    return
+                except (IPCError, OSError):
+                    self.stats["errors"] += 1
+                    return
+                if message is None:
+                    return
+                try:
+                    send_frame(conn, self.dispatch(message))
+                except (IPCError, OSError):
+                    self.stats["errors"] += 1
+                    return
+
+    @staticmethod
+    def _debounce_key(cmd, path):
+        return (cmd, os.path.normcase(os.path.abspath(path)) if path else None)
+
+    def _is_duplicate(self, key):
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, t in self._recent.items() if now - t > self.debounce]:
+                del self._recent[stale]
+            if key in self._recent:
+                return True
+            self._recent[key] = now
+            return False
+
+    def dispatch(self, message):
+        """Handles one request and returns its acknowledgement."""
+        self.stats["requests"] += 1
+        cmd = message.get("cmd")
+        ack = {"id": message.get("id"), "cmd": cmd}
+        if cmd not in COMMANDS:
+            ack.update(ok=False, error=f"Unknown command: {cmd!r}")
+            return ack
+        key = self._debounce_key(cmd, message.get("path")) if cmd in self.coalesce else None
+        if key is not None and self._is_duplicate(key):
+            self.stats["coalesced"] += 1
+            ack.update(ok=True, coalesced=True)
+            return ack
+        try:
+            ack.update(self.handler(cmd, message) or {})
+            ack.setdefault("ok", True)
+        except Exception as e:
+            self.stats["errors"] += 1
+            ack.update(ok=False, error=str(e))
+            if key is not None:
+                # A rejected request must not swallow a corrected retry
+                with self._lock:
+                    self._recent.pop(key, None)
+        return ack
+
+class IPCClient:
+    """Blocking client for a running PushAgent instance."""
+    def __init__(self, port, host=DEFAULT_HOST, timeout=5.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._sock = None
+        self._ids = 0
+
+    def connect(self):
+        if self._sock is None:
+            try:
+                self._sock = socket.create_connection(self.address, timeout=self.timeout)
+            except OSError as e:
+                raise IPCError(f"PushAgent is not reachable on port {self.address[1]}: {e}")
+        return self
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def request(self, cmd, **args):
+        """Sends one command and returns its acknowledgement; raises IPCError if it failed."""
+        self.connect()
+        self._ids += 1
+        try:
+            send_frame(self._sock, dict(args, id=self._ids, cmd=cmd))
+            ack = recv_frame(self._sock)
+        except (OSError, LegacyMessage) as e:
+            self.close()
+            raise IPCError(f"IPC request {cmd!r} failed: {e}")
+        if ack is None:
+            self.close()
+            raise IPCError(f"Connection closed before {cmd!r} was acknowledged")
+        if not ack.get("ok"):
+            raise IPCError(ack.get("error") or f"{cmd!r} was rejected")
+        return ack
+
+    def load(self, path=None):
+        """Shows a project; without a path, the instance uses the active Explorer window."""
+        return self.request("load", path=path)
+
+    def prefetch(self, path):
+        """Loads a project in the background so a later load is instant."""
+        return self.request("prefetch", path=path)
+
+    def status(self):
+        return self.request("status")
+
+    def shutdown(self):
+        return self.request("shutdown")
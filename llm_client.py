@@ -0,0 +1,216 @@
+"""
+Asyncio client layer shared by PushAgent (Gemini) and the 2.0 README generator (Ollama).
+
+Each registered backend gets its own concurrency limit, identical in-flight requests are
+coalesced into one call, and every request can carry a deadline. The blocking HTTP/SDK call
+itself runs in a worker thread; the remaining deadline is passed down as its timeout so a
+request that is given up on does not keep a connection busy much longer. A thread cannot be
+interrupted, so its concurrency slot stays taken until the call actually returns, even when
+the request was cancelled or timed out.
+
+Tk code uses the SyncLLMClient facade, which runs the event loop on a daemon thread.
+"""
+import abc
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class LLMError(Exception):
+    """Raised when a backend call fails."""
+    pass
+
+class DeadlineExceeded(LLMError):
+    """Raised when a request did not finish before its deadline."""
+    pass
+
+class Backend(abc.ABC):
+    """Base class; subclasses implement call(model, prompt, timeout, options) -> text."""
+    def __init__(self, max_concurrency=2):
+        self.max_concurrency = max_concurrency
+        # Slots are only touched from the client's event loop thread
+        self._held = 0
+        self._waiters = deque()
+        self.stats = {"requests": 0, "coalesced": 0, "in_flight": 0, "max_in_flight": 0,
+                      "errors": 0, "deadline_exceeded": 0, "cancelled": 0}
+
+    async def acquire(self):
+        """Waits for one of max_concurrency slots."""
+        if self._held < self.max_concurrency and not self._waiters:
+            self._held += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait was given up
+                self.release()
+            raise
+
+    def release(self):
+        self._held -= 1
+        # max_concurrency may have grown (adopt()), so several waiters can be let in
+        while self._waiters and self._held < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._held += 1
+                waiter.set_result(None)
+
+    def adopt(self, other):
+        """Takes over the settings of another backend registered under the same name."""
+        self.max_concurrency = other.max_concurrency
+
+    @abc.abstractmethod
+    def call(self, model, prompt, timeout, options):
+        """Blocking request on a worker thread; returns the text or raises LLMError."""
+
+class OllamaBackend(Backend):
+    """Non-streaming /api/generate over a (pooled) requests session."""
+    def __init__(self, base_url, session=None, max_concurrency=2):
+        super().__init__(max_concurrency)
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = session or requests.Session()
+
+    def adopt(self, other):
+        super().adopt(other)
+        self.session = other.session
+
+    def call(self, model, prompt, timeout, options):
+        import requests
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        try:
+            response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=timeout)
+            response.raise_for_status()
+            return response.json().get("response", "")
+        except requests.exceptions.RequestException as e:
+            raise LLMError(f"Ollama API Error: {e}") from e
+
+class CallableBackend(Backend):
+    """Wraps any blocking fn(model, prompt, timeout, options) -> text, e.g. an SDK client call."""
+    def __init__(self, fn, max_concurrency=2):
+        super().__init__(max_concurrency)
+        self.fn = fn
+
+    def call(self, model, prompt, timeout, options):
+        return self.fn(model, prompt, timeout, options)
+
+class AsyncLLMClient:
+    def __init__(self, max_threads=32):
+        self.backends = {}
+        self._inflight = {}
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="llm-call")
+
+    def register(self, name, backend, replace=True):
+        """
+        Adds a backend. With replace=False an existing one under the same name is kept, so its
+        requests stay under one limit, but it adopts the newcomer's settings (concurrency,
+        session).
+        """
+        existing = self.backends.get(name)
+        if replace or existing is None:
+            self.backends[name] = backend
+        elif existing is not backend:
+            existing.adopt(backend)
+        return self.backends[name]
+
+    async def generate(self, backend_name, model, prompt, timeout=None, options=None):
+        """
+        Returns the completion text. Identical (backend, model, prompt, options) requests that
+        are already in flight share one call; the shared call is cancelled only when every
+        waiter has gone away.
+        """
+        backend = self.backends[backend_name]
+        key = (backend_name, model, prompt, repr(sorted((options or {}).items())))
+        entry = self._inflight.get(key)
+        if entry is None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            task = asyncio.ensure_future(self._run(backend, model, prompt, deadline, options))
+            entry = self._inflight[key] = {"task": task, "waiters": 0}
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            backend.stats["coalesced"] += 1
+
+        entry["waiters"] += 1
+        try:
+            if timeout is None:
+                return await asyncio.shield(entry["task"])
+            # A later, stricter caller must not wait past its own deadline either
+            return await asyncio.wait_for(asyncio.shield(entry["task"]), timeout)
+        except asyncio.TimeoutError:
+            backend.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"{backend_name} request exceeded its {timeout:g}s deadline")
+        finally:
+            entry["waiters"] -= 1
+            if entry["waiters"] == 0 and not entry["task"].done():
+                entry["task"].cancel()
+                backend.stats["cancelled"] += 1
+
+    async def _run(self, backend, model, prompt, deadline, options):
+        await backend.acquire()
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            backend.release()
+            backend.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("Deadline passed while queued for a backend slot")
+        stats = backend.stats
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        loop = asyncio.get_running_loop()
+
+        def finished(_):
+            stats["in_flight"] -= 1
+            backend.release()
+
+        job = self._threads.submit(backend.call, model, prompt, remaining, options)
+        # Cancelling this task cannot stop the thread; the slot is freed when it returns
+        job.add_done_callback(lambda future: loop.call_soon_threadsafe(finished, future))
+        try:
+            return await asyncio.wrap_future(job)
+        except LLMError:
+            stats["errors"] += 1
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats["errors"] += 1
+            raise LLMError(str(e)) from e
+
+class SyncLLMClient:
+    """Blocking facade over AsyncLLMClient with the event loop on a daemon thread."""
+    def __init__(self, client=None):
+        self.client = client or AsyncLLMClient()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+
+    def register(self, name, backend, replace=True):
+        return self.client.register(name, backend, replace)
+
+    def submit(self, backend_name, model, prompt, timeout=None, options=None):
+        """Returns a concurrent.futures.Future; cancel() on it cancels the request."""
+        coro = self.client.generate(backend_name, model, prompt, timeout, options)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def generate(self, backend_name, model, prompt, timeout=None, options=None):
+        return self.submit(backend_name, model, prompt, timeout, options).result()
+
+    def stats(self, backend_name):
+        return dict(self.client.backends[backend_name].stats)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_client():
+    """Process-wide facade so every caller shares the same per-backend limits."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SyncLLMClient()
+        return _shared
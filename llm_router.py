@@ -0,0 +1,257 @@
+"""
+Routes LLM requests across providers and models by observed latency and health.
+
+A route is a (backend name, model) pair whose backend is registered with the shared
+SyncLLMClient. The router keeps a moving profile per route (EWMA latency and error rate
+plus a window of recent latencies) and sends each request to the healthy route with the
+lowest expected latency, failing over to the next one on error. A route that keeps failing
+is benched for a cooldown and then tried again.
+
+Short requests can be hedged: if the first route has not answered after its p-th percentile
+latency, the same prompt goes to the next route on a different backend as well and the first
+answer wins. The losing call cannot be interrupted mid-request (it keeps its backend slot
+and quota until it returns), so hedging is opt-in, waits until the first route has enough
+samples for a percentile, and never doubles a request on the same backend/key.
+
+    router = shared_router()
+    text = router.generate([("gemini", "models/gemini-2.0-flash"), ("ollama:http://localhost:11434", "llama3")],
+                           prompt, timeout=60, hedge=True)
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+
+from llm_client import DeadlineExceeded, LLMError, shared_client
+
+class RouteProfile:
+    """Moving latency/error profile of one route."""
+    def __init__(self, prior=1.0, window=50):
+        # Expected latency until the first sample arrives; ties keep the caller's order
+        self.prior = prior
+        self.latency = None
+        self.error_rate = 0.0
+        self.samples = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def expected(self):
+        latency = self.prior if self.latency is None else self.latency
+        return latency * (1 + self.error_rate)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency": self.latency,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "error_rate": self.error_rate,
+            "benched_until": self.benched_until,
+        }
+
+class RouteResult:
+    __slots__ = ("text", "route", "seconds", "hedged", "attempts")
+
+    def __init__(self, text, route, seconds, hedged, attempts):
+        self.text = text
+        self.route = route
+        self.seconds = seconds
+        self.hedged = hedged
+        self.attempts = attempts
+
+class LLMRouter:
+    def __init__(self, client=None, alpha=0.3, window=50, failure_threshold=3, max_error_rate=0.5,
+                 cooldown=30.0, hedge_percentile=0.9, min_hedge_samples=5, clock=time.monotonic):
+        self.client = client or shared_client()
+        # Weight of the newest sample in the moving averages
+        self.alpha = alpha
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.hedge_percentile = hedge_percentile
+        # Until the first route has this many samples, requests are not hedged
+        self.min_hedge_samples = min_hedge_samples
+        self.clock = clock
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "failovers": 0, "hedged": 0, "hedge_wins": 0, "failures": 0}
+
+    def profile(self, route):
+        with self._lock:
+            profile = self._profiles.get(route)
+            if profile is None:
+                profile = self._profiles[route] = RouteProfile(window=self.window)
+            return profile
+
+    def profiles(self):
+        """{"backend/model": snapshot} for status displays and benchmarks."""
+        with self._lock:
+            return {f"{backend}/{model}": p.snapshot() for (backend, model), p in self._profiles.items()}
+
+    def healthy(self, route):
+        return self.profile(route).benched_until <= self.clock()
+
+    def rank(self, routes):
+        """Healthy routes by expected latency, then benched ones by when they come back."""
+        routes = [tuple(route) for route in routes]
+        now = self.clock()
+        profiles = {route: self.profile(route) for route in routes}
+
+        def key(route):
+            profile = profiles[route]
+            if profile.benched_until > now:
+                return (1, profile.benched_until)
+            return (0, profile.expected())
+
+        with self._lock:
+            return sorted(routes, key=key)
+
+    def record(self, route, seconds, ok=True, censored=False):
+        """
+        Adds a latency sample. censored=True is for a call cut off before it answered (a
+        hedge loser): it took at least `seconds`, so the sample is max(seconds, current
+        average) and the error rate and failure count are left alone.
+        """
+        profile = self.profile(route)
+        with self._lock:
+            if censored:
+                seconds = max(seconds, profile.latency or 0.0)
+            else:
+                profile.requests += 1
+            profile.samples.append(seconds)
+            profile.latency = seconds if profile.latency is None else (1 - self.alpha) * profile.latency + self.alpha * seconds
+            if censored:
+                return
+            profile.error_rate = (1 - self.alpha) * profile.error_rate + self.alpha * (0.0 if ok else 1.0)
+            if ok:
+                profile.consecutive_failures = 0
+                return
+            profile.errors += 1
+            profile.consecutive_failures += 1
+            if profile.consecutive_failures >= self.failure_threshold or profile.error_rate > self.max_error_rate:
+                profile.benched_until = self.clock() + self.cooldown
+
+    def hedge_delay(self, route):
+        """Seconds after which a request on route is hedged; None while it has too few samples."""
+        profile = self.profile(route)
+        with self._lock:
+            if len(profile.samples) < self.min_hedge_samples:
+                return None
+            return profile.percentile(self.hedge_percentile)
+
+    def generate(self, routes, prompt, timeout=None, options=None, hedge=False):
+        return self.request(routes, prompt, timeout, options, hedge).text
+
+    def request(self, routes, prompt, timeout=None, options=None, hedge=False):
+        """
+        Sends prompt along the best route, failing over in rank order; returns a RouteResult.
+        With hedge=True the next route on another backend is started as well once the first
+        has taken longer than its hedge_delay(). Raises DeadlineExceeded or LLMError when every
+        route failed.
+        """
+        ordered = self.rank(routes)
+        if not ordered:
+            raise LLMError("No LLM route is configured")
+        self.stats["requests"] += 1
+        started = self.clock()
+        deadline = None if timeout is None else started + timeout
+        waiting = list(ordered)
+        pending = {}
+        errors = []
+        hedged = False
+
+        def launch(index=0):
+            route = waiting.pop(index)
+            remaining = None if deadline is None else deadline - self.clock()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(f"LLM request exceeded its {timeout:g}s deadline")
+            future = self.client.submit(route[0], route[1], prompt, timeout=remaining, options=options)
+            pending[future] = (route, self.clock())
+
+        def cancel_pending(ok):
+            # Losers of a hedge are censored samples: a route that is always outrun still
+            # has its latency move up, but not down to the winner's time
+            for future, (route, since) in pending.items():
+                future.cancel()
+                if ok:
+                    self.record(route, self.clock() - since, censored=True)
+                else:
+                    self.record(route, self.clock() - since, ok=False)
+            pending.clear()
+
+        def hedge_index():
+            # The first waiting route on another backend; the same backend shares its key and quota
+            busy = {route[0] for route, _ in pending.values()}
+            return next((i for i, route in enumerate(waiting) if route[0] not in busy), None)
+
+        hedge_at = None
+        if hedge and any(route[0] != ordered[0][0] for route in ordered[1:]):
+            delay = self.hedge_delay(ordered[0])
+            hedge_at = None if delay is None else started + delay
+        try:
+            launch()
+            while pending:
+                now = self.clock()
+                limits = [t - now for t in (hedge_at, deadline) if t is not None]
+                done, _ = wait(pending, timeout=max(min(limits), 0) if limits else None, return_when=FIRST_COMPLETED)
+                if not done:
+                    now = self.clock()
+                    if deadline is not None and now >= deadline:
+                        raise DeadlineExceeded(f"LLM request exceeded its {timeout:g}s deadline")
+                    if hedge_at is not None and now >= hedge_at:
+                        hedge_at = None
+                        index = hedge_index()
+                        if index is not None:
+                            hedged = True
+                            self.stats["hedged"] += 1
+                            launch(index)
+                    continue
+
+                for future in done:
+                    route, since = pending.pop(future)
+                    try:
+                        text = future.result()
+                    except (LLMError, CancelledError) as e:
+                        self.record(route, self.clock() - since, ok=False)
+                        errors.append((route, e))
+                        if not pending and waiting:
+                            self.stats["failovers"] += 1
+                            hedge_at = None
+                            launch()
+                        continue
+                    self.record(route, self.clock() - since, ok=True)
+                    cancel_pending(ok=True)
+                    if hedged and route != ordered[0]:
+                        self.stats["hedge_wins"] += 1
+                    return RouteResult(text, route, self.clock() - started, hedged, len(errors) + 1)
+        except DeadlineExceeded:
+            cancel_pending(ok=False)
+            self.stats["failures"] += 1
+            raise
+
+        self.stats["failures"] += 1
+        message = "; ".join(f"{backend}/{model}: {e}" for (backend, model), e in errors)
+        if all(isinstance(e, DeadlineExceeded) for _, e in errors):
+            raise DeadlineExceeded(message)
+        raise LLMError(f"Every LLM route failed: {message}")
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_router():
+    """Process-wide router so every caller learns from the same latency profiles."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMRouter()
+        return _shared
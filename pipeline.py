@@ -0,0 +1,117 @@
+"""
+Dependency-aware step runner used by PushAgent's push path.
+
+Steps declare the steps they depend on and start as soon as those have finished, so
+independent work (README generation, staging, fetching) overlaps. Progress is reported per
+step as it starts, finishes or fails; a failure stops every step that depends on it.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+class PipelineError(Exception):
+    """Raised by Pipeline.run(); carries the name of the step that failed."""
+    def __init__(self, step, error):
+        super().__init__(str(error))
+        self.step = step
+        self.error = error
+
+class Pipeline:
+    PENDING, RUNNING, DONE, FAILED, SKIPPED = "pending", "running", "done", "failed", "skipped"
+
+    def __init__(self, max_workers=4, on_progress=None):
+        self.max_workers = max_workers
+        # on_progress(pipeline) is called from worker threads whenever a step changes state
+        self.on_progress = on_progress
+        self.steps = {}
+        self.order = []
+        self.results = {}
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, fn, deps=(), label=None):
+        """fn() runs once every step in deps is done; its return value lands in results[name]."""
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"Unknown dependency {dep!r} for step {name!r}")
+        self.steps[name] = {"fn": fn, "deps": tuple(deps), "label": label or name, "state": self.PENDING}
+        self.order.append(name)
+        return self
+
+    def state(self, name):
+        return self.steps[name]["state"]
+
+    def describe(self):
+        """One-line progress text, e.g. '2/5 done: Generating README, Fetching'."""
+        with self._lock:
+            done = sum(1 for s in self.steps.values() if s["state"] == self.DONE)
+            running = [self.steps[n]["label"] for n in self.order if self.steps[n]["state"] == self.RUNNING]
+        text = f"{done}/{len(self.steps)} done"
+        return f"{text}: {', '.join(running)}" if running else text
+
+    def run(self):
+        """Runs every step; returns results or raises PipelineError for the first failure."""
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while True:
+                if failure is None:
+                    for name in self._ready():
+                        self._set(name, self.RUNNING)
+                        running[pool.submit(self._call, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                        self._set(name, self.DONE)
+                    except Exception as e:
+                        self._set(name, self.FAILED)
+                        failure = failure or PipelineError(name, e)
+
+        for name in self.order:
+            if self.steps[name]["state"] == self.PENDING:
+                self._set(name, self.SKIPPED)
+        if failure is not None:
+            raise failure
+        return self.results
+
+    def _ready(self):
+        with self._lock:
+            return [
+                name for name in self.order
+                if self.steps[name]["state"] == self.PENDING
+                and all(self.steps[dep]["state"] == self.DONE for dep in self.steps[name]["deps"])
+            ]
+
+    def _call(self, name):
+        started = time.perf_counter()
+        try:
+            return self.steps[name]["fn"]()
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def _set(self, name, state):
+        with self._lock:
+            self.steps[name]["state"] = state
+        if self.on_progress:
+            self.on_progress(self)
+
+def add_push_steps(pipeline, remote, stage, commit, push, write_readme=None, wrap=None):
+    """
+    Adds PushAgent's push path to pipeline. The README is written before staging, so
+    `git add .` picks up the finished file and its backup; the remote check overlaps with
+    all of it. wrap(name, fn), if given, decorates every step, e.g. for tracing.
+    """
+    wrap = wrap or (lambda name, fn: fn)
+    pipeline.add("remote", wrap("remote", remote), label="Checking remote")
+    stage_deps = []
+    if write_readme is not None:
+        pipeline.add("readme", wrap("readme", write_readme), label="Writing README")
+        stage_deps.append("readme")
+    pipeline.add("stage", wrap("stage", stage), deps=stage_deps, label="Staging")
+    pipeline.add("commit", wrap("commit", commit), deps=["stage"], label="Committing")
+    pipeline.add("push", wrap("push", push), deps=["commit", "remote"], label="Pushing")
+    return pipeline
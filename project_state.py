@@ -0,0 +1,328 @@
+"""
+Keeps recently used projects warm in the resident PushAgent process.
+
+Each warm project has a TreeWatcher: a polling snapshot of (mtime, size) for every
+non-ignored file plus the git metadata that affects the commit screen (HEAD, index,
+config, refs). A daemon thread polls the watchers and hands the changes to the project
+context, so a hotkey press on a known project can render straight from memory.
+Between polls, git_fingerprint() (index stat, HEAD and the commit it points at) tells in a
+few syscalls whether a commit, checkout, stage or reset happened behind PushAgent's back.
+
+Polling is used instead of inotify/ReadDirectoryChangesW so the same code runs on
+Windows and can be exercised on Linux without native bindings.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from gitignore import IgnoreMatcher, _common_dir, _git_dir
+
+# git metadata whose changes alter branch, ahead/behind, staged state or the remote
+GIT_WATCH_FILES = ("HEAD", "index", "config", "packed-refs", "FETCH_HEAD")
+GIT_WATCH_DIRS = ("refs",)
+
+class TreeWatcher:
+    def __init__(self, root, ignored_dirs=(".git", "node_modules", "__pycache__")):
+        self.root = str(root)
+        self.ignored_dirs = set(ignored_dirs)
+        self.matcher = IgnoreMatcher(self.root)
+        self.snapshot = self.scan()
+
+    def scan(self):
+        """Returns {relative path: (mtime_ns, size)}; git metadata is keyed under '.git/'."""
+        entries = {}
+        stack = [(self.root, "")]
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    items = list(it)
+            except OSError:
+                continue
+            for item in items:
+                rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        if item.name not in self.ignored_dirs and not self.matcher.ignored(rel_path, True):
+                            stack.append((item.path, rel_path))
+                        continue
+                    if self.matcher.ignored(rel_path):
+                        continue
+                    st = item.stat()
+                except OSError:
+                    continue
+                entries[rel_path] = (st.st_mtime_ns, st.st_size)
+
+        git_dir = _git_dir(self.root)
+        if git_dir is None:
+            return entries
+        # In a linked worktree HEAD and index are its own, refs and config are shared
+        git_dirs = list(dict.fromkeys((git_dir, _common_dir(git_dir))))
+        for name in GIT_WATCH_FILES:
+            for base in git_dirs:
+                try:
+                    st = os.stat(os.path.join(base, name))
+                except OSError:
+                    continue
+                entries[f".git/{name}"] = (st.st_mtime_ns, st.st_size)
+                break
+        # Refs are git's own files, so they are listed without ignore filtering
+        stack = [(os.path.join(base, name), f".git/{name}") for base in git_dirs for name in GIT_WATCH_DIRS]
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    for item in it:
+                        rel_path = f"{rel_dir}/{item.name}"
+                        if item.is_dir(follow_symlinks=False):
+                            stack.append((item.path, rel_path))
+                        else:
+                            st = item.stat()
+                            entries[rel_path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return entries
+
+    def poll(self):
+        """Rescans and returns {"added", "removed", "modified"} relative to the previous snapshot."""
+        current = self.scan()
+        previous = self.snapshot
+        changed = current.keys() ^ previous.keys() | {p for p in current.keys() & previous.keys() if current[p] != previous[p]}
+        if any(p.rsplit("/", 1)[-1] == ".gitignore" for p in changed):
+            # Edited ignore rules change what is listed, so recompile and rescan
+            self.matcher = IgnoreMatcher(self.root)
+            current = self.scan()
+        self.snapshot = current
+        return {
+            "added": sorted(current.keys() - previous.keys()),
+            "removed": sorted(previous.keys() - current.keys()),
+            "modified": sorted(p for p in current.keys() & previous.keys() if current[p] != previous[p]),
+        }
+
+def has_changes(changes):
+    return bool(changes["added"] or changes["removed"] or changes["modified"])
+
+def tree_changed(before, after):
+    """True if two watcher snapshots differ outside .git/, i.e. in the user's files."""
+    return any(not path.startswith(".git/") and before.get(path) != after.get(path)
+               for path in before.keys() | after.keys())
+
+def _read_ref(git_dir, ref):
+    try:
+        with open(os.path.join(git_dir, ref), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(git_dir, "packed-refs"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.rstrip("\n").endswith(" " + ref):
+                    return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    return None
+
+def git_fingerprint(root):
+    """
+    (index mtime_ns, index size, HEAD, commit id): changes with every commit, checkout,
+    stage or reset, and costs a stat plus one or two small reads.
+    """
+    git_dir = _git_dir(str(root))
+    if git_dir is None:
+        return (None, None, None, None)
+    try:
+        st = os.stat(os.path.join(git_dir, "index"))
+        index = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        index = (None, None)
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return index + (None, None)
+    commit = _read_ref(_common_dir(git_dir), head[5:]) if head.startswith("ref: ") else head
+    return index + (head, commit)
+
+def estimate_footprint(context, watcher=None):
+    """
+    Rough resident size of a warm project in bytes: the context's own footprint() if it has
+    one, plus the watcher snapshot, which dominates for large trees.
+    """
+    size = context.footprint() if hasattr(context, "footprint") else 1024
+    if watcher is not None:
+        # Key string, tuple and two ints per snapshot entry
+        size += sum(len(path) for path in watcher.snapshot) + 160 * len(watcher.snapshot)
+    return size
+
+class WarmProjects:
+    """
+    Most recently used project contexts, each kept current by its watcher.
+    A context must provide apply_changes(changes); `dirty` means something changed since the
+    last mark_synced(), i.e. derived state such as the AI commit message is stale.
+    Least recently used projects are evicted beyond max_projects or max_bytes (as estimated
+    by estimate_footprint); the most recent one is always kept.
+    The most recent project is polled every interval, the others every idle_interval, and no
+    watcher is rescanned more often than keeps its scans under max_scan_share of the time.
+    """
+    def __init__(self, max_projects=4, interval=1.0, on_change=None, max_bytes=64 * 1024 * 1024,
+                 idle_interval=10.0, max_scan_share=0.05):
+        self.max_projects = max_projects
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.max_scan_share = max_scan_share
+        self.on_change = on_change
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"hits": 0, "misses": 0, "polls": 0, "refreshes": 0, "evictions": 0,
+                      "evicted_bytes": 0, "validations": 0, "stale": 0, "bytes": 0}
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warm-projects", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, path):
+        """The warm context for path, or None."""
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(self._key(path))
+            self.stats["hits"] += 1
+            return entry["context"]
+
+    def paths(self):
+        """Warm project paths, most recently used last."""
+        with self._lock:
+            return [entry["context"].path for entry in self._entries.values()]
+
+    def is_dirty(self, path):
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+            return entry is None or entry["dirty"]
+
+    def validate(self, path):
+        """
+        Cheap check before rendering from memory: False (and the entry marked dirty) if the
+        index or HEAD moved since the context was last synced or polled.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+            if entry is None:
+                return False
+            self.stats["validations"] += 1
+            if git_fingerprint(entry["context"].path) == entry["fingerprint"]:
+                return True
+            entry["dirty"] = True
+            self.stats["stale"] += 1
+            return False
+
+    def add(self, context):
+        """Starts watching a freshly loaded context; the initial snapshot is taken on the caller's thread."""
+        watcher = TreeWatcher(context.path)
+        entry = {"context": context, "watcher": watcher, "dirty": True, "lock": threading.Lock(),
+                 "fingerprint": git_fingerprint(context.path), "bytes": estimate_footprint(context, watcher),
+                 "scan_seconds": 0.0, "next_poll": 0.0}
+        with self._lock:
+            key = self._key(context.path)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def discard(self, path):
+        with self._lock:
+            self._entries.pop(self._key(path), None)
+            self.stats["bytes"] = sum(e["bytes"] for e in self._entries.values())
+
+    def _evict(self):
+        total = sum(e["bytes"] for e in self._entries.values())
+        while len(self._entries) > 1 and (len(self._entries) > self.max_projects or total > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted["bytes"]
+            self.stats["evictions"] += 1
+            self.stats["evicted_bytes"] += evicted["bytes"]
+        self.stats["bytes"] = total
+
+    def snapshot(self, path):
+        """
+        Brings path's context up to date and returns the watcher snapshot to pass to
+        mark_synced() once derived state has been rebuilt from it; None if path is not warm.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        if entry is None:
+            return None
+        self._poll(entry)
+        return entry["watcher"].snapshot
+
+    def mark_synced(self, path, since):
+        """
+        Derived state for path was just rebuilt from the tree as of `since` (a snapshot()
+        result): catch the context up, including PushAgent's own `git add`, and clear the
+        dirty flag unless files were edited after `since` was taken.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        if entry is None:
+            return
+        with entry["lock"]:
+            changes = entry["watcher"].poll()
+            if has_changes(changes):
+                entry["context"].apply_changes(changes)
+            entry["dirty"] = since is None or tree_changed(since, entry["watcher"].snapshot)
+            entry["fingerprint"] = git_fingerprint(entry["context"].path)
+            entry["bytes"] = estimate_footprint(entry["context"], entry["watcher"])
+        with self._lock:
+            self._evict()
+
+    def refresh(self, path):
+        """Polls one project now; returns True if it had changes."""
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        return entry is not None and self._poll(entry)
+
+    def _poll(self, entry):
+        # Scans run under the entry's own lock so get() from the GUI thread never waits on one
+        with entry["lock"]:
+            started = time.monotonic()
+            changes = entry["watcher"].poll()
+            entry["scan_seconds"] = time.monotonic() - started
+            self.stats["polls"] += 1
+            if not has_changes(changes):
+                return False
+            entry["context"].apply_changes(changes)
+            entry["dirty"] = True
+            entry["fingerprint"] = git_fingerprint(entry["context"].path)
+            entry["bytes"] = estimate_footprint(entry["context"], entry["watcher"])
+        self.stats["refreshes"] += 1
+        if self.on_change:
+            self.on_change(entry["context"], changes)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                entries = list(self._entries.values())
+            now = time.monotonic()
+            for entry in entries:
+                if entry["next_poll"] > now:
+                    continue
+                try:
+                    self._poll(entry)
+                except Exception as e:
+                    print(f"[PushAgent] Watch failed for {entry['context'].path}: {e}")
+                # Background projects are still validated and refreshed when they are opened
+                period = self.interval if entry is entries[-1] else self.idle_interval
+                entry["next_poll"] = time.monotonic() + max(period, entry["scan_seconds"] / self.max_scan_share)
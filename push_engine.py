@@ -0,0 +1,211 @@
+"""
+Push with failure classification, jittered retries and divergence checks.
+
+git's output tells apart failures that are worth retrying (network drops, 5xx responses,
+lock contention), ones that need a rebase (non-fast-forward) and ones that never fix
+themselves (authentication, protected branches, hooks, a missing remote). The engine
+retries only the first kind, with full-jitter exponential backoff, rebases at most once for
+the second, and fails fast with a specific message for the rest.
+
+Git is invoked through an injectable runner(args, cwd) -> stdout that raises on failure,
+so the engine can be exercised against a local bare repository with FlakyRunner.
+"""
+import os
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+
+TRANSIENT = {"network", "server", "lock"}
+
+# Checked in order; the first matching kind wins
+_PATTERNS = (
+    ("non_fast_forward", ("non-fast-forward", "fetch first", "[rejected]", "Updates were rejected because the tip",
+                          "updates were rejected because the remote contains work")),
+    ("auth", ("Authentication failed", "could not read Username", "Permission denied", "403", "terminal prompts disabled",
+              "invalid username or password", "Repository not found", "denied to")),
+    ("protected", ("protected branch", "GH006", "pre-receive hook declined", "[remote rejected]")),
+    ("no_remote", ("does not appear to be a git repository", "No such remote", "No configured push destination")),
+    ("lock", ("index.lock", "Unable to create", "cannot lock ref", "File exists")),
+    ("server", ("The requested URL returned error: 5", "HTTP 5", "RPC failed", "Internal Server Error",
+                "Service Unavailable", "Bad Gateway", "remote end hung up unexpectedly", "early EOF")),
+    ("network", ("Could not resolve host", "Connection timed out", "Operation timed out", "Connection reset",
+                 "Connection refused", "unable to access", "Failed to connect", "Network is unreachable",
+                 "SSL_ERROR", "gnutls_handshake", "timed out")),
+)
+
+_MESSAGES = {
+    "auth": "Authentication failed. Run 'gh auth login' or check your git credentials.",
+    "protected": "The remote rejected the push (protected branch or server-side hook).",
+    "no_remote": "No usable 'origin' remote is configured for this repository.",
+    "non_fast_forward": "The remote has commits that could not be rebased onto automatically.",
+    "network": "The remote could not be reached.",
+    "server": "The remote server failed while receiving the push.",
+    "lock": "Another git process holds a lock in this repository.",
+}
+
+def classify_failure(output):
+    """Maps git's error output to a failure kind; "unknown" if nothing matches."""
+    lowered = output.lower()
+    for kind, needles in _PATTERNS:
+        if any(needle.lower() in lowered for needle in needles):
+            return kind
+    return "unknown"
+
+class PushError(Exception):
+    """A push that failed for good; kind is the classified failure, output git's last message."""
+    def __init__(self, kind, output, attempts):
+        super().__init__(f"{_MESSAGES.get(kind, 'git push failed.')} ({output.strip().splitlines()[-1] if output.strip() else kind})")
+        self.kind = kind
+        self.output = output
+        self.attempts = attempts
+
+def run_git(args, cwd):
+    """Default runner: returns stdout, raises RuntimeError carrying stderr on failure."""
+    result = subprocess.run(
+        args, cwd=cwd, capture_output=True, text=True,
+        env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return result.stdout.strip()
+
+class FlakyRunner:
+    """
+    Wraps a runner and fails chosen git subcommands with canned output before letting them
+    through, e.g. FlakyRunner(run_git, {"push": ["fatal: unable to access ...: Could not resolve host"]}).
+    """
+    def __init__(self, runner, failures):
+        self.runner = runner
+        self.failures = {cmd: list(outputs) for cmd, outputs in failures.items()}
+        self.calls = []
+
+    def __call__(self, args, cwd):
+        subcommand = args[1] if len(args) > 1 else ""
+        self.calls.append(subcommand)
+        pending = self.failures.get(subcommand)
+        if pending:
+            raise RuntimeError(pending.pop(0))
+        return self.runner(args, cwd)
+
+class Divergence:
+    __slots__ = ("upstream", "ahead", "behind")
+
+    def __init__(self, upstream, ahead, behind):
+        self.upstream = upstream
+        self.ahead = ahead
+        self.behind = behind
+
+    @property
+    def diverged(self):
+        return bool(self.ahead and self.behind)
+
+    def __repr__(self):
+        return f"Divergence({self.upstream!r}, ahead={self.ahead}, behind={self.behind})"
+
+class PushEngine:
+    def __init__(self, cwd, remote="origin", runner=None, max_attempts=4, base_delay=0.5, max_delay=8.0,
+                 sleep=time.sleep, rng=random.random):
+        self.cwd = cwd
+        self.remote = remote
+        self.runner = runner or run_git
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.rng = rng
+        self.divergence = None
+        self._prefetch = None
+        self.log = []
+
+    def _git(self, *args):
+        return self.runner(["git", *args], self.cwd)
+
+    def backoff(self, attempt):
+        """Full jitter: uniform in [0, min(max_delay, base_delay * 2^(attempt-1))]."""
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def fetch(self):
+        """Fetches the remote and returns the Divergence of HEAD from its upstream (None without one)."""
+        self._retry("fetch", lambda: self._git("fetch", "--quiet", self.remote))
+        try:
+            upstream = self._git("rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}")
+            counts = self._git("rev-list", "--left-right", "--count", "HEAD...@{u}")
+        except Exception:
+            self.divergence = None
+            return None
+        ahead, behind = (int(n) for n in counts.split())
+        self.divergence = Divergence(upstream, ahead, behind)
+        return self.divergence
+
+    def prefetch(self):
+        """Starts fetch() on a background thread; returns a Future of the Divergence."""
+        if self._prefetch is not None and not self._prefetch.done():
+            return self._prefetch
+        future = self._prefetch = Future()
+
+        def _run():
+            try:
+                future.set_result(self.fetch())
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=_run, name="push-prefetch", daemon=True).start()
+        return future
+
+    def push(self, branch, set_upstream=True, rebase_if_behind=True):
+        """
+        Pushes branch. If a prefetch already showed the branch behind its upstream, rebases
+        before the first attempt instead of waiting for the rejection.
+        """
+        rebased = False
+        if rebase_if_behind and self._prefetch is not None:
+            try:
+                divergence = self._prefetch.result()
+            except Exception:
+                divergence = None
+            if divergence is not None and divergence.behind:
+                self._rebase(branch)
+                rebased = True
+
+        args = ["push", "-u", self.remote, branch] if set_upstream else ["push", self.remote, branch]
+        try:
+            self._retry("push", lambda: self._git(*args))
+        except PushError as e:
+            if e.kind != "non_fast_forward" or rebased:
+                raise
+            self._rebase(branch)
+            self._retry("push", lambda: self._git(*args))
+
+    def _rebase(self, branch):
+        try:
+            self._retry("pull", lambda: self._git("pull", "--rebase", self.remote, branch))
+        except PushError as e:
+            if e.kind == "unknown":
+                # Most likely conflicts; leave the repository as it was
+                try:
+                    self._git("rebase", "--abort")
+                except Exception:
+                    pass
+                raise PushError("non_fast_forward", e.output, e.attempts)
+            raise
+
+    def _retry(self, name, fn):
+        """Runs fn, retrying transient failures; raises PushError for the rest."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = fn()
+                self.log.append((name, attempt, "ok"))
+                return result
+            except Exception as e:
+                output = str(e)
+                kind = classify_failure(output)
+                self.log.append((name, attempt, kind))
+                if kind in TRANSIENT and attempt < self.max_attempts:
+                    self.sleep(self.backoff(attempt))
+                    continue
+                raise PushError(kind, output, attempt)
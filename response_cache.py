@@ -0,0 +1,99 @@
+"""
+On-disk LRU of LLM responses for PushAgent's commit messages and READMEs, bounded by entry
+count and bytes. Keys hash the request kind, the routes that may answer it and the input.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+class ResponseCache:
+    """On-disk LRU of LLM responses keyed by a hash of the input and model, bounded by entry count and bytes."""
+    def __init__(self, path, max_entries=200, max_bytes=2 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_errors = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(kind, model, text):
+        """model is whatever identifies who answers: one model name or a list of (backend, model) routes."""
+        if not isinstance(model, str):
+            model = ",".join(f"{backend}/{name}" for backend, name in model)
+        return hashlib.sha256(f"{kind}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self.entries:
+                self.total_bytes -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.total_bytes += len(value)
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+                self.evictions += 1
+            self._save()
+
+    def invalidate(self, key=None):
+        """Drops one entry, or the whole cache when no key is given."""
+        with self._lock:
+            if key is None:
+                self.entries.clear()
+                self.total_bytes = 0
+            elif key in self.entries:
+                self.total_bytes -= len(self.entries.pop(key))
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "write_errors": self.write_errors,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            for key, value in items:
+                self.entries[key] = value
+                self.total_bytes += len(value)
+        except (OSError, ValueError, TypeError):
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def _save(self):
+        # Stored oldest-first so the LRU order survives a restart
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.entries.items()), f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Only an accelerator: the entries stay usable in memory, stats() reports the failure
+            self.write_errors += 1
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules shared with PushAgent live at the repository root, the 2.0 generator's in 2.0/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "2.0"))
+
+def git(cwd, *args):
+    """Runs git with a fixed identity and no user/system config; returns stdout."""
+    env = dict(os.environ, GIT_CONFIG_GLOBAL=os.devnull, GIT_CONFIG_NOSYSTEM="1", GIT_TERMINAL_PROMPT="0",
+               XDG_CONFIG_HOME=os.devnull,
+               GIT_AUTHOR_NAME="Test", GIT_AUTHOR_EMAIL="test@example.com",
+               GIT_COMMITTER_NAME="Test", GIT_COMMITTER_EMAIL="test@example.com")
+    result = subprocess.run(["git", *args], cwd=str(cwd), capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return result.stdout
+
+@pytest.fixture
+def repo(tmp_path):
+    """An empty git checkout on branch main."""
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q", "-b", "main")
+    return path
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from classifier import FileClassifier
+
+@pytest.mark.parametrize("name, head, size, kind", [
+    ("empty.py", b"", 0, "empty"),
+    ("app.py", b"import os\n\nprint(os.getcwd())\n", 30, "text"),
+    ("notes.md", "# Übersicht\n\nÄnderungen: 😀\n".encode("utf-8"), 40, "text"),
+    ("colors.txt", b"\x1b[31mred\x1b[0m\n\tindented\r\n\x0cpage\n", 40, "text"),
+    ("image.png", b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", 2000, "binary"),
+    ("data.json", bytes(range(1, 32)) * 4, 124, "binary"),
+    ("latin1.txt", bytes(range(0x80, 0x100)) * 4, 512, "binary"),
+    ("package-lock.json", b'{"lockfileVersion": 3}\n', 24, "generated"),
+    ("bundle.min.js", b"var a=1;\n", 9, "generated"),
+    ("api_pb2.py", b"# proto\n", 8, "generated"),
+    ("models.py", b"# @generated by schema tool\nclass A: pass\n", 40, "generated"),
+    ("main.go", b"// Code generated by protoc-gen-go. DO NOT EDIT.\npackage main\n", 60, "generated"),
+    ("tokens.py", b"# Tokens are generated by the server; DO NOT EDIT them by hand.\n", 60, "text"),
+    ("big.json", b'{"a": 1}\n', 2_000_000, "oversized"),
+    ("bundle.js", b"x" * 4000, 4000, "minified"),
+    ("wide.css", (b"a" * 600 + b"\n") * 2, 1202, "text"),
+])
+def test_classify(name, head, size, kind):
+    assert FileClassifier().classify(name, head, size) == kind
+
+def test_inspect_reads_only_the_head(tmp_path):
+    classifier = FileClassifier(head_bytes=16)
+    path = tmp_path / "long.txt"
+    path.write_bytes(b"first sixteen b." + b"rest of the file\n")
+    kind, digest, head = classifier.inspect(str(path), path.stat().st_size)
+    assert (kind, head) == ("text", b"first sixteen b.")
+
+    # Same head and size: the mtime tells the versions apart
+    path.write_bytes(b"first sixteen b." + b"REST OF THE FILE\n")
+    os.utime(path, ns=(1, 1))
+    assert classifier.inspect(str(path), path.stat().st_size)[1] != digest
+
+def test_small_files_are_identified_by_content(tmp_path):
+    classifier = FileClassifier()
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    a.write_text("x = 1\n")
+    b.write_text("x = 1\n")
+    os.utime(b, ns=(1, 1))
+    assert classifier.inspect(str(a), 6)[1] == classifier.inspect(str(b), 6)[1]
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from benchmark import FakeOllamaServer
+from generator import ReadmeGenerator
+from llm_client import LLMError
+from llm_router import LLMRouter
+
+@pytest.fixture
+def ollama():
+    """Starts a fake Ollama server with the given settings; stopped after the test."""
+    started = []
+
+    def start(**kwargs):
+        started.append(FakeOllamaServer(**kwargs).start())
+        return started[-1]
+
+    yield start
+    for server in started:
+        server.stop()
+
+def make_generator(server, **kwargs):
+    return ReadmeGenerator(api_url=server.url, readme_cache=False, router=LLMRouter(), **kwargs)
+
+def test_streams_tokens_in_order(ollama):
+    server = ollama(tokens=12)
+    generator = make_generator(server)
+    tokens = []
+
+    text = generator._generate_stream("bench", "Write a README", tokens.append, threading.Event())
+
+    assert tokens and "".join(tokens) == text
+    assert "## Installation" in text
+    assert generator.last_stats["tokens"] == len(tokens)
+    assert generator.last_stats["route"] == f"ollama:{server.url}/bench"
+
+def test_slow_first_token_within_its_own_timeout(ollama):
+    # Model load and prefill take longer than the idle timeout allows between chunks
+    server = ollama(latency=0.5, tokens=6, token_delay=0.01)
+    generator = make_generator(server, first_token_timeout=5, stream_idle_timeout=0.2)
+
+    assert generator._generate_stream("bench", "prompt", None, None)
+
+def test_first_token_timeout(ollama):
+    server = ollama(latency=3.0)
+    generator = make_generator(server, first_token_timeout=0.3)
+
+    started = time.monotonic()
+    with pytest.raises(LLMError, match="No first token"):
+        generator._generate_stream("bench", "prompt", None, None)
+    assert time.monotonic() - started < 2
+
+def test_idle_timeout_between_chunks(ollama):
+    server = ollama(tokens=3, token_delay=0.6)
+    generator = make_generator(server, first_token_timeout=5, stream_idle_timeout=0.3)
+    tokens = []
+
+    # A route that already produced tokens is not failed over; the timeout is raised as is
+    with pytest.raises(requests.exceptions.ReadTimeout, match="No next token"):
+        generator._generate_stream("bench", "prompt", tokens.append, None)
+    assert len(tokens) == 1
+
+@pytest.mark.parametrize("settings", [{"latency": 5.0}, {"tokens": 50, "token_delay": 0.1}],
+                         ids=["during prefill", "mid-stream"])
+def test_cancel(ollama, settings):
+    server = ollama(**settings)
+    generator = make_generator(server)
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+
+    started = time.monotonic()
+    assert generator._generate_stream("bench", "prompt", None, cancel) is None
+    assert time.monotonic() - started < 1.5
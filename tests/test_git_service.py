@@ -0,0 +1,156 @@
+import pytest
+
+from conftest import git
+from git_service import GitService, GitState, StagedDiff
+
+OID = "a" * 40
+
+def status(*records):
+    return "".join(record + "\0" for record in records)
+
+@pytest.mark.parametrize("output, expected", [
+    (status("# branch.oid " + OID, "# branch.head main", "# branch.upstream origin/main", "# branch.ab +2 -3"),
+     {"oid": OID, "branch": "main", "upstream": "origin/main", "ahead": 2, "behind": 3}),
+    (status("# branch.oid (initial)", "# branch.head main"),
+     {"oid": None, "branch": "main", "upstream": None, "ahead": 0, "behind": 0}),
+    (status("# branch.oid " + OID, "# branch.head (detached)"),
+     {"oid": OID, "branch": None, "upstream": None, "ahead": 0, "behind": 0}),
+    (status("# branch.oid " + OID, "# branch.head feature/x", "# branch.upstream origin/feature/x", "# branch.ab +0 -0"),
+     {"oid": OID, "branch": "feature/x", "upstream": "origin/feature/x", "ahead": 0, "behind": 0}),
+])
+def test_parse_branch_headers(output, expected):
+    state = GitState.parse(output)
+    assert {key: getattr(state, key) for key in expected} == expected
+    assert not state.has_changes
+
+@pytest.mark.parametrize("record, kind, xy, path, orig, lists", [
+    ("1 M. N... 100644 100644 100644 {o} {o} src/app.py", "1", "M.", "src/app.py", None, {"staged"}),
+    ("1 .M N... 100644 100644 100644 {o} {o} my file.txt", "1", ".M", "my file.txt", None, {"unstaged"}),
+    ("1 MM N... 100644 100644 100644 {o} {o} both.py", "1", "MM", "both.py", None, {"staged", "unstaged"}),
+    ("1 A. N... 000000 100644 100644 {z} {o} new.py", "1", "A.", "new.py", None, {"staged"}),
+    ("1 D. N... 100644 000000 000000 {o} {z} gone.py", "1", "D.", "gone.py", None, {"staged"}),
+    ("2 R. N... 100644 100644 100644 {o} {o} R100 new name.py\0old name.py", "2", "R.", "new name.py", "old name.py",
+     {"staged"}),
+    ("2 C. N... 100644 100644 100644 {o} {o} C75 copy.py\0orig.py", "2", "C.", "copy.py", "orig.py", {"staged"}),
+    ("u UU N... 100644 100644 100644 100644 {o} {o} {o} conflict.py", "u", "UU", "conflict.py", None, {"conflicted"}),
+    ("? notes/todo.md", "?", "??", "notes/todo.md", None, {"untracked"}),
+])
+def test_parse_entries(record, kind, xy, path, orig, lists):
+    state = GitState.parse(status("# branch.head main", record.format(o=OID, z="0" * 40), "? after.txt"))
+    entry = state.entries[0]
+    assert (entry.kind, entry.xy, entry.path, entry.orig_path) == (kind, xy, path, orig)
+    # The record after a rename's original path is still read as its own entry
+    assert state.entries[1].path == "after.txt"
+    for name in ("staged", "unstaged", "conflicted"):
+        assert (entry in getattr(state, name)) == (name in lists)
+    assert (entry in state.untracked) == ("untracked" in lists)
+
+def test_probe_matches_a_real_repository(repo):
+    (repo / "old.py").write_text("print('hello')\n" * 20)
+    (repo / "kept.py").write_text("x = 1\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "Initial")
+    git(repo, "mv", "old.py", "new.py")
+    (repo / "kept.py").write_text("x = 2\n")
+    (repo / "untracked.txt").write_text("?")
+
+    state = GitService.probe(str(repo))
+
+    assert state.branch == "main" and state.oid and state.upstream is None
+    assert [(e.kind, e.xy, e.path, e.orig_path) for e in state.entries] == [
+        ("1", ".M", "kept.py", None), ("2", "R.", "new.py", "old.py"), ("?", "??", "untracked.txt", None)]
+
+DIFF = """\
+diff --git a/src/app.py b/src/app.py
+index 1111111..2222222 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,3 +1,4 @@ def main():
+ import os
+-print("old")
++print("new")
++print("more")
+@@ -10,2 +11,2 @@
+-x = 1
++x = 2
+diff --git a/logo.png b/logo.png
+new file mode 100644
+index 0000000..3333333
+Binary files /dev/null and b/logo.png differ
+diff --git a/old name.py b/new name.py
+similarity index 100%
+rename from old name.py
+rename to new name.py
+diff --git a/package-lock.json b/package-lock.json
+index 4444444..5555555 100644
+--- a/package-lock.json
++++ b/package-lock.json
+@@ -1 +1 @@
+-{"v": 1}
++{"v": 2}
+diff --git a/removed.py b/removed.py
+deleted file mode 100644
+index 6666666..0000000
+--- a/removed.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-a = 1
+-b = 2
+"""
+
+def parse(text, **kwargs):
+    return StagedDiff.parse(text.splitlines(keepends=True), **kwargs)
+
+def test_staged_diff_files():
+    diff = parse(DIFF)
+    files = {f.path: f for f in diff.files}
+    assert list(files) == ["src/app.py", "logo.png", "new name.py", "package-lock.json", "removed.py"]
+    app = files["src/app.py"]
+    assert (app.added, app.removed, len(app.hunks)) == (3, 2, 2)
+    assert app.hunks[0].header == "@@ -1,3 +1,4 @@ def main():"
+    assert files["logo.png"].binary and files["logo.png"].stat_line() == "logo.png | binary"
+    assert (files["removed.py"].added, files["removed.py"].removed) == (0, 2)
+    assert files["new name.py"].hunks == []
+    assert diff.total_bytes == len(DIFF)
+    assert diff.digest == parse(DIFF).digest != parse(DIFF.replace("more", "most")).digest
+
+def test_staged_diff_ranking_and_stat():
+    diff = parse(DIFF)
+    ranked = [f.path for f in diff.ranked_files()]
+    # Binary and lock files carry no signal for the message and go last
+    assert ranked[:2] == ["src/app.py", "removed.py"]
+    assert set(ranked[-2:]) == {"logo.png", "package-lock.json"}
+    assert diff.stat().splitlines()[0] == "5 files changed, +4 -5"
+
+def test_hunk_lines_and_file_cap():
+    long_hunk = "diff --git a/big.py b/big.py\n+++ b/big.py\n@@ -0,0 +1,100 @@\n" + "".join(f"+line {i}\n" for i in range(100))
+    diff = parse(long_hunk, hunk_max_lines=5)
+    hunk = diff.files[0].hunks[0]
+    assert hunk.text.splitlines()[-1] == "... 95 more lines"
+    assert diff.files[0].added == 100
+
+    capped = parse(DIFF, file_cap=40)
+    app = next(f for f in capped.files if f.path == "src/app.py")
+    assert len(app.hunks) == 1 and app.dropped_hunks == 1
+    assert "(1 hunks omitted)" in capped.render()
+
+def test_render_is_breadth_first_within_budget():
+    diff = parse(DIFF)
+    text = diff.render()
+    assert text.index('+print("new")') < text.index("+x = 2")
+    assert "logo.png | binary" in text and "+{\"v\": 2}" not in text
+
+    small = diff.render(budget=len(diff.stat()) + 60)
+    assert "+x = 2" not in small and "hunks omitted" in small
+
+def test_chunks_group_signal_files():
+    diff = parse(DIFF)
+    assert [[f.path for f in group] for group in diff.chunks()] == [["src/app.py", "removed.py", "new name.py"]]
+    assert [[f.path for f in group] for group in diff.chunks(budget=1)] == [["src/app.py"], ["removed.py"], ["new name.py"]]
+    assert len(diff.chunks(max_chunks=1, budget=1)) == 1
+
+def test_read_streams_the_staged_diff(repo):
+    (repo / "a.py").write_text("a = 1\n")
+    git(repo, "add", "a.py")
+    diff = StagedDiff.read(str(repo))
+    assert [(f.path, f.added) for f in diff.files] == [("a.py", 1)]
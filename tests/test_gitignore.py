@@ -0,0 +1,98 @@
+import os
+import subprocess
+
+import pytest
+
+from conftest import git
+from gitignore import IgnoreMatcher, tracked_files
+
+ROOT_RULES = """\
+# build output
+build/
+*.log
+!keep.log
+/top-only.txt
+docs/**/*.tmp
+**/cache
+data/*.csv
+!data/important.csv
+name?.bak
+[ab]x.txt
+trailing\\ 
+"""
+
+FILES = [
+    "app.py", "debug.log", "keep.log", "top-only.txt", "src/top-only.txt", "src/deep/trace.log",
+    "build/out.bin", "src/build/out.bin", "docs/a.tmp", "docs/x/y/b.tmp", "docs/readme.md",
+    "cache/blob", "src/cache/blob", "data/a.csv", "data/important.csv", "data/sub/b.csv",
+    "name1.bak", "name12.bak", "ax.txt", "cx.txt", "trailing ", "vendor/lib.js", "vendor/keep.js",
+    "pkg/generated.py", "pkg/sub/generated.py", "pkg/sub/main.py",
+]
+
+NESTED_RULES = {
+    "vendor/.gitignore": "*.js\n!keep.js\n",
+    "pkg/.gitignore": "generated.py\n",
+    "pkg/sub/.gitignore": "!generated.py\n",
+}
+
+@pytest.fixture
+def tree(repo):
+    (repo / ".gitignore").write_text(ROOT_RULES)
+    for rel_path, text in NESTED_RULES.items():
+        (repo / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel_path).write_text(text)
+    (repo / ".git" / "info").mkdir(exist_ok=True)
+    (repo / ".git" / "info" / "exclude").write_text("*.secret\n")
+    for rel_path in FILES + ["local.secret"]:
+        (repo / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel_path).write_text("x")
+    return repo
+
+def walk(root, matcher):
+    """Non-ignored files, pruning ignored directories the way PushAgent's walkers do."""
+    found = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        for item in os.scandir(os.path.join(root, rel_dir)):
+            rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+            if item.is_dir():
+                if item.name != ".git" and not matcher.ignored(rel_path, True):
+                    stack.append(rel_path)
+            elif not matcher.ignored(rel_path):
+                found.append(rel_path)
+    return sorted(found)
+
+def git_ignored(root, paths):
+    """The subset of paths `git check-ignore` reports as ignored."""
+    result = subprocess.run(["git", "check-ignore", "--no-index", "--stdin"], cwd=str(root), input="\n".join(paths),
+                            capture_output=True, text=True, env=dict(os.environ, XDG_CONFIG_HOME=os.devnull,
+                                                                     GIT_CONFIG_GLOBAL=os.devnull))
+    assert result.returncode in (0, 1), result.stderr
+    return set(result.stdout.splitlines())
+
+def test_matches_git_check_ignore(tree):
+    matcher = IgnoreMatcher(tree, global_excludes=False)
+    # Only paths whose directories are not ignored themselves; git never looks inside those
+    candidates = [p for p in FILES + ["local.secret"]
+                  if not any(matcher.ignored("/".join(p.split("/")[:i]), True) for i in range(1, p.count("/") + 1))]
+    dirs = sorted({"/".join(p.split("/")[:i]) for p in FILES for i in range(1, p.count("/") + 1)})
+    expected = git_ignored(tree, candidates + dirs)
+
+    assert {p for p in candidates if matcher.ignored(p)} == expected - set(dirs)
+    assert {d for d in dirs if matcher.ignored(d, True)} == expected & set(dirs)
+
+def test_walk_matches_git_listing(tree):
+    matcher = IgnoreMatcher(tree, global_excludes=False)
+    listed = git(tree, "ls-files", "--others", "--exclude-standard").splitlines()
+    assert walk(tree, matcher) == sorted(listed)
+    assert sorted(tracked_files(tree)) == sorted(listed)
+
+def test_dir_only_rule_skips_files(tmp_path):
+    (tmp_path / ".gitignore").write_text("build/\n")
+    matcher = IgnoreMatcher(tmp_path, global_excludes=False)
+    assert matcher.ignored("src/build", True)
+    assert not matcher.ignored("src/build")
+
+def test_tracked_files_outside_checkout(tmp_path):
+    assert tracked_files(tmp_path) is None
@@ -0,0 +1,102 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+from ipc import MAX_FRAME, IPCClient, IPCError, IPCServer, LegacyMessage, recv_frame, send_frame
+
+@pytest.fixture
+def server():
+    """An IPCServer on an ephemeral port whose handler records what it dispatched."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    calls = []
+    dispatched = threading.Event()
+
+    def handler(cmd, message):
+        calls.append((cmd, message.get("path")))
+        dispatched.set()
+        if message.get("path") == "broken":
+            raise ValueError("cannot load")
+        return {"seen": len(calls)}
+
+    srv = IPCServer(sock, handler, debounce=60.0)
+    srv.port = sock.getsockname()[1]
+    srv.calls = calls
+    srv.dispatched = dispatched
+    srv.start()
+    yield srv
+    srv.close()
+
+def test_round_trip_on_one_connection(server):
+    with IPCClient(server.port) as client:
+        first = client.load("/tmp/a")
+        second = client.status()
+    assert first["ok"] and first["cmd"] == "load" and first["seen"] == 1
+    assert second["id"] == first["id"] + 1 and second["seen"] == 2
+    assert server.calls == [("load", "/tmp/a"), ("status", None)]
+    assert server.stats["connections"] == 1
+
+def test_repeated_load_is_coalesced(server):
+    with IPCClient(server.port) as client:
+        client.load("/tmp/a")
+        again = client.load("/tmp/a")
+        other = client.prefetch("/tmp/a")
+    assert again["coalesced"] is True
+    assert "coalesced" not in other
+    assert server.calls == [("load", "/tmp/a"), ("prefetch", "/tmp/a")]
+    assert server.stats["coalesced"] == 1
+
+def test_failed_request_is_not_debounced(server):
+    with IPCClient(server.port) as client:
+        with pytest.raises(IPCError, match="cannot load"):
+            client.load("broken")
+        with pytest.raises(IPCError, match="cannot load"):
+            client.load("broken")
+    assert server.calls == [("load", "broken"), ("load", "broken")]
+
+def test_unknown_command_is_rejected(server):
+    with IPCClient(server.port) as client:
+        with pytest.raises(IPCError, match="Unknown command"):
+            client.request("explode")
+        # The connection stays usable after a rejection
+        assert client.status()["ok"]
+    assert server.calls == [("status", None)]
+
+@pytest.mark.parametrize("payload, path", [(b"/home/user/project", "/home/user/project"),
+                                           (b"C:\\src\\project\r\n", "C:\\src\\project"),
+                                           (b"DETECT", None)])
+def test_legacy_raw_payload_loads(server, payload, path):
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as conn:
+        conn.sendall(payload)
+        conn.shutdown(socket.SHUT_WR)
+        # The server closes without answering, as older instances did
+        assert conn.recv(1) == b""
+    assert server.dispatched.wait(5)
+    assert server.calls == [("load", path)]
+
+def test_frame_round_trip_and_limits():
+    left, right = socket.socketpair()
+    with left, right:
+        send_frame(left, {"cmd": "status", "id": 1})
+        assert recv_frame(right) == {"cmd": "status", "id": 1}
+        with pytest.raises(IPCError):
+            send_frame(left, {"path": "x" * MAX_FRAME})
+        left.sendall(struct.pack(">I", 2) + b"[]")
+        with pytest.raises(IPCError, match="not a JSON object"):
+            recv_frame(right)
+        left.sendall(b"DETECT")
+        left.shutdown(socket.SHUT_WR)
+        with pytest.raises(LegacyMessage) as legacy:
+            recv_frame(right)
+        assert legacy.value.data == b"DETECT"
+
+def test_unreachable_instance():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    with pytest.raises(IPCError, match="not reachable"):
+        IPCClient(port, timeout=1).status()
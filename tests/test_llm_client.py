@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from llm_client import CallableBackend, DeadlineExceeded, LLMError, OllamaBackend, SyncLLMClient
+
+@pytest.fixture
+def client():
+    return SyncLLMClient()
+
+class Recorder:
+    """Blocking backend function that tracks how many calls run at once."""
+    def __init__(self, delay=0.1, error=None):
+        self.delay = delay
+        self.error = error
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model, prompt, timeout, options):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return f"{model}:{prompt}"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+def test_concurrency_is_capped_per_backend(client):
+    fn = Recorder(delay=0.05)
+    client.register("b", CallableBackend(fn, max_concurrency=2))
+    futures = [client.submit("b", "m", f"p{i}") for i in range(6)]
+    assert [f.result(timeout=5) for f in futures] == [f"m:p{i}" for i in range(6)]
+    assert fn.peak == 2
+    assert client.stats("b")["max_in_flight"] == 2
+
+def test_slot_is_held_until_an_abandoned_call_returns(client):
+    fn = Recorder(delay=0.3)
+    client.register("b", CallableBackend(fn, max_concurrency=1))
+    with pytest.raises(DeadlineExceeded):
+        client.generate("b", "m", "first", timeout=0.05)
+    # The abandoned call still runs; a second request must wait for its slot
+    assert client.generate("b", "m", "second", timeout=5) == "m:second"
+    assert fn.peak == 1
+
+def test_identical_requests_are_coalesced(client):
+    fn = Recorder(delay=0.1)
+    client.register("b", CallableBackend(fn))
+    futures = [client.submit("b", "m", "same") for _ in range(3)]
+    assert {f.result(timeout=5) for f in futures} == {"m:same"}
+    assert fn.calls == 1
+    assert client.stats("b")["coalesced"] == 2
+
+def test_backend_errors_become_llm_errors(client):
+    client.register("b", CallableBackend(Recorder(delay=0, error=ValueError("boom"))))
+    with pytest.raises(LLMError, match="boom"):
+        client.generate("b", "m", "p", timeout=5)
+    assert client.stats("b")["errors"] == 1
+
+def test_register_without_replace_adopts_settings(client):
+    first = client.register("ollama", OllamaBackend("http://localhost:11434", max_concurrency=1))
+    newcomer = OllamaBackend("http://localhost:11434", max_concurrency=4)
+    assert client.register("ollama", newcomer, replace=False) is first
+    assert first.max_concurrency == 4
+    assert first.session is newcomer.session
@@ -0,0 +1,132 @@
+import pytest
+
+from benchmark import FakeGeminiServer, make_gemini_backend
+from llm_client import DeadlineExceeded, LLMError, SyncLLMClient
+from llm_router import LLMRouter
+
+MODEL = "models/bench"
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def servers():
+    """Started fake Gemini servers by name; stopped after the test."""
+    started = {}
+
+    def start(name, **kwargs):
+        started[name] = FakeGeminiServer(**kwargs).start()
+        return started[name]
+
+    yield start
+    for server in started.values():
+        server.stop()
+
+@pytest.fixture
+def client():
+    return SyncLLMClient()
+
+def register(client, servers, **configs):
+    for name, kwargs in configs.items():
+        client.register(name, make_gemini_backend(servers(name, **kwargs).url))
+
+def test_fails_over_to_the_next_route(client, servers):
+    register(client, servers, broken={"fail_rate": 1.0}, healthy={})
+    router = LLMRouter(client=client)
+
+    result = router.request([("broken", MODEL), ("healthy", MODEL)], "prompt", timeout=10)
+
+    assert result.text == "Update benchmark fixtures"
+    assert result.route == ("healthy", MODEL)
+    assert result.attempts == 2
+    assert router.stats["failovers"] == 1
+    assert router.profile(("broken", MODEL)).errors == 1
+
+def test_every_route_failing_raises(client, servers):
+    register(client, servers, a={"fail_rate": 1.0}, b={"fail_rate": 1.0})
+    router = LLMRouter(client=client)
+
+    with pytest.raises(LLMError, match="Every LLM route failed"):
+        router.generate([("a", MODEL), ("b", MODEL)], "prompt", timeout=10)
+    assert router.stats["failures"] == 1
+
+def test_failing_route_is_benched_until_cooldown(client, servers):
+    register(client, servers, broken={"fail_rate": 1.0}, healthy={})
+    clock = Clock()
+    router = LLMRouter(client=client, failure_threshold=2, cooldown=30.0, clock=clock)
+    routes = [("broken", MODEL), ("healthy", MODEL)]
+    # Keep the broken route first until it is benched, however its error rate ranks it
+    router.profile(("healthy", MODEL)).prior = 100.0
+
+    for _ in range(2):
+        router.request(routes, "prompt", timeout=10)
+    assert not router.healthy(("broken", MODEL))
+    assert router.rank(routes) == [("healthy", MODEL), ("broken", MODEL)]
+    result = router.request(routes, "prompt", timeout=10)
+    assert result.attempts == 1
+
+    clock.now += 31
+    assert router.healthy(("broken", MODEL))
+
+def test_deadline_is_enforced(client, servers):
+    register(client, servers, slow={"latency": 1.0})
+    router = LLMRouter(client=client)
+
+    with pytest.raises(DeadlineExceeded):
+        router.generate([("slow", MODEL)], "prompt", timeout=0.2)
+
+def test_hedge_to_another_backend_wins(client, servers):
+    register(client, servers, slow={"latency": 1.0}, fast={"latency": 0.02})
+    router = LLMRouter(client=client, min_hedge_samples=5)
+    slow, fast = ("slow", MODEL), ("fast", MODEL)
+    # History says slow is usually quick (hedge after 50 ms) and fast is worse on average
+    for _ in range(5):
+        router.record(slow, 0.05)
+        router.record(fast, 0.5)
+
+    result = router.request([slow, fast], "prompt", timeout=10, hedge=True)
+
+    assert result.route == fast
+    assert result.hedged
+    assert result.seconds < 0.8
+    assert router.stats["hedged"] == 1 and router.stats["hedge_wins"] == 1
+    # The loser's sample is censored: its latency rises, its error rate and request count do not
+    profile = router.profile(slow)
+    assert profile.requests == 5 and profile.error_rate == 0.0
+    assert len(profile.samples) == 6 and profile.latency > 0.05
+
+def test_no_hedge_without_enough_samples(client, servers):
+    register(client, servers, slow={"latency": 0.2}, fast={})
+    router = LLMRouter(client=client, min_hedge_samples=5)
+    assert router.hedge_delay(("slow", MODEL)) is None
+
+    result = router.request([("slow", MODEL), ("fast", MODEL)], "prompt", timeout=10, hedge=True)
+
+    assert result.route == ("slow", MODEL)
+    assert not result.hedged
+
+def test_no_hedge_on_the_same_backend(client, servers):
+    register(client, servers, only={"latency": 0.2})
+    router = LLMRouter(client=client, min_hedge_samples=1)
+    router.record(("only", MODEL), 0.01)
+
+    result = router.request([("only", MODEL), ("only", "models/other")], "prompt", timeout=10, hedge=True)
+
+    assert result.route == ("only", MODEL)
+    assert not result.hedged
+    assert router.stats["hedged"] == 0
+
+def test_censored_sample_never_lowers_latency():
+    router = LLMRouter(client=object())
+    route = ("a", MODEL)
+    router.record(route, 2.0)
+    router.record(route, 0.5, censored=True)
+
+    profile = router.profile(route)
+    assert profile.latency == 2.0
+    assert list(profile.samples) == [2.0, 2.0]
+    assert profile.requests == 1
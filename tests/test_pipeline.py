@@ -0,0 +1,106 @@
+import shutil
+import threading
+import time
+
+import pytest
+
+from conftest import git
+from pipeline import Pipeline, PipelineError, add_push_steps
+
+def test_steps_run_after_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def step(name, delay=0.0):
+        def fn():
+            time.sleep(delay)
+            with lock:
+                order.append(name)
+            return name.upper()
+        return fn
+
+    pipeline = (Pipeline()
+                .add("readme", step("readme", 0.05))
+                .add("stage", step("stage"), deps=["readme"])
+                .add("fetch", step("fetch"))
+                .add("push", step("push"), deps=["stage", "fetch"]))
+    results = pipeline.run()
+
+    assert results == {"readme": "README", "stage": "STAGE", "fetch": "FETCH", "push": "PUSH"}
+    assert order.index("readme") < order.index("stage") < order.index("push")
+    assert order.index("fetch") < order.index("push")
+    # fetch does not wait for the slow readme step
+    assert order.index("fetch") < order.index("readme")
+    assert all(pipeline.state(name) == Pipeline.DONE for name in pipeline.order)
+    assert pipeline.describe() == "4/4 done"
+
+def test_independent_steps_overlap():
+    barrier = threading.Barrier(2, timeout=2)
+    pipeline = Pipeline(max_workers=2).add("a", barrier.wait).add("b", barrier.wait)
+    pipeline.run()
+
+def test_failure_skips_dependents():
+    def fail():
+        raise RuntimeError("rejected")
+
+    ran = []
+    pipeline = (Pipeline()
+                .add("stage", fail, label="Staging")
+                .add("commit", lambda: ran.append("commit"), deps=["stage"])
+                .add("push", lambda: ran.append("push"), deps=["commit"]))
+    with pytest.raises(PipelineError) as failure:
+        pipeline.run()
+
+    assert failure.value.step == "stage"
+    assert isinstance(failure.value.error, RuntimeError)
+    assert str(failure.value) == "rejected"
+    assert ran == []
+    assert [pipeline.state(name) for name in pipeline.order] == [Pipeline.FAILED, Pipeline.SKIPPED, Pipeline.SKIPPED]
+
+def test_progress_reports_running_labels():
+    seen = []
+    pipeline = Pipeline(on_progress=lambda p: seen.append(p.describe()))
+    pipeline.add("readme", lambda: None, label="Generating README")
+    pipeline.run()
+    assert seen == ["0/1 done: Generating README", "1/1 done"]
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="Unknown dependency"):
+        Pipeline().add("push", lambda: None, deps=["stage"])
+
+def test_push_steps_stage_the_finished_readme(tmp_path):
+    origin = tmp_path / "origin.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(origin))
+    git(tmp_path, "clone", "-q", str(origin), str(work))
+    (work / "README.md").write_text("# Old\n")
+    git(work, "add", ".")
+    git(work, "commit", "-q", "-m", "Initial")
+    readme = "# New\n" + "".join(f"line {i}\n" for i in range(50))
+
+    def write_readme():
+        shutil.copy2(work / "README.md", work / "README.md.bak")
+        with open(work / "README.md", "w") as f:
+            for line in readme.splitlines(keepends=True):
+                f.write(line)
+                f.flush()
+                time.sleep(0.001)
+
+    def remote():
+        time.sleep(0.05)
+
+    pipeline = add_push_steps(Pipeline(), remote, lambda: git(work, "add", "."),
+                              lambda: git(work, "commit", "-q", "-m", "Update README"),
+                              lambda: git(work, "push", "-q", "origin", "HEAD:main"), write_readme=write_readme)
+    pipeline.run()
+
+    committed = git(work, "show", "--name-only", "--format=", "HEAD").split()
+    assert sorted(committed) == ["README.md", "README.md.bak"]
+    assert git(work, "show", "origin/main:README.md") == readme
+    assert git(work, "show", "origin/main:README.md.bak") == "# Old\n"
+    assert git(work, "status", "--porcelain") == ""
+
+def test_push_steps_without_readme():
+    pipeline = add_push_steps(Pipeline(), lambda: None, lambda: None, lambda: None, lambda: None)
+    assert pipeline.order == ["remote", "stage", "commit", "push"]
+    assert pipeline.steps["stage"]["deps"] == ()
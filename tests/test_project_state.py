@@ -0,0 +1,139 @@
+from conftest import git
+from project_state import TreeWatcher, WarmProjects, estimate_footprint, git_fingerprint, tree_changed
+
+class Context:
+    """Minimal warm-project context that records the changes it was given."""
+    def __init__(self, path, size=1024):
+        self.path = str(path)
+        self.size = size
+        self.changes = []
+
+    def apply_changes(self, changes):
+        self.changes.append(changes)
+
+    def footprint(self):
+        return self.size
+
+def test_watcher_reports_changes_and_skips_ignored(repo):
+    (repo / ".gitignore").write_text("*.log\n")
+    (repo / "a.py").write_text("a")
+    (repo / "b.py").write_text("b")
+    watcher = TreeWatcher(repo)
+    assert {"a.py", "b.py", ".gitignore"} <= set(watcher.snapshot)
+
+    (repo / "a.py").write_text("changed")
+    (repo / "b.py").unlink()
+    (repo / "c.py").write_text("c")
+    (repo / "debug.log").write_text("x")
+    assert watcher.poll() == {"added": ["c.py"], "removed": ["b.py"], "modified": ["a.py"]}
+
+    (repo / ".gitignore").write_text("*.py\n")
+    changes = watcher.poll()
+    assert changes["added"] == ["debug.log"]
+    assert changes["removed"] == ["a.py", "c.py"]
+
+def test_tree_changed_ignores_git_metadata():
+    before = {"a.py": (1, 1), ".git/index": (1, 1)}
+    assert not tree_changed(before, dict(before, **{".git/index": (2, 2)}))
+    assert tree_changed(before, dict(before, **{"a.py": (2, 1)}))
+
+def test_mark_synced_after_own_staging_is_clean(repo):
+    (repo / "a.py").write_text("a")
+    warm = WarmProjects()
+    warm.add(Context(repo))
+    since = warm.snapshot(repo)
+    git(repo, "add", "a.py")
+    warm.mark_synced(repo, since)
+    assert not warm.is_dirty(repo)
+    assert warm.validate(repo)
+
+def test_mark_synced_with_later_edit_stays_dirty(repo):
+    (repo / "a.py").write_text("a")
+    warm = WarmProjects()
+    context = Context(repo)
+    warm.add(context)
+    since = warm.snapshot(repo)
+    (repo / "a.py").write_text("edited meanwhile")
+    warm.mark_synced(repo, since)
+    assert warm.is_dirty(repo)
+    assert context.changes[-1]["modified"] == ["a.py"]
+
+def test_validate_notices_a_commit_behind_its_back(repo):
+    (repo / "a.py").write_text("a")
+    warm = WarmProjects()
+    warm.add(Context(repo))
+    warm.mark_synced(repo, warm.snapshot(repo))
+    before = git_fingerprint(repo)
+    git(repo, "add", "a.py")
+    git(repo, "commit", "-q", "-m", "Add a")
+    assert git_fingerprint(repo) != before
+    assert not warm.validate(repo)
+    assert warm.is_dirty(repo)
+
+def test_least_recently_used_project_is_evicted(tmp_path):
+    warm = WarmProjects(max_projects=2)
+    paths = [tmp_path / name for name in ("one", "two", "three")]
+    for path in paths[:2]:
+        path.mkdir()
+        warm.add(Context(path))
+    assert warm.get(paths[0]) is not None
+    paths[2].mkdir()
+    warm.add(Context(paths[2]))
+    assert warm.paths() == [str(paths[0]), str(paths[2])]
+    assert warm.get(paths[1]) is None
+    assert warm.stats["evictions"] == 1
+
+def test_footprint_counts_the_watcher_snapshot(tmp_path):
+    for i in range(10):
+        (tmp_path / f"file{i}.txt").write_text("x")
+    context = Context(tmp_path)
+    assert estimate_footprint(context) == 1024
+    assert estimate_footprint(context, TreeWatcher(tmp_path)) == 1024 + 10 * (len("file0.txt") + 160)
+
+def test_projects_over_the_byte_budget_are_evicted(tmp_path):
+    warm = WarmProjects(max_projects=10, max_bytes=25000)
+    paths = [tmp_path / name for name in ("one", "two", "three")]
+    for path in paths:
+        path.mkdir()
+        warm.add(Context(path, size=10000))
+    assert warm.paths() == [str(paths[1]), str(paths[2])]
+    assert warm.stats["evictions"] == 1
+    assert warm.stats["evicted_bytes"] == 10000
+    assert warm.stats["bytes"] == 20000
+
+def test_growing_project_evicts_the_others_but_stays(tmp_path):
+    warm = WarmProjects(max_projects=10, max_bytes=25000)
+    paths = [tmp_path / name for name in ("one", "two")]
+    contexts = []
+    for path in paths:
+        path.mkdir()
+        contexts.append(Context(path, size=10000))
+        warm.add(contexts[-1])
+
+    # Re-estimated when derived state is rebuilt; the most recent project is kept even alone over budget
+    contexts[1].size = 30000
+    warm.mark_synced(paths[1], warm.snapshot(paths[1]))
+    assert warm.paths() == [str(paths[1])]
+    assert warm.stats["bytes"] == 30000
+
+def test_worktree_changes_are_seen_through_its_gitdir_file(repo, tmp_path):
+    (repo / "a.py").write_text("a")
+    git(repo, "add", "a.py")
+    git(repo, "commit", "-q", "-m", "Add a")
+    worktree = tmp_path / "worktree"
+    git(repo, "worktree", "add", "-q", "-b", "feature", str(worktree))
+    assert (worktree / ".git").is_file()
+
+    before = git_fingerprint(worktree)
+    assert before[2] == "ref: refs/heads/feature" and before[3] is not None
+    warm = WarmProjects()
+    warm.add(Context(worktree))
+    warm.mark_synced(worktree, warm.snapshot(worktree))
+    watcher = TreeWatcher(worktree)
+
+    (worktree / "a.py").write_text("changed")
+    git(worktree, "commit", "-q", "-am", "Change a")
+    assert git_fingerprint(worktree)[3] != before[3]
+    assert not warm.validate(worktree)
+    # The index is the worktree's own, the branch ref lives in the main repository
+    assert {"a.py", ".git/index", ".git/refs/heads/feature"} <= set(watcher.poll()["modified"])
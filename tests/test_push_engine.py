@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+from conftest import git
+from push_engine import FlakyRunner, PushEngine, PushError, classify_failure, run_git
+
+@pytest.mark.parametrize("output, kind", [
+    (" ! [rejected]        main -> main (fetch first)\nerror: failed to push some refs", "non_fast_forward"),
+    ("hint: Updates were rejected because the tip of your current branch is behind", "non_fast_forward"),
+    ("fatal: Authentication failed for 'https://github.com/o/r.git/'", "auth"),
+    ("remote: Permission to o/r.git denied to someone.\nfatal: unable to access 'https://github.com/o/r.git/': "
+     "The requested URL returned error: 403", "auth"),
+    ("remote: error: GH006: Protected branch update failed for refs/heads/main.", "protected"),
+    (" ! [remote rejected] main -> main (pre-receive hook declined)", "protected"),
+    ("fatal: 'origin' does not appear to be a git repository", "no_remote"),
+    ("fatal: Unable to create '/r/.git/index.lock': File exists.", "lock"),
+    ("error: RPC failed; HTTP 502 curl 22 The requested URL returned error: 502", "server"),
+    ("fatal: the remote end hung up unexpectedly", "server"),
+    ("fatal: unable to access 'https://github.com/o/r.git/': Could not resolve host: github.com", "network"),
+    ("ssh: connect to host github.com port 22: Connection timed out", "network"),
+    ("error: something nobody has seen before", "unknown"),
+])
+def test_classify_failure(output, kind):
+    assert classify_failure(output) == kind
+
+@pytest.fixture
+def remote(tmp_path):
+    """A bare origin with one commit on main, and two clones of it: (local, other)."""
+    origin = tmp_path / "origin.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(origin))
+    clones = []
+    for name in ("local", "other"):
+        path = tmp_path / name
+        git(tmp_path, "clone", "-q", str(origin), str(path))
+        # run_git uses the real environment, so the clones carry their own identity
+        git(path, "config", "user.name", "Test")
+        git(path, "config", "user.email", "test@example.com")
+        git(path, "checkout", "-q", "-B", "main")
+        clones.append(path)
+    local, other = clones
+    commit(local, "README.md", "hello\n")
+    git(local, "push", "-q", "-u", "origin", "main")
+    git(other, "pull", "-q", "origin", "main")
+    git(other, "branch", "-q", "--set-upstream-to=origin/main")
+    return local, other
+
+def commit(path, name, text):
+    (path / name).write_text(text)
+    git(path, "add", name)
+    git(path, "commit", "-q", "-m", f"Edit {name}")
+
+def remote_files(path):
+    git(path, "fetch", "-q", "origin")
+    return sorted(git(path, "ls-tree", "--name-only", "origin/main").split())
+
+def engine(path, failures=None, **kwargs):
+    sleeps = []
+    runner = FlakyRunner(run_git, failures or {})
+    push = PushEngine(str(path), runner=runner, sleep=sleeps.append, rng=lambda: 1.0, **kwargs)
+    return push, runner, sleeps
+
+def test_transient_failures_are_retried_with_backoff(remote):
+    local, _ = remote
+    commit(local, "a.txt", "a\n")
+    failure = "fatal: unable to access 'https://example.com/r.git/': Could not resolve host: example.com"
+    push, runner, sleeps = engine(local, {"push": [failure, failure]}, base_delay=0.5)
+
+    push.push("main")
+
+    assert push.log == [("push", 1, "network"), ("push", 2, "network"), ("push", 3, "ok")]
+    assert sleeps == [0.5, 1.0]
+    assert "a.txt" in remote_files(local)
+
+def test_retries_give_up_after_max_attempts(remote):
+    local, _ = remote
+    failure = "error: RPC failed; HTTP 503 curl 22 The requested URL returned error: 503"
+    push, _, sleeps = engine(local, {"push": [failure] * 5}, max_attempts=3)
+
+    with pytest.raises(PushError) as error:
+        push.push("main")
+    assert error.value.kind == "server"
+    assert error.value.attempts == 3
+    assert len(sleeps) == 2
+
+def test_auth_failure_fails_fast(remote):
+    local, _ = remote
+    push, runner, sleeps = engine(local, {"push": ["fatal: Authentication failed for 'https://example.com/r.git/'"]})
+
+    with pytest.raises(PushError) as error:
+        push.push("main")
+    assert error.value.kind == "auth"
+    assert error.value.attempts == 1
+    assert "Authentication failed" in str(error.value)
+    assert sleeps == [] and runner.calls == ["push"]
+
+def test_rejected_push_is_rebased_and_retried(remote):
+    local, other = remote
+    commit(other, "theirs.txt", "theirs\n")
+    git(other, "push", "-q", "origin", "main")
+    commit(local, "mine.txt", "mine\n")
+    push, runner, _ = engine(local)
+
+    push.push("main")
+
+    assert runner.calls == ["push", "pull", "push"]
+    assert push.log[0] == ("push", 1, "non_fast_forward")
+    assert remote_files(local) == ["README.md", "mine.txt", "theirs.txt"]
+
+def test_prefetch_rebases_before_the_first_push(remote):
+    local, other = remote
+    commit(other, "theirs.txt", "theirs\n")
+    git(other, "push", "-q", "origin", "main")
+    commit(local, "mine.txt", "mine\n")
+    push, runner, _ = engine(local)
+
+    divergence = push.prefetch().result(timeout=30)
+    assert (divergence.ahead, divergence.behind, divergence.diverged) == (1, 1, True)
+    push.push("main")
+
+    assert runner.calls[-2:] == ["pull", "push"]
+    assert "non_fast_forward" not in [kind for _, _, kind in push.log]
+    assert remote_files(local) == ["README.md", "mine.txt", "theirs.txt"]
+
+def test_conflicting_rebase_is_aborted(remote):
+    local, other = remote
+    commit(other, "README.md", "theirs\n")
+    git(other, "push", "-q", "origin", "main")
+    commit(local, "README.md", "mine\n")
+    head = git(local, "rev-parse", "HEAD")
+    push, _, _ = engine(local)
+
+    with pytest.raises(PushError) as error:
+        push.push("main")
+    assert error.value.kind == "non_fast_forward"
+    assert git(local, "rev-parse", "HEAD") == head
+    assert not os.path.exists(local / ".git" / "rebase-merge")
+
+def test_missing_remote(remote):
+    local, _ = remote
+    push, _, _ = engine(local, remote="upstream")
+    with pytest.raises(PushError) as error:
+        push.push("main")
+    assert error.value.kind == "no_remote"
@@ -0,0 +1,86 @@
+import pytest
+
+from readme_cache import ReadmeCache, ReadmePlan
+
+README = """\
+# Project
+
+Intro paragraph.
+
+## What This Tool Does
+Does things.
+
+## Installation
+```bash
+## not a heading inside a fence
+pip install -r requirements.txt
+```
+
+## How to Run
+python main.py
+
+## Project Structure
+src/
+"""
+
+INPUTS = {"overview": "o1", "architecture": "a1", "installation": "i1", "run": "r1",
+          "technologies": "t1", "structure": "s1", "all": "p1"}
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReadmeCache(cache_dir=tmp_path, persist=False)
+
+@pytest.fixture
+def stored(cache, tmp_path):
+    """The cache after a full generation of README for tmp_path."""
+    cache.store(ReadmePlan("miss"), tmp_path, "model", "prompt", INPUTS, README, seconds=10.0)
+    return cache
+
+def test_split_sections(cache):
+    sections = cache.split_sections(README)
+    assert [(heading, kind) for heading, kind, _ in sections] == [
+        ("", "overview"), ("What This Tool Does", "overview"), ("Installation", "installation"),
+        ("How to Run", "run"), ("Project Structure", "structure")]
+    assert "## not a heading inside a fence" in sections[2][2]
+    assert "".join(text for _, _, text in sections) == README
+
+def test_unknown_heading_depends_on_everything(cache):
+    assert cache.kind("Acknowledgements") == "all"
+
+def test_plan_miss_without_record(cache, tmp_path):
+    assert cache.plan(tmp_path, "model", "prompt", INPUTS).status == "miss"
+
+def test_plan_hit_for_identical_prompt(stored, tmp_path):
+    plan = stored.plan(tmp_path, "model", "prompt", INPUTS)
+    assert plan.status == "hit"
+    assert plan.readme == README
+
+def test_plan_miss_for_other_model(stored, tmp_path):
+    assert stored.plan(tmp_path, "other-model", "prompt", INPUTS).status == "miss"
+
+def test_plan_partial_rewrites_only_stale_sections(stored, tmp_path):
+    inputs = dict(INPUTS, run="r2", all="p2")
+    plan = stored.plan(tmp_path, "model", "prompt v2", inputs)
+    assert plan.status == "partial"
+    assert plan.stale == [3]
+
+    readme = stored.splice(plan, {3: "## How to Run\npython -m app"})
+    assert readme == README.replace("python main.py\n\n", "python -m app\n")
+    saved = stored.store(plan, tmp_path, "model", "prompt v2", inputs, readme, seconds=2.0)
+    assert saved == 8.0
+    assert stored.stats["sections_reused"] == 4 and stored.stats["sections_regenerated"] == 1
+    assert stored.plan(tmp_path, "model", "prompt v2", inputs).status == "hit"
+
+def test_plan_miss_when_most_sections_are_stale(stored, tmp_path):
+    inputs = dict(INPUTS, overview="o2", installation="i2", run="r2", all="p2")
+    assert stored.plan(tmp_path, "model", "prompt v2", inputs).status == "miss"
+
+def test_plan_miss_when_no_section_maps_the_change(stored, tmp_path):
+    assert stored.plan(tmp_path, "model", "prompt v2", dict(INPUTS, all="p2")).status == "miss"
+
+def test_records_persist_across_instances(tmp_path):
+    first = ReadmeCache(cache_dir=tmp_path / "cache")
+    first.store(ReadmePlan("miss"), tmp_path, "model", "prompt", INPUTS, README, seconds=1.0)
+    second = ReadmeCache(cache_dir=tmp_path / "cache")
+    assert second.plan(tmp_path, "model", "prompt", INPUTS).status == "hit"
+    assert ReadmeCache(cache_dir=tmp_path / "cache", persist=False).plan(tmp_path, "model", "prompt", INPUTS).status == "miss"
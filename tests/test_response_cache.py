@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from response_cache import ResponseCache
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache" / "responses.json")
+
+def test_hits_and_misses(path):
+    cache = ResponseCache(path)
+    assert cache.get("a") is None
+    cache.put("a", "message")
+    assert cache.get("a") == "message"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+def test_keys_depend_on_routes():
+    routes = [("gemini", "models/gemini-2.0-flash"), ("gemini", "models/gemini-2.0-flash-lite")]
+    key = ResponseCache.make_key("commit", routes, "diff")
+    assert key == ResponseCache.make_key("commit", list(routes), "diff")
+    assert key != ResponseCache.make_key("commit", routes[:1], "diff")
+    assert key != ResponseCache.make_key("commit", [("ollama:http://localhost:11434", "llama3")], "diff")
+    assert key != ResponseCache.make_key("readme", routes, "diff")
+
+def test_evicts_least_recently_used_entry(path):
+    cache = ResponseCache(path, max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+
+def test_evicts_by_bytes(path):
+    cache = ResponseCache(path, max_bytes=10)
+    cache.put("a", "x" * 4)
+    cache.put("b", "x" * 4)
+    cache.put("c", "x" * 4)
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.stats()["bytes"] == 8
+    # An entry larger than the whole budget does not stay either
+    cache.put("d", "x" * 11)
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+def test_persists_entries_in_lru_order(path):
+    cache = ResponseCache(path)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    reloaded = ResponseCache(path, max_entries=2)
+    assert list(reloaded.entries) == ["b", "a", "c"]
+    assert reloaded.stats()["bytes"] == 3
+    reloaded.put("d", "4")
+    assert list(reloaded.entries) == ["c", "d"]
+
+def test_invalidate(path):
+    cache = ResponseCache(path)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.invalidate("a")
+    assert ResponseCache(path).get("a") is None
+    cache.invalidate()
+    assert ResponseCache(path).stats()["entries"] == 0
+
+def test_unreadable_file_starts_empty(path, tmp_path):
+    (tmp_path / "cache").mkdir()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert ResponseCache(path).stats()["entries"] == 0
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"a": 1}, f)
+    assert ResponseCache(path).stats()["entries"] == 0
+
+def test_failed_write_keeps_entries_in_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = ResponseCache(str(blocker / "responses.json"))
+    cache.put("a", "1")
+    assert cache.get("a") == "1"
+    assert cache.stats()["write_errors"] == 1
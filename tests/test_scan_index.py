@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+from analyzer import ProjectAnalyzer
+from scan_index import ScanIndex
+
+def entry(mtime, size, snippet=None):
+    return {"mtime": mtime, "size": size, "snippet": snippet, "class": "text", "hash": None}
+
+class Stat:
+    def __init__(self, mtime, size):
+        self.st_mtime_ns = mtime
+        self.st_size = size
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    return root
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
+
+def test_round_trip_and_lookup(project, cache_dir):
+    ScanIndex(project, cache_dir).save({"a.py": entry(1, 10, "x = 1")})
+
+    index = ScanIndex(project, cache_dir)
+    assert index.lookup("a.py", Stat(1, 10))["snippet"] == "x = 1"
+    assert index.lookup("a.py", Stat(2, 10)) is None
+    assert index.lookup("a.py", Stat(1, 11)) is None
+    assert index.lookup("b.py", Stat(1, 10)) is None
+
+def test_diff_by_mtime_and_size(project, cache_dir):
+    index = ScanIndex(project, cache_dir)
+    index.save({"same.py": entry(1, 10), "touched.py": entry(1, 10), "grown.py": entry(1, 10), "gone.py": entry(1, 10)})
+    changes = index.diff({"same.py": entry(1, 10), "touched.py": entry(2, 10), "grown.py": entry(1, 11), "new.py": entry(1, 1)})
+    assert changes == {"added": ["new.py"], "removed": ["gone.py"], "modified": ["grown.py", "touched.py"], "partial": False}
+
+def test_partial_scan_reports_no_removals(project, cache_dir):
+    index = ScanIndex(project, cache_dir)
+    index.save({"a.py": entry(1, 10), "b.py": entry(1, 10)})
+    changes = index.diff({"a.py": entry(2, 10), "c.py": entry(1, 1)}, partial=True)
+    assert changes == {"added": ["c.py"], "removed": [], "modified": ["a.py"], "partial": True}
+
+def test_partial_index_reports_no_additions(project, cache_dir):
+    ScanIndex(project, cache_dir).save({"a.py": entry(1, 10)}, partial=True)
+    index = ScanIndex(project, cache_dir)
+    assert index.partial
+    changes = index.diff({"a.py": entry(1, 10), "b.py": entry(1, 10)})
+    assert changes == {"added": [], "removed": [], "modified": [], "partial": True}
+
+def test_stale_version_or_root_is_ignored(project, cache_dir, tmp_path):
+    index = ScanIndex(project, cache_dir)
+    index.save({"a.py": entry(1, 10)})
+    with open(index.index_path, encoding="utf-8") as f:
+        data = json.load(f)
+    with open(index.index_path, "w", encoding="utf-8") as f:
+        json.dump(dict(data, version=ScanIndex.VERSION - 1), f)
+    assert ScanIndex(project, cache_dir).entries == {}
+
+    other = tmp_path / "other"
+    other.mkdir()
+    assert ScanIndex(other, cache_dir).entries == {}
+
+def write_tree(root, count, size=100):
+    for i in range(count):
+        path = root / f"pkg{i % 3}" / f"module{i:02}.py"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("#" * (size - 1) + "\n")
+
+def test_rescan_reports_changes_and_reuses_snippets(project, cache_dir):
+    write_tree(project, 6)
+    analyzer = ProjectAnalyzer(cache_dir=cache_dir, use_git=False)
+    first = analyzer.scan_project(project)
+    assert len(first["changes"]["added"]) == 6 and not first["truncated"]
+
+    (project / "pkg0" / "module00.py").write_text("changed = True\n")
+    os.remove(project / "pkg1" / "module01.py")
+    (project / "extra.py").write_text("x = 1\n")
+    second = analyzer.scan_project(project)
+
+    assert second["changes"] == {"added": ["extra.py"], "removed": [os.path.join("pkg1", "module01.py")],
+                                 "modified": [os.path.join("pkg0", "module00.py")], "partial": False}
+    assert second["snippets"][os.path.join("pkg0", "module00.py")] == "changed = True\n"
+
+def test_file_budget_stops_the_walk(project, cache_dir):
+    write_tree(project, 10)
+    analyzer = ProjectAnalyzer(cache_dir=cache_dir, use_git=False, max_files=4)
+    data = analyzer.scan_project(project)
+
+    assert len(data["tree"]) == 4
+    assert len(data["tree_model"]) == 4 and data["tree_model"].truncated
+    assert data["truncated"] and data["changes"]["partial"]
+    assert ScanIndex(project, cache_dir).partial
+
+    # A rescan within the same budget finds nothing removed or added
+    again = analyzer.scan_project(project)
+    assert again["changes"] == {"added": [], "removed": [], "modified": [], "partial": True}
+
+def test_byte_budget_limits_snippets(project, cache_dir):
+    write_tree(project, 10, size=100)
+    analyzer = ProjectAnalyzer(cache_dir=cache_dir, use_git=False, max_bytes=350)
+    data = analyzer.scan_project(project)
+
+    assert len(data["tree"]) == 10
+    assert len(data["snippets"]) == 3
+    assert data["truncated"]
+    assert not data["changes"]["partial"]
@@ -0,0 +1,185 @@
+import os
+import threading
+
+import pytest
+
+from summarizer import StructureSummarizer
+
+PYTHON = '''\
+"""Command-line tool that syncs folders.
+
+More detail that is not summarized.
+"""
+import os
+import sys, json
+from .config import load
+from pathlib import Path
+
+MAX_RETRIES = 3
+timeout = 10
+BANNER: str = "x" * 100
+
+def sync(src: str, dst: str, *, dry_run=False) -> int:
+    """Copies changed files."""
+    return 0
+
+async def fetch(url):
+    pass
+
+def _helper():
+    pass
+
+class Syncer(Base, metaclass=Meta):
+    """Keeps two trees equal."""
+    def __init__(self, root):
+        self.root = root
+
+    def run(self):
+        pass
+
+    def _private(self):
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
+'''
+
+JAVASCRIPT = '''\
+/**
+ * Tiny HTTP server for the dashboard.
+ */
+import express from "express";
+import { join } from 'path';
+const fs = require("fs");
+
+export const PORT = 8080;
+const url = "http://{not a brace}";
+
+export async function start(port, host) {
+  const app = express();
+  if (port) { console.log(`listening on ${port}`); }
+  return app;
+}
+
+export default class Dashboard extends Base {
+  constructor(options) {
+    this.options = options;
+  }
+  static async load(path) {
+    return null;
+  }
+  get title() { return "x"; }
+  _internal() {}
+  render() {
+    if (this.ready) {
+      return 1;
+    }
+  }
+}
+
+const handler = async (req, res) => {
+  res.send("ok");
+};
+
+export interface Options {
+  port: number;
+}
+
+app.listen(PORT);
+'''
+
+@pytest.fixture
+def summarizer(tmp_path):
+    return StructureSummarizer(cache_dir=tmp_path, persist=False)
+
+def test_python_summary(summarizer):
+    lines = summarizer.summarize("tool.py", PYTHON).splitlines()
+    assert lines == [
+        '"""Command-line tool that syncs folders."""',
+        "imports: os, sys, json, .config, pathlib",
+        "MAX_RETRIES = 3",
+        "BANNER = " + repr("x") + " * 100",
+        "def sync(src: str, dst: str, *, dry_run=False) -> int  # Copies changed files.",
+        "async def fetch(url)",
+        "def _helper()",
+        "class Syncer(Base):  # Keeps two trees equal.",
+        "    def __init__(self, root)",
+        "    def run(self)",
+        "entry point: if __name__ == '__main__' -> sys.exit, main",
+    ]
+
+def test_javascript_summary(summarizer):
+    lines = summarizer.summarize("server.ts", JAVASCRIPT).splitlines()
+    assert lines == [
+        "/* Tiny HTTP server for the dashboard. */",
+        "imports: express, path, fs",
+        "export const PORT = 8080",
+        "export async function start(port, host)",
+        "export default class Dashboard extends Base",
+        "    constructor(options)",
+        "    static async load(path)",
+        "    get title()",
+        "    render()",
+        "async handler = (req, res) =>",
+        "export interface Options",
+        "entry point: app.listen(PORT);",
+    ]
+
+def test_syntax_error_falls_back_to_none(summarizer):
+    assert summarizer.summarize("broken.py", "def broken(:\n    pass\n", digest="d1") is None
+    assert summarizer.stats["failures"] == 1
+    assert summarizer.lookup("d1") is None
+
+def test_long_summary_is_cut_at_a_line(tmp_path):
+    summarizer = StructureSummarizer(cache_dir=tmp_path, persist=False, max_chars=100)
+    source = "".join(f"def function_number_{i}(argument):\n    pass\n" for i in range(20))
+    summary = summarizer.summarize("many.py", source)
+    assert len(summary) <= 104 and summary.endswith("\n...")
+    assert summary.splitlines()[0] == "def function_number_0(argument)"
+
+def test_cached_by_digest_and_persisted(tmp_path):
+    first = StructureSummarizer(cache_dir=tmp_path)
+    summary = first.summarize("tool.py", PYTHON, digest="abc")
+    first.save()
+
+    second = StructureSummarizer(cache_dir=tmp_path)
+    assert second.lookup("abc") == summary
+    # A cached digest is answered without parsing the text again
+    assert second.summarize("tool.py", "not python at all (", digest="abc") == summary
+    assert second.stats == {"hits": 2, "misses": 0, "failures": 0}
+
+def test_concurrent_saves_merge(tmp_path):
+    # Separate instances stand in for batch workers in other processes sharing the cache file
+    workers = [StructureSummarizer(cache_dir=tmp_path) for _ in range(8)]
+    for n, worker in enumerate(workers):
+        worker.lookup("warm")  # loaded before any of the others saved
+        worker.summarize("tool.py", PYTHON, digest=f"d{n}")
+    barrier = threading.Barrier(len(workers))
+
+    def save(worker):
+        barrier.wait()
+        worker.save()
+
+    threads = [threading.Thread(target=save, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reloaded = StructureSummarizer(cache_dir=tmp_path)
+    assert all(reloaded.lookup(f"d{n}") is not None for n in range(len(workers)))
+    assert sorted(os.listdir(tmp_path)) == ["summaries.json"]
+
+def test_stale_lock_is_taken_over(tmp_path):
+    lock = tmp_path / "summaries.lock"
+    lock.write_text("")
+    os.utime(lock, (0, 0))
+    summarizer = StructureSummarizer(cache_dir=tmp_path)
+    summarizer.summarize("tool.py", PYTHON, digest="abc")
+    summarizer.save()
+    assert StructureSummarizer(cache_dir=tmp_path).lookup("abc") is not None
+    assert not lock.exists()
+
+def test_supports(summarizer):
+    assert summarizer.supports("a.py") and summarizer.supports("b.tsx")
+    assert not summarizer.supports("c.md")
@@ -0,0 +1,108 @@
+from tree_model import FileTree
+
+PATHS = {
+    "README.md": 100,
+    "setup.py": 50,
+    "src/app.py": 1000,
+    "src/util.py": 200,
+    "src/core/engine.py": 3000,
+    "src/core/model.py": 2000,
+    "docs/index.md": 400,
+}
+
+def make_tree(**kwargs):
+    return FileTree.from_paths(PATHS, PATHS, **kwargs)
+
+def test_aggregates():
+    tree = make_tree()
+    assert len(tree) == 7
+    assert tree.stats()["bytes"] == sum(PATHS.values())
+    src = tree.find("src")
+    assert (src.total_files, src.file_count, src.total_bytes) == (4, 2, 6200)
+    assert tree.summary(src) == "4 files, 6.1 KB: 4 .py"
+    assert tree.find("missing") is None
+
+def test_full_render_lists_every_file():
+    text, depth = make_tree().view()
+    assert sorted(text.splitlines()) == sorted(PATHS)
+    assert depth is None
+
+def test_depth_limit_collapses_deeper_directories():
+    text, depth = make_tree().view(depth=1)
+    assert "src/core/ (2 files, 4.9 KB: 2 .py)" in text.splitlines()
+    assert "src/app.py" in text.splitlines()
+    assert depth == 1
+
+def test_budget_expands_level_by_level():
+    tree = make_tree()
+    full = tree.render()
+    assert tree.view(budget=len(full)) == (full, None)
+
+    text, depth = tree.view(budget=len(full) - 1)
+    assert text == tree.render(depth=1)
+    assert "src/core/ (2 files, 4.9 KB: 2 .py)" in text.splitlines()
+    assert depth == 1
+
+def test_budget_prefers_larger_directories():
+    big = [f"big/module_{name}.py" for name in "abc"]
+    tree = FileTree.from_paths(big + ["small/module_d.py", "small/module_e.py"])
+    collapsed = tree.render(depth=0)
+    text, depth = tree.view(budget=len(collapsed) + 35)
+    assert text.splitlines() == big + ["small/ (2 files: 2 .py)"]
+    assert depth == 0
+
+def test_indented_outline():
+    text = make_tree().render(indent=True)
+    assert text.splitlines()[:3] == ["README.md", "setup.py", "docs/"]
+    assert "  core/" in text.splitlines()
+    assert "    engine.py" in text.splitlines()
+
+def test_budget_smaller_than_root_marks_dropped_lines():
+    tree = FileTree.from_paths([f"file{i:03}.txt" for i in range(100)])
+    text, depth = tree.view(budget=200)
+    lines = text.splitlines()
+    assert len(text) <= 200
+    assert lines[-1].startswith("... (+") and lines[-1].endswith("more entries; 100 files in total)")
+    assert lines[0] == "file000.txt"
+    assert depth == 0
+
+    tiny, _ = tree.view(budget=10)
+    assert len(tiny) == 10 and tiny.startswith("... (+")
+
+def test_files_per_dir_and_caps():
+    tree = FileTree.from_paths([f"pkg/m{i}.py" for i in range(30)], max_files_per_dir=5)
+    text = tree.render(files_per_dir=3)
+    assert "pkg/... (+27 more files)" in text.splitlines()
+    assert len(tree.find("pkg").files) == 5
+
+    capped = FileTree.from_paths(["a/x.py", "b/y.py", "c/z.py"], max_dirs=2)
+    assert capped.stats()["unplaced"] == 2
+    assert len(capped) == 3
+
+def test_remove_updates_aggregates_and_prunes_directories():
+    tree = make_tree()
+    assert tree.remove("src/core/engine.py")
+    assert tree.remove("src/core/model.py")
+    assert tree.find("src/core") is None
+    assert tree.find("src").total_bytes == 1200
+    assert tree.stats()["dirs"] == 3
+    assert len(tree) == 5
+    assert not tree.remove("src/core/engine.py")
+    assert not tree.remove("nowhere/file.py")
+    assert sorted(tree.render().splitlines()) == sorted(p for p in PATHS if not p.startswith("src/core/"))
+
+def test_remove_then_add_matches_fresh_tree():
+    tree = make_tree()
+    tree.remove("src/util.py")
+    tree.add("src/util.py", 200)
+    assert tree.render() == make_tree().render()
+    assert tree.stats() == make_tree().stats()
+
+def test_truncated_walk_is_marked():
+    tree = make_tree()
+    tree.truncated = True
+    text, depth = tree.view()
+    assert text.splitlines()[-1] == "... (listing stopped after 7 files)"
+    assert depth == 0
+    assert tree.stats()["truncated"]
+    assert tree.view(budget=len(text))[0] == text
@@ -0,0 +1,75 @@
+from ui_dispatch import LogBuffer
+
+class Dispatcher:
+    """Collects scheduled calls; run() plays the Tk thread's wake-up."""
+    def __init__(self):
+        self.calls = []
+
+    def call_soon(self, fn, *args):
+        self.calls.append((fn, args))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for fn, args in calls:
+            fn(*args)
+
+class Textbox:
+    """The slice of the Tk text widget API LogBuffer uses, with "line.column" indices."""
+    def __init__(self):
+        self.text = ""
+        self.inserts = 0
+
+    def insert(self, index, text):
+        assert index == "end"
+        self.inserts += 1
+        self.text += text
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        if end == "end":
+            self.text = ""
+        else:
+            line = int(end.split(".")[0])
+            self.text = "".join(self.text.splitlines(keepends=True)[line - 1:])
+
+    def see(self, index):
+        pass
+
+def test_writes_are_batched_into_one_insert():
+    dispatcher, textbox = Dispatcher(), Textbox()
+    log = LogBuffer(dispatcher, textbox)
+    log.line("one")
+    log.write("tw")
+    log.write("o")
+    assert len(dispatcher.calls) == 1
+    dispatcher.run()
+    assert textbox.text == "one\ntwo"
+    assert textbox.inserts == 1
+    assert log.lines() == ["one", "two"]
+
+def test_textbox_keeps_the_last_lines():
+    dispatcher, textbox = Dispatcher(), Textbox()
+    log = LogBuffer(dispatcher, textbox, max_lines=3)
+    for i in range(5):
+        log.line(f"line {i}")
+        dispatcher.run()
+    assert textbox.text == "line 2\nline 3\nline 4\n"
+    assert log.lines() == ["line 2", "line 3", "line 4"]
+    assert log.stats["trimmed_lines"] == 2
+
+def test_batch_larger_than_the_cap_renders_only_its_tail():
+    dispatcher, textbox = Dispatcher(), Textbox()
+    log = LogBuffer(dispatcher, textbox, max_lines=3)
+    log.line("old")
+    dispatcher.run()
+    for i in range(10):
+        log.line(f"line {i}")
+    dispatcher.run()
+    assert textbox.text == "line 7\nline 8\nline 9\n"
+    assert log.stats["trimmed_lines"] == 8
+    assert log.stats["flushes"] == 2
+
+    log.line("next")
+    dispatcher.run()
+    assert textbox.text == "line 8\nline 9\nnext\n"
+    assert log.stats["trimmed_lines"] == 9
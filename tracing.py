@@ -0,0 +1,177 @@
+"""
+Lightweight phase tracing shared by PushAgent and the 2.0 pipeline.
+
+Spans nest per thread and record free-form attributes (commands, exit codes, byte counts,
+prompt sizes). Traces export as Chrome trace-event JSON (load in chrome://tracing or
+Perfetto) and render as an indented text summary for the GUI log. When the tracer is
+disabled, span() hands back a shared no-op object so instrumented code pays only a call.
+
+Set PUSHAGENT_TRACE=1 to enable tracing at startup.
+"""
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ("tracer", "id", "parent", "name", "attrs", "tid", "start", "duration")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = None
+        self.parent = None
+        self.tid = None
+        self.start = None
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.id = next(self.tracer._ids)
+        self.parent = stack[-1].id if stack else None
+        self.tid = threading.get_ident()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            message = str(exc).strip().splitlines()
+            self.attrs["error"] = f"{exc_type.__name__}: {message[0][:120] if message else ''}"
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._record(self)
+        return False
+
+class Tracer:
+    def __init__(self, enabled=False, max_spans=10000):
+        self.enabled = enabled
+        self._spans = deque(maxlen=max_spans)
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    @contextlib.contextmanager
+    def attach(self, parent):
+        """Makes parent (a span opened on another thread) the parent of spans opened here."""
+        if not isinstance(parent, Span):
+            yield
+            return
+        stack = self._stack()
+        stack.append(parent)
+        try:
+            yield
+        finally:
+            if stack and stack[-1] is parent:
+                stack.pop()
+
+    def record(self, span, start):
+        """
+        Records a span timed outside a with-block, e.g. one that spans generator suspensions.
+        It is attached to whatever span is open on the calling thread.
+        """
+        if not isinstance(span, Span):
+            return
+        stack = self._stack()
+        span.id = next(self._ids)
+        span.parent = stack[-1].id if stack else None
+        span.tid = threading.get_ident()
+        span.start = start
+        span.duration = time.perf_counter() - start
+        self._record(span)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def spans(self):
+        with self._lock:
+            return sorted(self._spans, key=lambda s: s.start)
+
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for span in self.spans():
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - self._origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.tid,
+                "args": {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v) for k, v in span.attrs.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        """Writes the recorded spans as Chrome trace-event JSON and returns the path."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+    def summary(self, root=None, max_lines=40):
+        """
+        Indented per-phase timings. With a root span, only that span's subtree is shown;
+        otherwise every top-level span is.
+        """
+        spans = self.spans()
+        children = {}
+        for span in spans:
+            children.setdefault(span.parent, []).append(span)
+        roots = [root] if root is not None and root.duration is not None else children.get(None, [])
+
+        lines = []
+        def walk(span, depth):
+            if len(lines) >= max_lines:
+                return
+            details = ", ".join(f"{k}={v}" for k, v in span.attrs.items() if k != "cmd")
+            line = f"{'  ' * depth}{span.name}: {span.duration * 1000:.0f} ms"
+            lines.append(f"{line} ({details})" if details else line)
+            for child in children.get(span.id, []):
+                walk(child, depth + 1)
+
+        for span in roots:
+            walk(span, 0)
+        return "\n".join(lines)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+tracer = Tracer(enabled=os.environ.get("PUSHAGENT_TRACE", "") not in ("", "0"))
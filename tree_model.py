@@ -0,0 +1,281 @@
+"""
+Compact, memory-bounded model of a project's file tree.
+
+Paths are streamed in once with add() (and taken out again with remove()) and stored as a
+trie of directory nodes. Every directory keeps aggregates for its whole subtree: file count,
+total bytes and an extension histogram. A summary of any directory is therefore free to compute, however large it is.
+
+Memory stays bounded on monorepos:
+- a directory lists at most max_files_per_dir file names and only counts the rest;
+- at most max_dirs directory nodes are created, and deeper files are counted in the
+  deepest existing ancestor;
+- histograms keep max_exts extensions plus "other".
+
+render() produces a depth- or budget-limited view: flat paths for prompts, or an indented
+outline for display. A walk that stopped early sets `truncated`, and the view then ends
+with a line saying so.
+
+    tree = FileTree()
+    for rel_path, size in walk():
+        tree.add(rel_path, size)
+    print(tree.render(budget=2000, files_per_dir=10))
+"""
+import os
+from collections import Counter
+
+class TreeNode:
+    __slots__ = ("name", "parent", "depth", "dirs", "files", "file_count", "total_files", "total_bytes", "exts")
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.dirs = {}
+        # (name, size) of the first max_files_per_dir direct files; file_count counts all of them
+        self.files = []
+        self.file_count = 0
+        self.total_files = 0
+        self.total_bytes = 0
+        self.exts = Counter()
+
+    @property
+    def path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "/".join(reversed(parts))
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+class FileTree:
+    OTHER = "other"
+
+    def __init__(self, max_files_per_dir=256, max_dirs=20000, max_exts=8):
+        self.max_files_per_dir = max_files_per_dir
+        self.max_dirs = max_dirs
+        self.max_exts = max_exts
+        self.root = TreeNode("")
+        self.dir_count = 1
+        # Characters of the plain newline-joined listing, to know when it fits a budget as is
+        self.path_chars = 0
+        # Files counted in an ancestor because max_dirs was reached
+        self.unplaced = 0
+        # Set by a caller that stopped adding paths before the end of its walk
+        self.truncated = False
+
+    @classmethod
+    def from_paths(cls, paths, sizes=None, **kwargs):
+        tree = cls(**kwargs)
+        for path in paths:
+            tree.add(path, sizes.get(path, 0) if sizes else 0)
+        return tree
+
+    def __len__(self):
+        return self.root.total_files
+
+    @staticmethod
+    def extension(name):
+        return os.path.splitext(name)[1] or name
+
+    def add(self, rel_path, size=0):
+        parts = rel_path.replace("\\", "/").strip("/").split("/")
+        name = parts[-1]
+        ext = self.extension(name)
+        self.path_chars += len(rel_path) + 1
+        node = self.root
+        self._count(node, ext, size)
+        for part in parts[:-1]:
+            child = node.dirs.get(part)
+            if child is None:
+                if self.dir_count >= self.max_dirs:
+                    self.unplaced += 1
+                    return
+                child = node.dirs[part] = TreeNode(part, node)
+                self.dir_count += 1
+            node = child
+            self._count(node, ext, size)
+        node.file_count += 1
+        if len(node.files) < self.max_files_per_dir:
+            node.files.append((name, size))
+
+    def remove(self, rel_path, size=None):
+        """
+        Takes a file back out; returns False if it was never counted. Without a size, the one
+        recorded for a listed file is used, otherwise 0, so total bytes are approximate then.
+        """
+        parts = rel_path.replace("\\", "/").strip("/").split("/")
+        name = parts[-1]
+        path = [self.root]
+        for part in parts[:-1]:
+            child = path[-1].dirs.get(part)
+            if child is None:
+                return False
+            path.append(child)
+        node = path[-1]
+        if node.file_count == 0:
+            return False
+        listed = next((i for i, (listed_name, _) in enumerate(node.files) if listed_name == name), None)
+        if listed is not None:
+            listed_size = node.files.pop(listed)[1]
+            size = listed_size if size is None else size
+        size = size or 0
+        node.file_count -= 1
+        ext = self.extension(name)
+        self.path_chars -= len(rel_path) + 1
+        for ancestor in path:
+            ancestor.total_files -= 1
+            ancestor.total_bytes -= size
+            key = ext if ancestor.exts.get(ext) else self.OTHER
+            ancestor.exts[key] -= 1
+            if ancestor.exts[key] <= 0:
+                del ancestor.exts[key]
+        # Drop directories that became empty
+        for child, parent in zip(reversed(path[1:]), reversed(path[:-1])):
+            if child.total_files > 0:
+                break
+            del parent.dirs[child.name]
+            self.dir_count -= 1
+        return True
+
+    def _count(self, node, ext, size):
+        node.total_files += 1
+        node.total_bytes += size
+        if ext in node.exts or len(node.exts) < self.max_exts:
+            node.exts[ext] += 1
+        else:
+            node.exts[self.OTHER] += 1
+
+    def find(self, rel_dir):
+        """The node of a directory, or None."""
+        node = self.root
+        for part in rel_dir.replace("\\", "/").strip("/").split("/") if rel_dir else ():
+            node = node.dirs.get(part)
+            if node is None:
+                return None
+        return node
+
+    def stats(self):
+        return {"files": self.root.total_files, "dirs": self.dir_count, "bytes": self.root.total_bytes,
+                "unplaced": self.unplaced, "path_chars": self.path_chars, "truncated": self.truncated}
+
+    def summary(self, node):
+        """'12 files, 3.4 MB: 8 .py, 3 .md, 1 Makefile' for a directory's whole subtree."""
+        top = ", ".join(f"{count} {ext}" for ext, count in node.exts.most_common(4))
+        size = f", {format_size(node.total_bytes)}" if node.total_bytes else ""
+        return f"{node.total_files} files{size}: {top}"
+
+    # --- Rendering ---
+
+    def _collapsed_line(self, node, indent):
+        if indent:
+            return f"{'  ' * (node.depth - 1)}{node.name}/ ({self.summary(node)})"
+        return f"{node.path}/ ({self.summary(node)})"
+
+    def _header_line(self, node, indent):
+        # Only the outline has a line of its own for an expanded directory
+        return f"{'  ' * (node.depth - 1)}{node.name}/" if indent and node.parent is not None else None
+
+    def _file_lines(self, node, files_per_dir, indent):
+        files = sorted(node.files)
+        shown = files if files_per_dir is None else files[:files_per_dir]
+        prefix = "  " * node.depth if indent else (node.path + "/" if node.parent is not None else "")
+        lines = [f"{prefix}{name}" for name, _ in shown]
+        hidden = node.file_count - len(shown)
+        unlisted = node.total_files - node.file_count - sum(d.total_files for d in node.dirs.values())
+        if hidden > 0:
+            lines.append(f"{prefix}... (+{hidden} more files)")
+        if unlisted > 0:
+            lines.append(f"{prefix}... (+{unlisted} files in unlisted directories)")
+        return lines, hidden > 0 or unlisted > 0
+
+    def _own_cost(self, node, files_per_dir, indent):
+        """Characters node adds when expanded with all of its subdirectories collapsed."""
+        lines, _ = self._file_lines(node, files_per_dir, indent)
+        lines += [self._collapsed_line(d, indent) for d in node.dirs.values()]
+        header = self._header_line(node, indent)
+        if header is not None:
+            lines.append(header)
+        return sum(len(line) + 1 for line in lines)
+
+    def view(self, depth=None, budget=None, files_per_dir=20, indent=False):
+        """
+        Returns (text, collapsed_depth). Directories deeper than depth stay collapsed (0 lists
+        only the root's files); with a budget in characters, directories are expanded level
+        by level, larger ones first, as long as the text still fits. collapsed_depth is the
+        depth of the shallowest directory shown as a summary minus one, or None if nothing
+        was elided.
+        """
+        expanded = {id(self.root)}
+        stopped = [f"... (listing stopped after {self.root.total_files} files)"] if self.truncated else []
+        # Costs count a newline per line, the joined text has one less
+        remaining = None if budget is None else (budget + 1 - self._own_cost(self.root, files_per_dir, indent)
+                                                 - sum(len(line) + 1 for line in stopped))
+        level = list(self.root.dirs.values())
+        while level and (depth is None or level[0].depth <= depth):
+            next_level = []
+            costs = {id(d): self._own_cost(d, files_per_dir, indent) - len(self._collapsed_line(d, indent)) - 1
+                     for d in level} if remaining is not None else {}
+            # Expansions that shorten the text come first; then larger directories get the detail
+            # when a level does not fit completely
+            for node in sorted(level, key=lambda d: (costs.get(id(d), 0) > 0, -d.total_files, d.name)):
+                if remaining is not None:
+                    cost = costs[id(node)]
+                    if cost > remaining:
+                        continue
+                    remaining -= cost
+                expanded.add(id(node))
+                next_level.extend(node.dirs.values())
+            level = next_level
+
+        lines = []
+        elided = []
+        self._emit(self.root, expanded, files_per_dir, indent, lines, elided)
+        if stopped:
+            lines.extend(stopped)
+            elided.append(1)
+        if budget is not None and sum(len(line) + 1 for line in lines) - 1 > budget:
+            lines = self._cut(lines, budget)
+            elided.append(1)
+        return "\n".join(lines), (min(elided) - 1 if elided else None)
+
+    def _cut(self, lines, budget):
+        """
+        Even the root's own lines do not fit: keeps whole lines and ends with a marker for the
+        dropped ones, so they do not vanish from the view.
+        """
+        totals = f"{self.root.total_files} files"
+        if self.root.total_bytes:
+            totals += f", {format_size(self.root.total_bytes)}"
+        kept = []
+        used = 0
+        for i, line in enumerate(lines):
+            marker = f"... (+{len(lines) - i} more entries; {totals} in total)"
+            if used + len(line) + 1 + len(marker) > budget:
+                return kept + [marker] if kept else [marker[:budget]]
+            kept.append(line)
+            used += len(line) + 1
+        return kept
+
+    def render(self, depth=None, budget=None, files_per_dir=20, indent=False):
+        return self.view(depth, budget, files_per_dir, indent)[0]
+
+    def _emit(self, node, expanded, files_per_dir, indent, lines, elided):
+        header = self._header_line(node, indent)
+        if header is not None:
+            lines.append(header)
+        file_lines, hidden = self._file_lines(node, files_per_dir, indent)
+        lines.extend(file_lines)
+        if hidden:
+            elided.append(node.depth + 1)
+        for child in sorted(node.dirs.values(), key=lambda d: d.name):
+            if id(child) in expanded:
+                self._emit(child, expanded, files_per_dir, indent, lines, elided)
+            else:
+                lines.append(self._collapsed_line(child, indent))
+                elided.append(child.depth)
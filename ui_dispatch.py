@@ -0,0 +1,164 @@
+"""
+Event-driven hand-off from worker threads to the Tk main loop.
+
+Instead of polling a queue on a timer, workers schedule callables with
+Dispatcher.call_soon(). The first call after an idle period wakes the loop once, with
+event_generate from a worker thread or after_idle on the Tk thread itself; everything
+queued until the loop gets to it runs in that single wake-up. An idle window costs nothing.
+
+EventQueue keeps the (action, payload) queue interface the windows already use, and
+LogBuffer batches log writes into one textbox insert per wake-up while capping the
+textbox at a fixed number of lines.
+"""
+import queue
+import threading
+import tkinter as tk
+from collections import deque
+
+DEFAULT_EVENT = "<<PushAgentDispatch>>"
+
+class Dispatcher:
+    """Runs callables on the Tk thread of widget, waking its loop only when there is work."""
+    def __init__(self, widget, event=DEFAULT_EVENT):
+        self.widget = widget
+        self.event = event
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self.closed = False
+        self.stats = {"calls": 0, "wakeups": 0, "max_batch": 0}
+        widget.bind(event, self._run, add="+")
+        # Calls made before mainloop() starts wait for this first idle callback instead of
+        # touching Tk from a thread while the loop is not running yet
+        self._pending = True
+        widget.after_idle(self._run)
+
+    def call_soon(self, fn, *args):
+        """Schedules fn(*args) on the Tk thread; safe to call from any thread."""
+        with self._lock:
+            if self.closed:
+                return
+            self._calls.append((fn, args))
+            self.stats["calls"] += 1
+            if self._pending:
+                return
+            self._pending = True
+        try:
+            if threading.current_thread() is threading.main_thread():
+                self.widget.after_idle(self._run)
+            else:
+                self.widget.event_generate(self.event, when="tail")
+        except (RuntimeError, tk.TclError):
+            # The window is gone (or its loop stopped); the next call_soon tries again
+            with self._lock:
+                self._pending = False
+
+    def close(self):
+        """Drops pending calls and ignores new ones, e.g. right before the window is destroyed."""
+        with self._lock:
+            self.closed = True
+            self._calls.clear()
+
+    def _run(self, event=None):
+        with self._lock:
+            self._pending = False
+            calls = list(self._calls)
+            self._calls.clear()
+        if not calls:
+            return
+        self.stats["wakeups"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(calls))
+        for fn, args in calls:
+            if self.closed:
+                return
+            fn(*args)
+
+class EventQueue(queue.Queue):
+    """
+    Drop-in replacement for the polled queue.Queue of (action, payload) tuples: put()
+    schedules on_event() on the Tk thread, which drains the queue with get_nowait().
+    """
+    def __init__(self, dispatcher, on_event):
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.on_event = on_event
+        self._scheduled = False
+        self._schedule_lock = threading.Lock()
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        with self._schedule_lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.dispatcher.call_soon(self._drain)
+
+    def _drain(self):
+        with self._schedule_lock:
+            self._scheduled = False
+        self.on_event()
+
+class LogBuffer:
+    """
+    Thread-safe log for a Tk/CTk textbox. Writes are collected and inserted as one batch per
+    wake-up, and the textbox keeps only the last max_lines lines, so long runs neither grow
+    memory nor slow down rendering. lines() returns the same capped history as plain text.
+    """
+    def __init__(self, dispatcher, textbox, max_lines=5000):
+        self.dispatcher = dispatcher
+        self.textbox = textbox
+        self.max_lines = max_lines
+        self._history = deque(maxlen=max_lines)
+        self._partial = ""
+        self._pending = []
+        self._scheduled = False
+        self._rendered = 0
+        self._lock = threading.Lock()
+        self.stats = {"writes": 0, "flushes": 0, "trimmed_lines": 0}
+
+    def write(self, text):
+        """Appends text as is; a trailing newline is up to the caller (see line())."""
+        if not text:
+            return
+        with self._lock:
+            self.stats["writes"] += 1
+            self._pending.append(text)
+            *complete, self._partial = (self._partial + text).split("\n")
+            self._history.extend(complete)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.dispatcher.call_soon(self.flush)
+
+    def line(self, message):
+        self.write(message + "\n")
+
+    def lines(self):
+        with self._lock:
+            return list(self._history) + ([self._partial] if self._partial else [])
+
+    def flush(self):
+        """Inserts everything written since the last flush; runs on the Tk thread."""
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending = []
+            self._scheduled = False
+        if not text:
+            return
+        self.stats["flushes"] += 1
+        new_lines = text.count("\n")
+        if new_lines >= self.max_lines:
+            # The whole textbox would be trimmed anyway; render only the tail of this batch
+            kept = text.split("\n")[-(self.max_lines + 1):]
+            self.stats["trimmed_lines"] += self._rendered + new_lines - (len(kept) - 1)
+            self.textbox.delete("1.0", "end")
+            self._rendered = 0
+            text = "\n".join(kept)
+            new_lines = len(kept) - 1
+        self.textbox.insert("end", text)
+        self._rendered += new_lines
+        excess = self._rendered - self.max_lines
+        if excess > 0:
+            self.textbox.delete("1.0", f"{excess + 1}.0")
+            self._rendered -= excess
+            self.stats["trimmed_lines"] += excess
+        self.textbox.see("end")